@@ -0,0 +1,120 @@
+"""
+benchmarks.load_test
+--------------------
+Load tests the publish path: starts the mock Fabric API (benchmarks/mock_fabric.py), generates a synthetic
+repository and runs a real (non dry-run) `deploy` against the mock, then reports throughput, throttling and
+failures as seen by the server.
+
+    python benchmarks/load_test.py --items 1000 --max-workers 8 --requests-per-second 50 \\
+        --latency-ms 80 --throttle-rps 40 --failure-ratio 0.005
+
+Use it to pick --max-workers / --requests-per-second / --max-retries before pointing a deploy at a real tenant.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fabric_deploy.adapters.fabric_workspace import API_ROOT_URL_ENV
+from fabric_deploy.utils.state import STATE_DIR_ENV
+
+from mock_fabric import MockFabric, add_config_arguments, config_from_args, serve
+from run import _WORKSPACE_ID, _static_token
+from synthetic_repo import add_spec_arguments, generate, spec_from_args
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test `deploy` against a local mock Fabric API")
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--deploy-mode", choices=("full", "incremental"), default="full")
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--max-retries", type=int, default=None)
+    parser.add_argument("--requests-per-second", type=float, default=None)
+    parser.add_argument("--trace-file", type=Path, default=None, help="forwarded to deploy")
+    parser.add_argument("--work-dir", type=Path, default=None, help="where to generate the repository (kept)")
+    parser.add_argument("--output", type=Path, default=None, help="write the report JSON here")
+    add_spec_arguments(parser)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    spec = spec_from_args(args, args.items)
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="fabric-deploy-load-"))
+    root = work_dir / f"repo-{spec.items}-{spec.seed}"
+    if not root.exists():
+        generate(root, spec)
+        print(f"Generated {spec.items} item(s): {root}")
+
+    fabric = MockFabric(config_from_args(args))
+    server = serve(fabric)
+    url = f"http://127.0.0.1:{server.server_port}"
+    print(f"Mock Fabric API on {url}")
+
+    cmd = [
+        sys.executable,
+        "-m",
+        "fabric_deploy",
+        "deploy",
+        "--workspace-id",
+        _WORKSPACE_ID,
+        "--environment",
+        spec.environment,
+        "--source-directory",
+        str(root / "fabric"),
+        "--deploy-mode",
+        args.deploy_mode,
+        "--credential",
+        "token",
+        "--no-update-tag",
+    ]
+    for flag in ("max_workers", "max_retries", "requests_per_second", "trace_file"):
+        if getattr(args, flag) is not None:
+            cmd += [f"--{flag.replace('_', '-')}", str(getattr(args, flag))]
+    env = {
+        **os.environ,
+        API_ROOT_URL_ENV: url,
+        STATE_DIR_ENV: str(root.parent / f"{root.name}.state"),
+        "FABRIC_DEPLOY_ACCESS_TOKEN": _static_token(),
+    }
+
+    fabric.reset_stats()
+    started = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=root, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    stats = fabric.stats.to_dict()
+    deployed = sum(len(items) for items in fabric.items.values())
+    report = {
+        "exit_code": proc.returncode,
+        "wall_seconds": round(elapsed, 2),
+        "items_in_workspace": deployed,
+        "items_per_second": round(deployed / elapsed, 2) if elapsed else 0.0,
+        "config": vars(fabric.config),
+        "server": stats,
+    }
+
+    print(proc.stdout[-3000:] if proc.returncode == 0 else proc.stdout[-3000:] + proc.stderr[-3000:])
+    print(f"{'exit code':<28}{proc.returncode}")
+    print(f"{'wall time':<28}{elapsed:.2f}s")
+    print(f"{'items in workspace':<28}{deployed} ({report['items_per_second']}/s)")
+    print(f"{'requests':<28}{stats['requests']} ({stats['requests_per_second']}/s)")
+    print(f"{'throttled (429)':<28}{stats['throttled']}")
+    print(f"{'injected failures (500)':<28}{stats['failed']}")
+    print(f"{'long-running operations':<28}{stats['operations']}")
+    for route, count in sorted(stats["by_route"].items(), key=lambda r: r[1], reverse=True):
+        print(f"  {route:<60}{count:>8}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Report written to {args.output}")
+    sys.exit(proc.returncode)
+
+
+if __name__ == "__main__":
+    main()
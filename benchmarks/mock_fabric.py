@@ -0,0 +1,348 @@
+"""
+benchmarks.mock_fabric
+----------------------
+A local stand-in for the Fabric REST API, for load testing the publish and unpublish paths without a tenant.
+
+It implements what fabric-cicd and fabric-deploy call: list/create/update/delete items, item definitions,
+folders, the per-type property endpoints (lakehouses, warehouses, eventhouses, environments) and long-running
+operations (202 + Location polling). Every request can be delayed, throttled (429 with Retry-After) or failed
+(500) to exercise concurrency, rate limiting and retries. Failures are only injected into item writes: those are
+what the publisher retries, whereas a failure while preparing the run (folders, listings) aborts it. Unknown endpoints answer 200 with an empty body.
+
+    python benchmarks/mock_fabric.py --port 8765 --latency-ms 80 --throttle-rps 20 --failure-ratio 0.01
+
+and point the CLI at it with `--api-root-url http://127.0.0.1:8765` (or FABRIC_DEPLOY_API_ROOT_URL).
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 20.0  # added to every request
+    latency_jitter_ms: float = 10.0
+    lro_ratio: float = 0.0  # share of create/updateDefinition calls answered as long-running operations
+    lro_seconds: float = 1.0  # how long an operation stays Running
+    environment_publish_seconds: float = 0.0  # how long an environment publish stays running
+    throttle_rps: Optional[float] = None  # requests per second above which requests get 429
+    throttle_ratio: float = 0.0  # share of requests throttled regardless of rate
+    retry_after: float = 1.0  # Retry-After on 429s
+    failure_ratio: float = 0.0  # share of item write requests (create/update/delete) failing with 500
+    page_size: int = 10000  # items per page of List Items (fabric-cicd does not follow continuation links itself)
+    seed: Optional[int] = None
+
+
+@dataclass
+class MockStats:
+    requests: int = 0
+    throttled: int = 0
+    failed: int = 0
+    operations: int = 0
+    by_route: Dict[str, int] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        elapsed = time.time() - self.started_at
+        data["elapsed_seconds"] = round(elapsed, 3)
+        data["requests_per_second"] = round(self.requests / elapsed, 2) if elapsed else 0.0
+        return data
+
+
+@dataclass
+class _Operation:
+    ready_at: float
+    result: Optional[dict]
+
+
+class MockFabric:
+    """Workspace state shared by all request handler threads."""
+
+    def __init__(self, config: Optional[MockConfig] = None):
+        self.config = config or MockConfig()
+        self.stats = MockStats()
+        self.items: Dict[str, Dict[str, dict]] = {}  # workspace id → item id → item
+        self.definitions: Dict[str, dict] = {}  # item id → definition
+        self.folders: Dict[str, Dict[str, dict]] = {}
+        self.operations: Dict[str, _Operation] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.config.seed)
+        self._window: List[float] = []
+
+    def seed_items(self, workspace_id: str, items: List[Tuple[str, str]]) -> None:
+        """Pre-populate a workspace with (item_type, display_name) items, e.g. to test updates or orphans."""
+        with self._lock:
+            for item_type, name in items:
+                self._add_item(workspace_id, {"type": item_type, "displayName": name})
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = MockStats()
+
+    # --- request handling -------------------------------------------------------------------------------------
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]], body: dict, base_url: str):
+        """Return (status, headers, body) for a request."""
+        time.sleep(max(0.0, self.config.latency_ms + self._uniform(self.config.latency_jitter_ms)) / 1000)
+        route = _ROUTE_RE.sub("/{id}", path)
+
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.by_route[f"{method} {route}"] = self.stats.by_route.get(f"{method} {route}", 0) + 1
+            if self._throttle():
+                self.stats.throttled += 1
+                return 429, {"Retry-After": str(self.config.retry_after)}, {"errorCode": "TooManyRequests"}
+            if method != "GET" and "/items" in path and self._rng.random() < self.config.failure_ratio:
+                self.stats.failed += 1
+                return 500, {}, {"errorCode": "InternalError", "message": "Injected failure"}
+
+            return self._dispatch(method, path, query, body, base_url)
+
+    def _dispatch(self, method, path, query, body, base_url):
+        parts = path.strip("/").split("/")
+        if parts[:2] == ["v1", "operations"] and len(parts) >= 3:
+            return self._operation(parts[2], base_url, result=len(parts) > 3)
+        if parts[:2] != ["v1", "workspaces"] or len(parts) < 3:
+            return 404, {}, {"errorCode": "NotFound", "message": path}
+
+        ws = parts[2]
+        rest = parts[3:]
+        items = self.items.setdefault(ws, {})
+
+        if not rest:
+            return 200, {}, {"id": ws, "displayName": f"mock-{ws[:8]}", "capacityId": _CAPACITY_ID}
+
+        if rest == ["items"] and method == "GET":
+            wanted = query.get("type")
+            values = [i for i in items.values() if not wanted or i["type"] in wanted]
+            return self._list(values, query, base_url + path)
+        if rest == ["items"] and method == "POST":
+            item = self._add_item(ws, body)
+            return self._maybe_operation(base_url, item, created=True)
+        if rest[0] == "items" and len(rest) >= 2:
+            item = items.get(rest[1])
+            if item is None:
+                return 404, {"x-ms-public-api-error-code": "ItemNotFound"}, {"errorCode": "ItemNotFound"}
+            action = rest[2] if len(rest) > 2 else None
+            if action is None and method == "DELETE":
+                del items[rest[1]]
+                self.definitions.pop(rest[1], None)
+                return 200, {}, {}
+            if action is None and method == "PATCH":
+                item.update({k: v for k, v in body.items() if k in ("displayName", "description")})
+                return 200, {}, item
+            if action is None:
+                return 200, {}, item
+            if action == "updateDefinition":
+                self.definitions[item["id"]] = body.get("definition", {})
+                return self._maybe_operation(base_url, None)
+            if action == "getDefinition":
+                return 200, {}, {"definition": self.definitions.get(item["id"], {"parts": []})}
+            if action == "move":
+                item["folderId"] = body.get("targetFolderId") or None
+                return 200, {}, item
+            if action == "shortcuts" and method == "GET":
+                return 200, {}, {"value": []}
+            return 200, {}, {}
+
+        if rest[0] == "folders":
+            folders = self.folders.setdefault(ws, {})
+            if method == "GET":
+                return self._list(list(folders.values()), query, base_url + path)
+            if method == "POST":
+                folder = {"id": str(uuid.uuid4()), "displayName": body.get("displayName"), "workspaceId": ws}
+                if body.get("parentFolderId"):
+                    folder["parentFolderId"] = body["parentFolderId"]
+                folders[folder["id"]] = folder
+                return 201, {}, folder
+            if method == "DELETE" and len(rest) > 1:
+                folders.pop(rest[1], None)
+                return 200, {}, {}
+
+        if rest[0] == "environments" and len(rest) == 1:
+            envs = [self._environment(i) for i in items.values() if i["type"] == "Environment"]
+            return 200, {}, {"value": envs}
+        if rest[0] == "environments" and len(rest) >= 2 and rest[1] in items:
+            env = items[rest[1]]
+            if rest[2:] == ["staging", "publish"] and method == "POST":
+                env["publishedAt"] = time.time() + self.config.environment_publish_seconds
+                return 200, {}, {}
+            if len(rest) == 2 and method == "GET":
+                return 200, {}, self._environment(env)
+
+        if rest[0] in _PROPERTIES and len(rest) == 2 and method == "GET":
+            item = items.get(rest[1])
+            if item is None:
+                return 404, {}, {"errorCode": "ItemNotFound"}
+            return 200, {}, {**item, "properties": _PROPERTIES[rest[0]]}
+
+        return 200, {}, {}
+
+    def _environment(self, env: dict) -> dict:
+        state = "Running" if time.time() < env.get("publishedAt", 0) else "Success"
+        return {
+            **{k: v for k, v in env.items() if k != "publishedAt"},
+            "properties": {"publishDetails": {"state": state}},
+        }
+
+    def _list(self, values: List[dict], query, url: str):
+        start = int(query.get("continuationToken", ["0"])[0])
+        page = values[start : start + self.config.page_size]
+        body = {"value": page}
+        headers = {}
+        if start + self.config.page_size < len(values):
+            token = start + self.config.page_size
+            body["continuationToken"] = str(token)
+            body["continuationUri"] = f"{url}?{urlencode({**query, 'continuationToken': [token]}, doseq=True)}"
+            headers["continuationUri"] = body["continuationUri"]
+        return 200, headers, body
+
+    def _add_item(self, ws: str, body: dict) -> dict:
+        item = {
+            "id": str(uuid.uuid4()),
+            "type": body.get("type"),
+            "displayName": body.get("displayName"),
+            "description": body.get("description", ""),
+            "workspaceId": ws,
+        }
+        if body.get("folderId"):
+            item["folderId"] = body["folderId"]
+        self.items.setdefault(ws, {})[item["id"]] = item
+        if body.get("definition"):
+            self.definitions[item["id"]] = body["definition"]
+        return item
+
+    def _maybe_operation(self, base_url: str, result: Optional[dict], created: bool = False):
+        if self._rng.random() >= self.config.lro_ratio:
+            return (201 if created else 200), {}, (result or {})
+        op_id = str(uuid.uuid4())
+        self.operations[op_id] = _Operation(time.time() + self.config.lro_seconds, result)
+        self.stats.operations += 1
+        return 202, {"Location": f"{base_url}/v1/operations/{op_id}", "Retry-After": "1"}, {}
+
+    def _operation(self, op_id: str, base_url: str, result: bool):
+        op = self.operations.get(op_id)
+        if op is None:
+            return 404, {}, {"errorCode": "OperationNotFound"}
+        if result:
+            return 200, {}, op.result or {}
+        if time.time() < op.ready_at:
+            return 200, {"Location": f"{base_url}/v1/operations/{op_id}", "Retry-After": "1"}, {"status": "Running"}
+        headers = {"Location": f"{base_url}/v1/operations/{op_id}/result"} if op.result is not None else {}
+        return 200, headers, {"status": "Succeeded"}
+
+    def _throttle(self) -> bool:
+        if self.config.throttle_ratio and self._rng.random() < self.config.throttle_ratio:
+            return True
+        if self.config.throttle_rps:
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.config.throttle_rps:
+                return True
+            self._window.append(now)
+        return False
+
+    def _uniform(self, spread: float) -> float:
+        return self._rng.uniform(-spread, spread) if spread else 0.0
+
+
+_CAPACITY_ID = "00000000-0000-0000-0000-00000000ca9a"
+_ROUTE_RE = re.compile(r"/[0-9a-fA-F-]{36}")
+_PROPERTIES = {
+    "lakehouses": {"sqlEndpointProperties": {"provisioningStatus": "Success", "connectionString": "mock.sql"}},
+    "warehouses": {"connectionString": "mock.sql"},
+    "eventhouses": {"queryServiceUri": "https://mock.kusto"},
+    "kqlDatabases": {"queryServiceUri": "https://mock.kusto"},
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    fabric: MockFabric
+
+    def _serve(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            body = {}
+        if isinstance(body, str):  # fabric-cicd sends json="{}" for bodiless requests
+            body = {}
+        url = urlsplit(self.path)
+        status, headers, payload = self.fabric.handle(
+            self.command, url.path, parse_qs(url.query), body, f"http://{self.headers.get('Host')}"
+        )
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = do_PUT = _serve
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def serve(fabric: MockFabric, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start serving fabric in a background thread; the bound URL is http://host:server.server_port."""
+    handler = type("Handler", (_Handler,), {"fabric": fabric})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-fabric", daemon=True).start()
+    return server
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = MockConfig()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--latency-jitter-ms", type=float, default=defaults.latency_jitter_ms)
+    parser.add_argument("--lro-ratio", type=float, default=defaults.lro_ratio)
+    parser.add_argument("--lro-seconds", type=float, default=defaults.lro_seconds)
+    parser.add_argument("--environment-publish-seconds", type=float, default=defaults.environment_publish_seconds)
+    parser.add_argument("--throttle-rps", type=float, default=defaults.throttle_rps)
+    parser.add_argument("--throttle-ratio", type=float, default=defaults.throttle_ratio)
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after)
+    parser.add_argument("--failure-ratio", type=float, default=defaults.failure_ratio)
+    parser.add_argument("--page-size", type=int, default=defaults.page_size)
+    parser.add_argument("--mock-seed", dest="seed", type=int, default=defaults.seed)
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(**{k: getattr(args, k) for k in asdict(MockConfig())})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local mock Fabric REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    fabric = MockFabric(config_from_args(args))
+    server = serve(fabric, args.host, args.port)
+    print(f"Mock Fabric API on http://{args.host}:{server.server_port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(fabric.stats.to_dict()))
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
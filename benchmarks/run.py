@@ -0,0 +1,206 @@
+"""
+benchmarks.run
+--------------
+Times the repository-side hot paths against synthetic repositories of increasing size and stores the
+results for regression comparison.
+
+Measured per size: `delta.get_changed_files`, `fabric_items.extract_changed_items` (through an ItemIndex),
+`lakehouse.apply`, and an end-to-end `deploy --dry-run` (incremental and full) in a subprocess. The deploy runs
+against a local mock of the Fabric API (benchmarks/mock_fabric.py, no added latency) with a static token: a dry run
+still lists the workspace, since orphans are only ever found by listings made in the run.
+
+    python benchmarks/run.py --sizes 100,1000 --output benchmarks/results/local.json
+    python benchmarks/run.py --sizes 100,1000 --compare benchmarks/results/local.json
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from fabric_deploy.adapters.fabric_workspace import API_ROOT_URL_ENV
+from fabric_deploy.adapters.git_ops import GitOperations
+from fabric_deploy.core import delta, fabric_items, lakehouse
+from fabric_deploy.core.item_index import ItemIndex
+from fabric_deploy.utils.state import STATE_DIR_ENV
+
+from mock_fabric import MockConfig, MockFabric, serve
+from synthetic_repo import RepoSpec, add_spec_arguments, generate, spec_from_args
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = "100,1000,10000"
+# a benchmark regresses when its median is this much slower than the baseline's
+DEFAULT_THRESHOLD = 1.25
+# ...and slower by at least this many seconds (sub-10ms timings are noise)
+_MIN_DELTA_SECONDS = 0.01
+_WORKSPACE_ID = "00000000-0000-0000-0000-00000000be0c"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark fabric-deploy against synthetic repositories")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated item counts")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the median is reported")
+    parser.add_argument("--work-dir", type=Path, default=None, help="where to generate repositories (kept)")
+    parser.add_argument("--skip-deploy", action="store_true", help="skip the end-to-end deploy --dry-run runs")
+    parser.add_argument("--output", type=Path, default=None, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, default=None, help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or Path(tempfile.mkdtemp(prefix="fabric-deploy-bench-"))
+    results: Dict[str, Dict[str, float]] = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        spec = spec_from_args(args, size)
+        root = work_dir / f"repo-{size}-{spec.seed}"
+        if not root.exists():
+            started = time.perf_counter()
+            generate(root, spec)
+            print(f"Generated {size} item(s) in {time.perf_counter() - started:.1f}s: {root}")
+        results[str(size)] = run_size(root, spec, args.repeat, deploy=not args.skip_deploy)
+
+    report = {
+        "version": RESULTS_VERSION,
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "spec": {k: v for k, v in vars(spec_from_args(args, 0)).items() if k != "items"},
+        "results": results,
+    }
+    _print_table(results)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(baseline["results"], results, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"✅ No regressions against {args.compare} (threshold {args.threshold}x)")
+
+
+def run_size(root: Path, spec: RepoSpec, repeat: int, deploy: bool) -> Dict[str, float]:
+    source = root / "fabric"
+    timings: Dict[str, float] = {}
+
+    with GitOperations(source) as git:
+        timings["index.build"] = _median(repeat, lambda: ItemIndex.build(source))
+        index = ItemIndex.build(source)
+
+        timings["delta.get_changed_files"] = _median(
+            repeat, lambda: delta.get_changed_files(source, spec.environment, source_dir=str(source), git=git)
+        )
+        changed = delta.get_changed_files(source, spec.environment, source_dir=str(source), git=git)
+        timings["fabric_items.extract_changed_items"] = _median(
+            repeat, lambda: fabric_items.extract_changed_items(changed, index=index)
+        )
+
+        # lakehouse.apply rewrites notebooks in place; restore the work tree before every run
+        reset = lambda: subprocess.run(["git", "checkout", "--", "."], cwd=root, check=True)
+        timings["lakehouse.apply"] = _median(
+            repeat, lambda: lakehouse.apply(source_root=source, index=index), setup=reset
+        )
+        reset()
+
+    if deploy:
+        for mode in ("incremental", "full"):
+            timings[f"deploy --dry-run [{mode}]"] = _median(repeat, lambda: _deploy(root, spec, mode), setup=reset)
+        reset()
+    return timings
+
+
+def compare(baseline: Dict[str, Dict[str, float]], current: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """Benchmarks that got slower than threshold x their baseline (ignoring sizes/benchmarks missing in either)."""
+    regressions = []
+    for size, timings in current.items():
+        for name, seconds in timings.items():
+            before = baseline.get(size, {}).get(name)
+            if before is None:
+                continue
+            if seconds > before * threshold and seconds - before > _MIN_DELTA_SECONDS:
+                regressions.append(f"{name} @ {size}: {before:.3f}s → {seconds:.3f}s ({seconds / before:.2f}x)")
+    return regressions
+
+
+def _deploy(root: Path, spec: RepoSpec, mode: str) -> None:
+    state_dir = root.parent / f"{root.name}.state"
+    env = {
+        **os.environ,
+        STATE_DIR_ENV: str(state_dir),
+        API_ROOT_URL_ENV: _mock_api_url(),
+        "FABRIC_DEPLOY_ACCESS_TOKEN": _static_token(),
+    }
+
+    cmd = [
+        sys.executable,
+        "-m",
+        "fabric_deploy",
+        "deploy",
+        "--workspace-id",
+        _WORKSPACE_ID,
+        "--environment",
+        spec.environment,
+        "--source-directory",
+        str(root / "fabric"),
+        "--deploy-mode",
+        mode,
+        "--credential",
+        "token",
+        "--dry-run",
+    ]
+    proc = subprocess.run(cmd, cwd=root, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"deploy --dry-run failed ({proc.returncode}):\n{proc.stdout[-2000:]}\n{proc.stderr[-2000:]}"
+        )
+
+
+@lru_cache(maxsize=None)
+def _mock_api_url() -> str:
+    """URL of a mock Fabric API without latency, started on first use and served until the benchmark exits."""
+    server = serve(MockFabric(MockConfig(latency_ms=0, latency_jitter_ms=0)))
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def _static_token() -> str:
+    encode = lambda d: base64.urlsafe_b64encode(json.dumps(d).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'none'})}.{encode({'exp': int(time.time()) + 3600, 'appid': 'benchmark'})}."
+
+
+def _median(repeat: int, fn: Callable[[], object], setup: Optional[Callable[[], object]] = None) -> float:
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples), 4)
+
+
+def _print_table(results: Dict[str, Dict[str, float]]) -> None:
+    sizes = list(results)
+    names = list(dict.fromkeys(n for timings in results.values() for n in timings))
+    print(f"{'benchmark (median s)':<46}" + "".join(f"{s:>12}" for s in sizes))
+    for name in names:
+        print(f"{name:<46}" + "".join(f"{results[s].get(name, float('nan')):>12.4f}" for s in sizes))
+
+
+if __name__ == "__main__":
+    main()
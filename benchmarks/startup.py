@@ -0,0 +1,97 @@
+"""
+benchmarks.startup
+------------------
+Times CLI startup and guards the lazy imports: `--help`, `validate` and help for every command must not load
+fabric-cicd, the Azure SDK or requests (those are only imported once a command talks to a workspace).
+
+    python benchmarks/startup.py            # timings + import check, exits 1 if a heavy module was loaded
+    python benchmarks/startup.py --budget-ms 400
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+# modules that must stay out of the invocations below
+HEAVY_MODULES = ("fabric_cicd", "azure.identity", "azure.core", "requests")
+
+INVOCATIONS: List[List[str]] = [
+    ["--help"],
+    ["deploy", "--help"],
+    ["plan", "--help"],
+    ["stats", "--help"],
+    ["validate", "--help"],
+    [
+        "validate",
+        "--workspace-id",
+        "12345678-1234-1234-1234-123456789abc",
+        "--source-directory",
+        ".",
+        "--environment",
+        "dev",
+    ],
+]
+
+# runs an invocation in-process and reports which heavy modules it loaded
+_PROBE = """
+import json, sys
+from fabric_deploy.cli.app import cli
+try:
+    cli(sys.argv[1:], standalone_mode=False)
+except BaseException:
+    pass
+print(json.dumps([m for m in {heavy!r} if m in sys.modules]), file=sys.__stderr__)
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time fabric-deploy CLI startup and check its imports")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per invocation; the median is reported")
+    parser.add_argument("--budget-ms", type=float, default=None, help="also fail if a median exceeds this")
+    args = parser.parse_args()
+
+    failures = []
+    baseline = _median_ms(args.repeat, [sys.executable, "-c", "pass"])
+    print(f"{'invocation':<60}{'median ms':>10}{'over python':>12}")
+    print(f"{'(bare interpreter)':<60}{baseline:>10.0f}")
+    for argv in INVOCATIONS:
+        label = " ".join(argv)
+        ms = _median_ms(args.repeat, [sys.executable, "-m", "fabric_deploy", *argv])
+        print(f"{label[:59]:<60}{ms:>10.0f}{ms - baseline:>12.0f}")
+
+        loaded = _heavy_modules(argv)
+        if loaded:
+            failures.append(f"{label}: loaded {', '.join(loaded)}")
+        if args.budget_ms is not None and ms > args.budget_ms:
+            failures.append(f"{label}: {ms:.0f}ms > budget {args.budget_ms:.0f}ms")
+
+    if failures:
+        print(f"❌ {len(failures)} startup check(s) failed:")
+        for line in failures:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"✅ No heavy imports ({', '.join(HEAVY_MODULES)}) at startup")
+
+
+def _median_ms(repeat: int, cmd: List[str]) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run(cmd, capture_output=True)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def _heavy_modules(argv: List[str]) -> Optional[List[str]]:
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(heavy=HEAVY_MODULES), *argv], capture_output=True, text=True
+    )
+    return json.loads(proc.stderr.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+benchmarks.synthetic_repo
+-------------------------
+Generates synthetic Fabric repositories for benchmarking.
+
+Items are spread over the supported item types by weight, notebooks are padded to a target size and
+(a share of them) carry default lakehouse references, reports bind to semantic models by path and
+pipelines invoke notebooks by logical id. The history has an initial commit tagged
+`latestDeployed/<env>` followed by commits that modify, add and delete items, so incremental
+change detection has real work to do.
+
+    python benchmarks/synthetic_repo.py /tmp/bench-repo --items 1000
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+from fabric_deploy.core.fabric_items import PUBLISH_ORDER, SUPPORTED_ITEM_TYPES
+
+# relative share of each item type in a generated repository; types not listed get DEFAULT_WEIGHT
+DEFAULT_WEIGHTS: Dict[str, float] = {
+    "Notebook": 40,
+    "DataPipeline": 15,
+    "SemanticModel": 8,
+    "Report": 8,
+    "Lakehouse": 5,
+    "Environment": 2,
+}
+DEFAULT_WEIGHT = 1.0
+
+
+@dataclass
+class RepoSpec:
+    items: int = 1000
+    weights: Dict[str, float] = field(default_factory=dict)
+    notebook_kb: int = 8
+    lakehouse_ref_ratio: float = 0.5
+    commits: int = 5
+    changes_per_commit: float = 0.01  # share of items touched per commit after the deployed one
+    environment: str = "dev"
+    seed: int = 42
+
+    def type_counts(self) -> Dict[str, int]:
+        """Items per type, in publish order so that referenced items are generated first."""
+        weights = {t: self.weights.get(t, DEFAULT_WEIGHTS.get(t, DEFAULT_WEIGHT)) for t in PUBLISH_ORDER}
+        total = sum(weights.values())
+        counts = {t: int(self.items * w / total) for t, w in weights.items()}
+        # hand the rounding remainder to the heaviest types
+        for t in sorted(weights, key=weights.get, reverse=True)[: self.items - sum(counts.values())]:
+            counts[t] += 1
+        # notebooks and reports reference lakehouses and semantic models
+        if counts["Notebook"] and not counts["Lakehouse"]:
+            counts["Lakehouse"] = 1
+        if counts["Report"] and not counts["SemanticModel"]:
+            counts["SemanticModel"] = 1
+        return counts
+
+
+def generate(root: Path, spec: RepoSpec) -> Path:
+    """Create the repository at root (which must not exist yet) and return its Fabric source directory."""
+    root = Path(root)
+    root.mkdir(parents=True)
+    source = root / "fabric"
+    rng = random.Random(spec.seed)
+    gen = _Generator(source, spec, rng)
+
+    for item_type, count in spec.type_counts().items():
+        for n in range(count):
+            gen.add(item_type, f"{item_type}{n:05d}")
+
+    _git(root, "init", "-q")
+    _git(root, "config", "user.email", "bench@example.com")
+    _git(root, "config", "user.name", "bench")
+    _git(root, "config", "commit.gpgsign", "false")
+    _commit(root, "initial")
+    _git(root, "tag", f"latestDeployed/{spec.environment}")
+
+    touched = max(1, int(spec.items * spec.changes_per_commit))
+    for c in range(1, spec.commits + 1):
+        for _ in range(touched):
+            gen.modify(rng.choice(gen.notebooks))
+        gen.add("Notebook", f"Added{c:03d}")
+        if len(gen.notebooks) > 2:
+            gen.delete(gen.notebooks[-2])
+        _commit(root, f"change {c}")
+
+    return source
+
+
+class _Generator:
+    def __init__(self, source: Path, spec: RepoSpec, rng: random.Random):
+        self.source = source
+        self.spec = spec
+        self.rng = rng
+        self.logical_ids: Dict[str, List[str]] = {}
+        self.dirs: Dict[str, List[Path]] = {}
+        self.notebooks: List[Path] = []
+
+    def add(self, item_type: str, name: str) -> None:
+        item_dir = self.source / f"{item_type}s" / f"{name}.{item_type}"
+        item_dir.mkdir(parents=True)
+        logical_id = str(uuid.UUID(int=self.rng.getrandbits(128)))
+        platform = {
+            "$schema": "https://developer.microsoft.com/json-schemas/fabric/gitIntegration/platformProperties/2.0.0/schema.json",
+            "metadata": {"type": item_type, "displayName": name},
+            "config": {"version": "2.0", "logicalId": logical_id},
+        }
+        (item_dir / ".platform").write_text(json.dumps(platform, indent=2), encoding="utf-8")
+        for file_name, content in self._definition(item_type, item_dir).items():
+            (item_dir / file_name).parent.mkdir(parents=True, exist_ok=True)
+            (item_dir / file_name).write_text(content, encoding="utf-8")
+
+        self.logical_ids.setdefault(item_type, []).append(logical_id)
+        self.dirs.setdefault(item_type, []).append(item_dir)
+        if item_type == "Notebook":
+            self.notebooks.append(item_dir)
+
+    def modify(self, item_dir: Path) -> None:
+        with (item_dir / "notebook-content.py").open("a", encoding="utf-8") as f:
+            f.write(f"\n# CELL ********************\n\nprint({self.rng.random()!r})\n")
+
+    def delete(self, item_dir: Path) -> None:
+        for f in sorted(item_dir.rglob("*"), reverse=True):
+            f.unlink() if f.is_file() else f.rmdir()
+        item_dir.rmdir()
+        self.notebooks.remove(item_dir)
+
+    def _definition(self, item_type: str, item_dir: Path) -> Dict[str, str]:
+        if item_type == "Notebook":
+            return {"notebook-content.py": self._notebook()}
+        if item_type == "DataPipeline":
+            notebook = self.rng.choice(self.logical_ids["Notebook"]) if self.logical_ids.get("Notebook") else ""
+            activity = {"name": "Run", "type": "TridentNotebook", "typeProperties": {"notebookId": notebook}}
+            return {"pipeline-content.json": json.dumps({"properties": {"activities": [activity]}}, indent=2)}
+        if item_type == "SemanticModel":
+            return {"definition.pbism": json.dumps({"version": "4.0"}), "model.bim": json.dumps({"model": {}})}
+        if item_type == "Report":
+            model = self.rng.choice(self.dirs["SemanticModel"]) if self.dirs.get("SemanticModel") else None
+            reference = {"byPath": {"path": f"../../SemanticModels/{model.name}"}} if model else {}
+            return {"definition.pbir": json.dumps({"version": "4.0", "datasetReference": reference}, indent=2)}
+        if item_type == "Lakehouse":
+            return {"lakehouse.metadata.json": "{}"}
+        if item_type == "KQLDashboard":
+            source = {"name": "synthetic", "clusterUri": "https://synthetic.kusto.fabric.microsoft.com"}
+            return {"RealTimeDashboard.json": json.dumps({"dataSources": [source]}, indent=2)}
+        if item_type == "Environment":
+            return {"Setting/Sparkcompute.yml": _SPARK_COMPUTE}
+        return {"definition.json": json.dumps({"type": item_type, "name": item_dir.name})}
+
+    def _notebook(self) -> str:
+        meta: Dict[str, dict] = {"kernel_info": {"name": "synapse_pyspark"}, "dependencies": {}}
+        lakehouses = self.dirs.get("Lakehouse")
+        if lakehouses and self.rng.random() < self.spec.lakehouse_ref_ratio:
+            n = self.rng.randrange(len(lakehouses))
+            meta["dependencies"]["lakehouse"] = {
+                "default_lakehouse": self.logical_ids["Lakehouse"][n],
+                "default_lakehouse_name": lakehouses[n].name.rpartition(".")[0],
+                "default_lakehouse_workspace_id": str(uuid.UUID(int=self.rng.getrandbits(128))),
+            }
+        header = "# Fabric notebook source\n\n# METADATA ********************\n\n"
+        header += "".join(f"# META {line}\n" for line in json.dumps(meta, indent=2).splitlines())
+
+        cells = []
+        size = len(header)
+        while size < self.spec.notebook_kb * 1024:
+            cell = f"\n# CELL ********************\n\ndf = spark.read.table('t{len(cells)}')\ndisplay(df.limit(10))\n"
+            cells.append(cell)
+            size += len(cell)
+        return header + "".join(cells)
+
+
+_SPARK_COMPUTE = """enable_native_execution_engine: false
+driver_cores: 4
+driver_memory: 28g
+executor_cores: 4
+executor_memory: 28g
+dynamic_executor_allocation:
+  enabled: true
+  min_executors: 1
+  max_executors: 2
+runtime_version: 1.3
+"""
+
+
+def _git(root: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+
+def _commit(root: Path, message: str) -> None:
+    _git(root, "add", "-A")
+    _git(root, "commit", "-q", "--no-verify", "-m", message)
+
+
+def _parse_weights(value: str) -> Dict[str, float]:
+    weights = {}
+    for pair in filter(None, value.split(",")):
+        item_type, _, weight = pair.partition("=")
+        if item_type not in SUPPORTED_ITEM_TYPES:
+            raise argparse.ArgumentTypeError(f"unsupported item type: {item_type}")
+        weights[item_type] = float(weight)
+    return weights
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--weights", type=_parse_weights, default={}, help="e.g. Notebook=50,Report=5 (relative)")
+    parser.add_argument("--notebook-kb", type=int, default=RepoSpec.notebook_kb)
+    parser.add_argument("--lakehouse-ref-ratio", type=float, default=RepoSpec.lakehouse_ref_ratio)
+    parser.add_argument("--commits", type=int, default=RepoSpec.commits)
+    parser.add_argument("--changes-per-commit", type=float, default=RepoSpec.changes_per_commit)
+    parser.add_argument("--environment", default=RepoSpec.environment)
+    parser.add_argument("--seed", type=int, default=RepoSpec.seed)
+
+
+def spec_from_args(args: argparse.Namespace, items: int) -> RepoSpec:
+    return RepoSpec(
+        items=items,
+        weights=args.weights,
+        notebook_kb=args.notebook_kb,
+        lakehouse_ref_ratio=args.lakehouse_ref_ratio,
+        commits=args.commits,
+        changes_per_commit=args.changes_per_commit,
+        environment=args.environment,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic Fabric repository")
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--items", type=int, default=RepoSpec.items)
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+    source = generate(args.root, spec_from_args(args, args.items))
+    print(f"Generated {args.items} item(s) in {source}")
+
+
+if __name__ == "__main__":
+    main()
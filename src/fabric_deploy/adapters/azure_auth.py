@@ -1,21 +1,155 @@
+import base64
+import json
 import os
 import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Tuple
 
-from azure.identity import DefaultAzureCredential, ClientSecretCredential
+# the Azure SDK is imported when a credential is built, not when the CLI loads
+if TYPE_CHECKING:
+    from azure.core.credentials import AccessToken, TokenCredential
 
+logger = logging.getLogger(__name__)
 
-def get_azure_credential() -> DefaultAzureCredential | ClientSecretCredential:
-    logger = logging.getLogger(__name__)
+# scope requested by fabric-cicd's FabricEndpoint
+FABRIC_SCOPE = "https://api.fabric.microsoft.com/.default"
+# a pre-fetched access token for --credential token (e.g. from `az account get-access-token`)
+ACCESS_TOKEN_ENV = "FABRIC_DEPLOY_ACCESS_TOKEN"
+# name of the persistent MSAL cache; entries inside it are keyed by tenant, client and scope
+TOKEN_CACHE_NAME = "fabric-deploy"
+
+CREDENTIAL_CHOICES = ("auto", "service-principal", "workload-identity", "managed-identity", "azure-cli", "token")
+
+# refresh a shared token this long before it expires
+_REFRESH_MARGIN = 300
+
+
+def get_azure_credential(kind: str = "auto", *, persistent_cache: bool = False) -> "TokenCredential":
+    """
+    Build the credential for `kind` (one of CREDENTIAL_CHOICES). "auto" keeps the historical behaviour:
+    a service principal when AZURE_CLIENT_ID/AZURE_CLIENT_SECRET/AZURE_TENANT_ID are set, otherwise the
+    default credential chain. Naming a credential skips the chain's probing of the other sources.
+
+    persistent_cache stores tokens in an encrypted on-disk MSAL cache (OS keyring / DPAPI / keychain), so later
+    runs reuse a still-valid token instead of negotiating a new one (service principal and workload identity; the
+    Azure CLI and managed identity keep their own caches).
+    """
+    from azure.identity import (
+        AzureCliCredential,
+        ClientSecretCredential,
+        DefaultAzureCredential,
+        ManagedIdentityCredential,
+        TokenCachePersistenceOptions,
+        WorkloadIdentityCredential,
+    )
 
-    # Check if we have explicit service principal credentials
     client_id = os.getenv("AZURE_CLIENT_ID")
     client_secret = os.getenv("AZURE_CLIENT_SECRET")
     tenant_id = os.getenv("AZURE_TENANT_ID")
+    cache = (
+        {"cache_persistence_options": TokenCachePersistenceOptions(name=TOKEN_CACHE_NAME)} if persistent_cache else {}
+    )
+
+    if kind == "auto":
+        kind = "service-principal" if client_id and client_secret and tenant_id else "default"
 
-    if client_id and client_secret and tenant_id:
+    if kind == "service-principal":
+        if not (client_id and client_secret and tenant_id):
+            raise ValueError("service-principal requires AZURE_CLIENT_ID, AZURE_CLIENT_SECRET and AZURE_TENANT_ID")
         logger.info("Using service principal authentication")
-        return ClientSecretCredential(tenant_id=tenant_id, client_id=client_id, client_secret=client_secret)
+        return ClientSecretCredential(tenant_id=tenant_id, client_id=client_id, client_secret=client_secret, **cache)
+
+    if kind == "workload-identity":
+        # federated token (e.g. GitHub OIDC) from AZURE_FEDERATED_TOKEN_FILE, tenant and client from the environment
+        logger.info("Using workload identity authentication")
+        return WorkloadIdentityCredential(**cache)
+
+    if kind == "managed-identity":
+        logger.info("Using managed identity authentication")
+        return ManagedIdentityCredential(client_id=client_id) if client_id else ManagedIdentityCredential()
+
+    if kind == "azure-cli":
+        # the Azure CLI keeps its own token cache
+        logger.info("Using Azure CLI authentication")
+        return AzureCliCredential(tenant_id=tenant_id) if tenant_id else AzureCliCredential()
+
+    if kind == "token":
+        token = os.getenv(ACCESS_TOKEN_ENV)
+        if not token:
+            raise ValueError(f"token credential requires {ACCESS_TOKEN_ENV}")
+        logger.info("Using a pre-fetched access token")
+        return StaticTokenCredential(token)
+
+    if kind != "default":
+        raise ValueError(f"Unknown credential {kind!r}. Must be one of {', '.join(CREDENTIAL_CHOICES)}.")
 
     # Fall back to default credential chain
     logger.info("Using default Azure credential chain")
     return DefaultAzureCredential()
+
+
+def get_shared_credential(kind: str = "auto", *, persistent_cache: bool = False) -> "SharedTokenCredential":
+    """get_azure_credential wrapped for sharing between workspace clients, with the Fabric token already acquired."""
+    credential = SharedTokenCredential(get_azure_credential(kind, persistent_cache=persistent_cache))
+    credential.warm_up()
+    return credential
+
+
+class StaticTokenCredential:
+    """A credential that hands out one pre-fetched access token (expiry read from its `exp` claim)."""
+
+    def __init__(self, token: str):
+        from azure.core.credentials import AccessToken
+
+        self._token = AccessToken(token, _expires_on(token))
+
+    def get_token(self, *scopes: str, **kwargs) -> "AccessToken":
+        if self._token.expires_on <= time.time():
+            raise ValueError(f"The access token in {ACCESS_TOKEN_ENV} has expired")
+        return self._token
+
+    def close(self) -> None:
+        pass
+
+
+class SharedTokenCredential:
+    """
+    Wraps a credential so that every workspace client in the process shares one token per scope: the first
+    caller acquires it (concurrent callers wait for that single request), later callers get it from memory
+    until it is about to expire.
+    """
+
+    def __init__(self, credential: "TokenCredential"):
+        self.credential = credential
+        self._tokens: Dict[Tuple[str, ...], "AccessToken"] = {}
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes: str, **kwargs) -> "AccessToken":
+        key = scopes + tuple(sorted((k, str(v)) for k, v in kwargs.items()))
+        with self._lock:
+            token = self._tokens.get(key)
+            if token is None or token.expires_on - _REFRESH_MARGIN <= time.time():
+                started = time.monotonic()
+                token = self.credential.get_token(*scopes, **kwargs)
+                logger.debug(f"Acquired token for {scopes} in {time.monotonic() - started:.2f}s")
+                self._tokens[key] = token
+            return token
+
+    def warm_up(self, scope: str = FABRIC_SCOPE) -> None:
+        """Acquire the Fabric token now, so authentication failures surface before any work is done."""
+        self.get_token(scope)
+
+    def close(self) -> None:
+        close = getattr(self.credential, "close", None)
+        if close is not None:
+            close()
+
+
+def _expires_on(token: str) -> int:
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return int(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"{ACCESS_TOKEN_ENV} is not a JWT access token with an exp claim") from e
@@ -1,5 +1,59 @@
-from fabric_cicd import FabricWorkspace
-from typing import Optional
+import base64
+import copy
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+from functools import lru_cache, wraps
+from pathlib import PurePath
+from typing import TYPE_CHECKING, Callable, Iterable, Optional
+
+# fabric-cicd (and the Azure SDK under it) is imported by the functions that need it, so commands that never
+# talk to a workspace (validate, offline plans, --help) do not pay for loading it
+if TYPE_CHECKING:
+    from fabric_cicd import FabricWorkspace
+
+    from ..core.render_cache import RenderCache
+
+from ..utils.lro import OperationSession
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _definition_rendering() -> dict[str, tuple[str, Optional[Callable]]]:
+    """
+    (exclude_path, func_process_file) that fabric-cicd's publisher passes to _publish_item, for the item types
+    whose publish is exactly their definition (no creation payload, shortcuts, value set activation, ...).
+    """
+    from fabric_cicd._items import _kqldashboard, _report
+
+    publish_all = r"^(?!.*)"
+    pbi_cache = r".*\.pbi[/\\].*"
+    return {
+        "Notebook": (publish_all, None),
+        "DataPipeline": (publish_all, None),
+        "SemanticModel": (pbi_cache, None),
+        "Report": (pbi_cache, _report.func_process_file),
+        "KQLDashboard": (publish_all, _kqldashboard.func_process_file),
+        "GraphQLApi": (publish_all, None),
+    }
+
+
+_UUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+
+# overrides the Fabric REST API root for every workspace client (e.g. a local mock API for load testing)
+API_ROOT_URL_ENV = "FABRIC_DEPLOY_API_ROOT_URL"
+
+
+def set_api_root_url(url: Optional[str]) -> None:
+    """Point fabric-cicd (and the calls made through workspace.base_api_url) at another API root; None keeps it."""
+    if url:
+        from fabric_cicd import constants
+
+        constants.DEFAULT_API_ROOT_URL = url.rstrip("/")
 
 
 def create_fabric_workspace_object(
@@ -7,13 +61,379 @@ def create_fabric_workspace_object(
     environment: str,
     repo_directory: str,
     item_type_in_scope: Optional[list[str]] = None,
-    credentials=None,
+    token_credential=None,
+    parameter_file_path: Optional[str] = None,
 ) -> "FabricWorkspace":
-    """Creates and configure FabricWorkspace object"""
+    """Creates and configure FabricWorkspace object (DefaultAzureCredential when token_credential is None)"""
+    from fabric_cicd import FabricWorkspace
+
     return FabricWorkspace(
         workspace_id=workspace_id,
         environment=environment,
         repository_directory=repo_directory,
         item_type_in_scope=item_type_in_scope,
-        credentials=credentials,
+        token_credential=token_credential,
+        parameter_file_path=parameter_file_path,
     )
+
+
+def published_items(workspace: "FabricWorkspace", item_ids: Iterable[str]) -> list[dict]:
+    """
+    item_ids as left by the last publish call, in the shape of the workspace items API
+    (created items get their id assigned, moved items their new folder, during publish).
+    """
+    entries = []
+    for item_id in item_ids:
+        name, _, item_type = item_id.rpartition(".")
+        item = workspace.repository_items.get(item_type, {}).get(name)
+        if item is not None and item.guid:
+            entries.append(
+                {
+                    "type": item.type,
+                    "displayName": item.name,
+                    "id": item.guid,
+                    "description": item.description,
+                    "folderId": item.folder_id,
+                }
+            )
+    return entries
+
+
+def unpublish_empty_folders(workspace: "FabricWorkspace", folder_ids_in_use: Iterable[str]) -> list[str]:
+    """
+    Delete the workspace folders that no longer hold items (folder_ids_in_use: the folders of the deployed items)
+    nor folders that do, innermost first, as fabric-cicd does after unpublishing orphans. Returns the deleted ids.
+    """
+    from fabric_cicd import constants
+
+    if "disable_workspace_folder_publish" in constants.FEATURE_FLAG:
+        return []
+    parents = {}
+    url = f"{workspace.base_api_url}/folders"
+    while url:
+        response = workspace.endpoint.invoke(method="GET", url=url)
+        body = response.get("body") or {}
+        parents.update((f["id"], f.get("parentFolderId") or "") for f in body.get("value", []))
+        url = body.get("continuationUri")
+
+    in_use = set()
+    for folder_id in folder_ids_in_use:
+        while folder_id and folder_id not in in_use:
+            in_use.add(folder_id)
+            folder_id = parents.get(folder_id, "")
+
+    def depth(folder_id: str) -> int:
+        n = 0
+        while folder_id := parents.get(folder_id, ""):
+            n += 1
+        return n
+
+    deleted = []
+    for folder_id in sorted(set(parents) - in_use, key=depth, reverse=True):
+        try:
+            workspace.endpoint.invoke(method="DELETE", url=f"{workspace.base_api_url}/folders/{folder_id}")
+            deleted.append(folder_id)
+        except Exception as exc:
+            # like item deletes: reported, not fatal
+            logger.warning(f"⚠️  Failed to delete empty workspace folder {folder_id}: {exc}")
+    if deleted:
+        logger.info(f"Deleted {len(deleted)} empty workspace folder(s)")
+    return deleted
+
+
+def set_transport(workspace: "FabricWorkspace", transport):
+    """
+    Route the workspace's REST calls through transport (anything with a requests-style `request()`).
+    Returns the previous transport.
+    """
+    previous = workspace.endpoint.requests
+    workspace.endpoint.requests = transport
+    return previous
+
+
+class _SelectivePublishWarnings(logging.Filter):
+    """Drops the warnings publish_all_items logs on every call restricted to some items: publishing is planned."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not str(record.msg).startswith(
+            ("Selective deployment is enabled", "Using items_to_include is risky", "Using item_name_exclude_regex")
+        )
+
+
+class _QuietPublishLogs:
+    """
+    Quiets fabric-cicd while any publish_all_items call of ours runs: each one publishes the folders again, prints a
+    header per item type and logs a skip line for every item it does not include. Its log level is raised to WARNING
+    and its headers are dropped (install() wraps the pinned version's print_header); left alone with debug
+    logging (--verbose).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._level: Optional[int] = None  # fabric-cicd's level to restore, while quiet
+        self._installed = False
+
+    def install(self) -> None:
+        from fabric_cicd._common import _logging
+
+        if self._installed:
+            return
+        self._installed = True
+
+        print_header = _logging.print_header
+
+        def quiet_print_header(message: str) -> None:
+            if self._level is None:
+                print_header(message)
+
+        # the modules of the pinned version that print headers imported print_header by name
+        for name, module in list(sys.modules.items()):
+            if name.startswith("fabric_cicd") and getattr(module, "print_header", None) is print_header:
+                module.print_header = quiet_print_header
+
+    def __enter__(self):
+        with self._lock:
+            self._calls += 1
+            package = logging.getLogger("fabric_cicd")
+            if self._calls == 1 and not logging.getLogger().isEnabledFor(logging.DEBUG):
+                self._level = package.level
+                package.setLevel(max(self._level, logging.WARNING))
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self._calls -= 1
+            if self._calls == 0 and self._level is not None:
+                logging.getLogger("fabric_cicd").setLevel(self._level)
+                self._level = None
+
+
+_quiet_publish_logs = _QuietPublishLogs()
+
+
+def _install_environment_polling() -> None:
+    """
+    Route fabric-cicd's environment publish-state checks (a listing every 5s, doubling up to 120s, in the calling
+    thread) through the OperationTracker of the workspace's OperationSession, like 202 operations; workspaces with
+    another transport keep fabric-cicd's loop. Replaces the check in the pinned version's modules that call it.
+    """
+    from fabric_cicd import _items
+    from fabric_cicd._items import _environment
+
+    check = _environment.check_environment_publish_state
+    if getattr(check, "__wrapped__", None) is not None:
+        return
+
+    @wraps(check)
+    def tracked_check(workspace: "FabricWorkspace", initial_check: bool = False) -> None:
+        session = workspace.endpoint.requests
+        if not isinstance(session, OperationSession):
+            return check(workspace, initial_check)
+        session.tracker.wait(lambda: _environment_publish_poll(workspace, initial_check), delay=0)
+
+    _environment.check_environment_publish_state = tracked_check
+    _items.check_environment_publish_state = tracked_check
+
+
+def _environment_publish_poll(workspace: "FabricWorkspace", initial_check: bool):
+    """One check of the environments' publish state, as fabric-cicd's check_environment_publish_state makes it."""
+    environments = workspace.repository_items.get("Environment", {})
+    response = workspace.endpoint.invoke(method="GET", url=f"{workspace.base_api_url}/environments/")
+    running = False
+    for item in response["body"]["value"]:
+        state = ((item.get("properties") or {}).get("publishDetails") or {}).get("state", "").lower()
+        if item["displayName"] in environments and state == "running":
+            running = True
+        elif state in ("failed", "cancelled") and not initial_check:
+            raise Exception(f"Publish {state} for {item['displayName']}")
+    return not running, None, None
+
+
+def prepare_publish(workspace: "FabricWorkspace") -> list[str]:
+    """
+    Run publish_all_items with every item excluded: it refuses a workspace without an assigned capacity (unless
+    only semantic models and reports are in scope), publishes the folders and scans the deployed and repository
+    items, which item comparisons and publish workers rely on. Returns the ids of the publishable repository items.
+    """
+    from fabric_cicd import append_feature_flag, constants, publish_all_items
+
+    # publish workers publish their items with items_to_include
+    append_feature_flag("enable_experimental_features")
+    append_feature_flag("enable_items_to_include")
+    warnings = logging.getLogger("fabric_cicd.publish")
+    if not any(isinstance(f, _SelectivePublishWarnings) for f in warnings.filters):
+        warnings.addFilter(_SelectivePublishWarnings())
+
+    _quiet_publish_logs.install()
+    _install_environment_polling()
+    with _quiet_publish_logs:
+        publish_all_items(workspace, item_name_exclude_regex=".*")
+    workspace.publish_item_name_exclude_regex = None
+    return [
+        f"{name}.{item_type}"
+        for item_type, by_name in workspace.repository_items.items()
+        if item_type in workspace.item_type_in_scope and item_type in constants.ACCEPTED_ITEM_TYPES
+        for name in by_name
+    ]
+
+
+def publish_worker(
+    workspace: "FabricWorkspace", transport, render_cache: Optional["RenderCache"] = None
+) -> "FabricWorkspace":
+    """
+    A separate workspace object (same workspace, environment, repository, item types, credential and parameter
+    file) for publish_items, its REST calls going through transport and its item files rendered through
+    render_cache if given. A worker must not be used by several threads at once.
+    """
+    with _quiet_publish_logs:
+        worker = create_fabric_workspace_object(
+            workspace_id=workspace.workspace_id,
+            environment=workspace.environment,
+            repo_directory=str(workspace.repository_directory),
+            item_type_in_scope=workspace.item_type_in_scope,
+            token_credential=workspace.endpoint.token_credential,
+            parameter_file_path=workspace.parameter_file_path,
+        )
+    set_transport(worker, transport)
+    if render_cache is not None:
+        worker._replace_logical_ids, worker._replace_parameters = _cached_rendering(worker, render_cache)
+    return worker
+
+
+def publish_items(worker: "FabricWorkspace", workspace: "FabricWorkspace", item_ids: list[str]) -> None:
+    """
+    Publish item_ids (all of one type) with publish_all_items on worker, which re-scans the workspace first so
+    references resolve to items published by earlier calls, and waits for environments to be published. The ids the
+    items were given are copied to workspace (as prepared by prepare_publish), also if publishing failed.
+    """
+    from fabric_cicd import publish_all_items
+
+    # only the type's publisher runs: other calls do not wait for environment publishes they did not start
+    worker.item_type_in_scope = [item_ids[0].rpartition(".")[2]]
+    try:
+        with _quiet_publish_logs:
+            publish_all_items(worker, items_to_include=item_ids)
+    finally:
+        for item_id in item_ids:
+            name, _, item_type = item_id.rpartition(".")
+            published = worker.repository_items.get(item_type, {}).get(name)
+            item = workspace.repository_items.get(item_type, {}).get(name)
+            if published is not None and item is not None and published.guid:
+                item.guid, item.folder_id = published.guid, published.folder_id
+
+
+def deployed_guid(workspace: "FabricWorkspace", item_id: str) -> Optional[str]:
+    """Workspace id of a repository item, if it is deployed (after prepare_publish)."""
+    name, _, item_type = item_id.rpartition(".")
+    item = workspace.repository_items.get(item_type, {}).get(name)
+    return item.guid if item is not None and item.guid else None
+
+
+def rendered_definition(
+    workspace: "FabricWorkspace", item_id: str, render_cache: Optional["RenderCache"] = None
+) -> Optional[list[tuple[str, bytes]]]:
+    """
+    The definition parts (path, content) publishing item_id would send, rendered as fabric-cicd's _publish_item
+    does (type-specific processing, logical ids, parameter file, workspace ids) without changing the item.
+    None for item types whose publish is more than their definition.
+    """
+    name, _, item_type = item_id.rpartition(".")
+    rendering = _definition_rendering().get(item_type)
+    item = workspace.repository_items.get(item_type, {}).get(name)
+    if rendering is None or item is None:
+        return None
+    exclude_path, func_process_file = rendering
+    if render_cache is not None:
+        replace_logical_ids, replace_parameters = _cached_rendering(workspace, render_cache)
+    else:
+        replace_logical_ids, replace_parameters = workspace._replace_logical_ids, workspace._replace_parameters
+
+    parts = []
+    for file in item.item_files:
+        if re.match(exclude_path, file.relative_path):
+            continue
+        if file.type == "text" and not str(file.file_path).endswith(".platform"):
+            file = copy.copy(file)
+            file.contents = func_process_file(workspace, item, file) if func_process_file else file.contents
+            file.contents = replace_logical_ids(file.contents)
+            file.contents = replace_parameters(file, item)
+            file.contents = workspace._replace_workspace_ids(file.contents)
+        parts.append((file.relative_path, file.contents.encode("utf-8") if file.type == "text" else file.contents))
+    return parts
+
+
+def deployed_definition(workspace: "FabricWorkspace", guid: str) -> list[tuple[str, bytes]]:
+    """The definition parts (path, content) of a deployed item, via getDefinition (long-running if need be)."""
+    response = workspace.endpoint.invoke(method="POST", url=f"{workspace.base_api_url}/items/{guid}/getDefinition")
+    parts = (response.get("body") or {}).get("definition", {}).get("parts", [])
+    return [(p["path"], base64.b64decode(p.get("payload", ""))) for p in parts]
+
+
+def render_context(workspace: "FabricWorkspace") -> Optional[str]:
+    """
+    Hash of the workspace-wide inputs of fabric-cicd's file rendering (besides each file's own content and the
+    items it references), or None if rendering cannot be cached: parameters resolved from other workspaces.
+    """
+    from fabric_cicd import constants
+
+    parameters = json.dumps(workspace.environment_parameter, sort_keys=True, default=str)
+    if re.search(r'"\$workspace\.(?!\$?id")', parameters):
+        return None
+    parts = [constants.VERSION, workspace.environment, workspace.workspace_id, parameters]
+    if "$items." in parameters:
+        parts += sorted(
+            f"{t}/{n}/{i.guid}" for t, by_name in workspace.deployed_items.items() for n, i in by_name.items()
+        )
+    # logical ids are UUIDs, which render_cache keys per file; anything else is replaced wherever it occurs
+    parts += sorted(
+        f"{i.logical_id}/{i.guid}"
+        for by_name in workspace.repository_items.values()
+        for i in by_name.values()
+        if not _UUID_RE.fullmatch(i.logical_id)
+    )
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def _cached_rendering(workspace: "FabricWorkspace", cache: "RenderCache") -> tuple[Callable, Callable]:
+    """
+    Replacements for workspace's _replace_logical_ids and _replace_parameters that look rendered files up in cache.
+    fabric-cicd replaces logical ids, then parameters, then workspace ids; the first two are looked up together once
+    the file is known, and the cheap, idempotent workspace id replacement still runs on the result.
+    """
+    replace_logical_ids, replace_parameters = workspace._replace_logical_ids, workspace._replace_parameters
+    pending, scanned = {}, {}
+
+    def inputs() -> tuple[Optional[str], dict[str, str]]:
+        # publish_all_items re-scans the workspace on every call: recompute when the scans were replaced
+        scans = (workspace.deployed_items, workspace.repository_items)
+        if scanned.get("scans") is None or any(a is not b for a, b in zip(scanned["scans"], scans)):
+            logical_ids = {i.logical_id: i.guid for by_name in scans[1].values() for i in by_name.values()}
+            scanned.update(scans=scans, context=render_context(workspace), logical_ids=logical_ids)
+        return scanned["context"], scanned["logical_ids"]
+
+    def logical_ids_deferred(raw_file: str) -> str:
+        pending["raw"] = raw_file
+        return raw_file
+
+    def parameters_cached(file_obj, item_obj) -> str:
+        raw = pending.pop("raw", None)
+        if raw is None or raw != file_obj.contents:
+            # not preceded by a logical id replacement of this file (e.g. lakehouse shortcuts): render as is
+            return replace_parameters(file_obj, item_obj)
+        context, logical_ids = inputs()
+        if context is None:
+            file_obj.contents = replace_logical_ids(raw)
+            return replace_parameters(file_obj, item_obj)
+        # keyed by the path in the repository, so staged (--overlay) and in-place runs, and other checkouts, share it
+        path = PurePath(file_obj.file_path)
+        if path.is_relative_to(workspace.repository_directory):
+            path = path.relative_to(workspace.repository_directory)
+        key = cache.key(context, f"{item_obj.name}.{item_obj.type}", path.as_posix(), raw, logical_ids)
+        rendered = cache.get(key)
+        if rendered is None:
+            file_obj.contents = replace_logical_ids(raw)
+            rendered = replace_parameters(file_obj, item_obj)
+            cache.put(key, rendered)
+        return rendered
+
+    return logical_ids_deferred, parameters_cached
@@ -1,16 +1,61 @@
+from dataclasses import dataclass
+from enum import Enum
 from pathlib import Path
 import subprocess
 import logging
-from typing import List
+import threading
+from typing import IO, Iterator, List, Optional
+
+from ..utils import tracing
 
 logger = logging.getLogger(__name__)
 
+_READ_CHUNK = 64 * 1024
+
+
+class ChangeType(Enum):
+    """Kind of change reported by `git diff --name-status`."""
+
+    ADDED = "A"
+    MODIFIED = "M"
+    DELETED = "D"
+    RENAMED = "R"
+
+
+@dataclass(frozen=True)
+class FileChange:
+    """A single changed path (repo-relative, POSIX separators). old_path is only set for renames."""
+
+    change_type: ChangeType
+    path: str
+    old_path: Optional[str] = None
+
 
 class GitOperations:
     """Git helper for incremental deploys. Fails fast on git errors."""
 
     def __init__(self, repo_path: Path):
         self.repo_path = Path(repo_path)
+        self._repo_root: Optional[Path] = None
+        self._cat_file: Optional[subprocess.Popen] = None
+        self._cat_file_lock = threading.Lock()
+
+    def __enter__(self) -> "GitOperations":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the persistent `git cat-file` session, if one was started."""
+        proc, self._cat_file = self._cat_file, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except Exception:
+            proc.kill()
 
     @staticmethod
     def is_within_repo(path: str | Path) -> bool:
@@ -34,13 +79,54 @@ class GitOperations:
 
     def _get_repo_root(self, path: str | Path) -> Path:
         """Return the absolute path to the root of the current Git repository."""
+        p = Path(path).resolve()
+        start = p if p.is_dir() else p.parent
+        if self._repo_root is not None and start.is_relative_to(self._repo_root):
+            return self._repo_root
         try:
-            p = Path(path).resolve()
-            start = p if p.is_dir() else p.parent
             root = subprocess.check_output(["git", "rev-parse", "--show-toplevel"], text=True, cwd=start).strip()
-            return Path(root)
         except subprocess.CalledProcessError:
             raise RuntimeError("Not inside a Git repository.")
+        self._repo_root = Path(root)
+        return self._repo_root
+
+    def repo_root(self) -> Path:
+        """Return the root of the repository containing repo_path (resolved once per instance)."""
+        return self._get_repo_root(self.repo_path)
+
+    def git_dir(self) -> Path:
+        """Return the absolute path of the repository's .git directory."""
+        cp = self._run(["git", "rev-parse", "--absolute-git-dir"], capture_output=True)
+        return Path(cp.stdout.strip())
+
+    def head_commit(self) -> str:
+        return self._run(["git", "rev-parse", "HEAD"], capture_output=True).stdout.strip()
+
+    def list_untracked_files(self, source_dir: str) -> List[str]:
+        """Return untracked, non-ignored files within source_dir (repo-relative paths)."""
+        cp = self._run(
+            ["git", "ls-files", "--others", "--exclude-standard", "--full-name", "-z", "--", source_dir],
+            capture_output=True,
+        )
+        return [f for f in cp.stdout.split("\0") if f]
+
+    def blob_ids(self, source_dir: str) -> dict[str, str]:
+        """
+        Map tracked files within source_dir (repo-relative paths) to their blob ids. Files whose working tree
+        content differs from the index are left out, since their blob id would not describe what is on disk.
+        """
+        staged = self._run(["git", "ls-files", "-s", "-z", "--full-name", "--", source_dir], capture_output=True)
+        dirty = self._run(["git", "diff", "--name-only", "-z", "--", source_dir], capture_output=True)
+        modified = set(dirty.stdout.split("\0"))
+
+        blobs = {}
+        for entry in staged.stdout.split("\0"):
+            if not entry:
+                continue
+            meta, _, path = entry.partition("\t")
+            if path not in modified:
+                blobs[path] = meta.split()[1]
+        return blobs
 
     def get_deployment_tag(self, environment: str) -> str:
         return f"latestDeployed/{environment}"
@@ -54,56 +140,170 @@ class GitOperations:
         )
         return cp.returncode == 0
 
-    def get_changed_files_since_tag(self, tag: str, source_dir: str) -> List[str]:
+    def iter_changes_since_tag(self, tag: str, source_dir: str) -> Iterator[FileChange]:
+        """Stream the changes within source_dir between tag and HEAD."""
         if not self.tag_exists(tag):
             raise RuntimeError(f"Tag not found: {tag}")
 
-        repo_root = self._get_repo_root(source_dir)
+        logger.info("Checking for changes since %s", tag)
+        return self.iter_changes(tag, source_dir, target="HEAD")
 
-        logger.info("Checking for changed files since %s", tag)
-        modified = self._run(
-            ["git", "diff", "--name-only", "--diff-filter=d", f"{tag}..HEAD", "--", source_dir],
-            capture_output=True,
-            text=True,
-        )  # exclude delete from this operation
+    def iter_changes(self, base: str, source_dir: str, target: Optional[str] = "HEAD") -> Iterator[FileChange]:
+        """
+        Stream the changes within source_dir between base and target (the working tree if target is None)
+        from a single rename-aware `git diff --name-status -z` process. Copies are reported as additions
+        and type changes as modifications.
+        """
+        rev_range = [f"{base}..{target}"] if target else [base]
+        args = ["git", "diff", "--name-status", "-z", "-M", "--no-color", *rev_range, "--", source_dir]
+        return self._iter_diff(args)
 
-        modified_files = [f for f in modified.stdout.splitlines() if f]
-        abs_modified_files = [str((repo_root / f).resolve()) for f in modified_files]
-
-        logger.info("Found %d changed file(s)", len(modified_files))
+    def _iter_diff(self, args: list[str]) -> Iterator[FileChange]:
+        try:
+            proc = subprocess.Popen(args, cwd=self.repo_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except Exception as e:
+            raise RuntimeError(f"Git exec failed: {' '.join(args)} ({e})") from e
 
-        return abs_modified_files
+        count = 0
+        try:
+            fields = _iter_nul_fields(proc.stdout)
+            for status in fields:
+                kind = status[:1]
+                path = next(fields)
+                if kind in ("R", "C"):
+                    old_path, path = path, next(fields)
+                    if kind == "R":
+                        yield FileChange(ChangeType.RENAMED, path, old_path)
+                    else:
+                        yield FileChange(ChangeType.ADDED, path)
+                elif kind in ("A", "D"):
+                    yield FileChange(ChangeType(kind), path)
+                else:
+                    yield FileChange(ChangeType.MODIFIED, path)
+                count += 1
+        finally:
+            proc.stdout.close()  # stops git early if the consumer abandons the stream
+            stderr = proc.stderr.read().decode(errors="replace").strip()
+            returncode = proc.wait()
 
-    def get_deleted_files_since_tag(self, tag: str, source_dir: str) -> List[str]:
-        if not self.tag_exists(tag):
-            raise RuntimeError(f"Tag not found: {tag}")
+        if returncode != 0:
+            raise RuntimeError(f"Git failed ({returncode}): {' '.join(args)} {stderr}")
+        logger.info("Found %d changed path(s)", count)
 
-        logger.info("Checking for deleted files since %s", tag)
-        modified = self._run(
-            ["git", "diff", "--name-only", "--diff-filter=D", f"{tag}..HEAD", "--", source_dir],
-            capture_output=True,
-            text=True,
-        )
+    def get_changed_files_since_tag(self, tag: str, source_dir: str) -> List[str]:
+        repo_root = self._get_repo_root(source_dir)
+        return [
+            str((repo_root / c.path).resolve())
+            for c in self.iter_changes_since_tag(tag, source_dir)
+            if c.change_type is not ChangeType.DELETED
+        ]
 
-        deleted_files = [f for f in modified.stdout.splitlines() if f]
+    def get_deleted_files_since_tag(self, tag: str, source_dir: str) -> List[str]:
+        deleted_files = []
+        for c in self.iter_changes_since_tag(tag, source_dir):
+            if c.change_type is ChangeType.DELETED:
+                deleted_files.append(c.path)
+            elif c.change_type is ChangeType.RENAMED:
+                deleted_files.append(c.old_path)
 
-        logger.info("Found %d deleted file(s)", len(deleted_files))
         logger.debug(f"Deleted files: {deleted_files}")
         return deleted_files
 
-    def create_or_update_tag(self, tag: str, ref: str = "HEAD") -> bool:
-        if self.tag_exists(tag):
-            logger.info("Updating existing tag: %s", tag)
-            self._run(["git", "tag", "-d", tag])
-        else:
-            logger.info("Creating new tag: %s", tag)
+    def read_object(self, spec: str) -> Optional[bytes]:
+        """
+        Return the contents of a git object (e.g. "<tag>:<path>" or a blob id) through the persistent
+        `git cat-file` session, or None if it does not exist.
+        """
+        header, content = self._cat_file_request(f"contents {spec}")
+        return content if header else None
 
-        self._run(["git", "tag", tag, ref])
+    def object_id(self, spec: str) -> Optional[str]:
+        """Return the object id for spec (e.g. "HEAD:fabric/Foo.Notebook") or None if it does not exist."""
+        header, _ = self._cat_file_request(f"info {spec}")
+        return header[0] if header else None
 
-        if not self.tag_exists(tag):
-            raise RuntimeError(f"Failed to verify tag creation: {tag}")
+    def _cat_file_request(self, command: str) -> tuple[Optional[list[str]], Optional[bytes]]:
+        with self._cat_file_lock:
+            if self._cat_file is None or self._cat_file.poll() is not None:
+                try:
+                    self._cat_file = subprocess.Popen(
+                        ["git", "cat-file", "--batch-command"],
+                        cwd=self.repo_path,
+                        stdin=subprocess.PIPE,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.DEVNULL,
+                    )
+                except Exception as e:
+                    raise RuntimeError(f"Git exec failed: git cat-file --batch-command ({e})") from e
+
+            proc = self._cat_file
+            proc.stdin.write(command.encode() + b"\n")
+            proc.stdin.flush()
+
+            line = proc.stdout.readline()
+            if not line:
+                raise RuntimeError(f"Git cat-file session ended unexpectedly ({command})")
+            header = line.decode().split()
+            if header[-1] == "missing" or header[-1] == "ambiguous":
+                return None, None
+            if not command.startswith("contents "):
+                return header, None
+
+            size = int(header[2])
+            content = proc.stdout.read(size)
+            proc.stdout.read(1)  # trailing LF
+            return header, content
+
+    def write_blob(self, data: bytes) -> str:
+        """Store data as a blob in the object database and return its id."""
+        try:
+            cp = subprocess.run(
+                ["git", "hash-object", "-w", "--stdin"], cwd=self.repo_path, input=data, capture_output=True, check=True
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Git failed ({e.returncode}): git hash-object -w --stdin") from e
+        return cp.stdout.decode().strip()
 
-        logger.info("Tag %s created at %s", tag, ref)
+    def ref_oid(self, ref: str) -> Optional[str]:
+        """Return the object id ref points at, or None if it does not exist (always read fresh from disk)."""
+        cp = self._run(["git", "rev-parse", "-q", "--verify", ref], capture_output=True, allow_fail=True)
+        return cp.stdout.strip() if cp.returncode == 0 else None
+
+    def tree_ids(self, source_dir: str, revision: str = "HEAD") -> dict[str, str]:
+        """
+        Map every directory below source_dir (repo-relative) at revision to its tree id, keyed by repo-relative
+        path. Empty if source_dir does not exist at revision.
+        """
+        prefix = "" if source_dir in ("", ".") else source_dir.rstrip("/") + "/"
+        cp = self._run(
+            ["git", "ls-tree", "--full-tree", "-r", "-t", "-z", f"{revision}:{prefix}"],
+            capture_output=True,
+            allow_fail=True,
+        )
+        trees = {}
+        if cp.returncode != 0:
+            return trees
+        for entry in cp.stdout.split("\0"):
+            meta, _, path = entry.partition("\t")
+            mode_type_oid = meta.split()
+            if len(mode_type_oid) == 3 and mode_type_oid[1] == "tree":
+                trees[prefix + path] = mode_type_oid[2]
+        return trees
+
+    def update_ref(self, ref: str, new_oid: str, old_oid: Optional[str] = None) -> None:
+        """
+        Point ref at new_oid. With old_oid, only if ref currently points there (compare-and-swap); an empty
+        old_oid requires that ref does not exist yet.
+        """
+        args = ["git", "update-ref", ref, new_oid]
+        if old_oid is not None:
+            args.append(old_oid)
+        self._run(args, capture_output=True)
+
+    def create_or_update_tag(self, tag: str, ref: str = "HEAD") -> bool:
+        """Point tag at ref in one step (`git tag -f`), creating it if needed."""
+        self._run(["git", "tag", "-f", tag, ref], capture_output=True)
+        logger.info("Tag %s set to %s", tag, ref)
         return True
 
     def is_initial_deployment(self, environment: str) -> bool:
@@ -111,16 +311,28 @@ class GitOperations:
 
     def _run(self, args, *, capture_output=False, text=None, allow_fail=False) -> subprocess.CompletedProcess:
         try:
-            cp = subprocess.run(
-                args,
-                cwd=self.repo_path,
-                capture_output=capture_output,
-                text=(text if text is not None else capture_output),
-                check=False,
-            )
+            with tracing.span("git", **{"git.command": args[1] if len(args) > 1 else args[0]}):
+                cp = subprocess.run(
+                    args,
+                    cwd=self.repo_path,
+                    capture_output=capture_output,
+                    text=(text if text is not None else capture_output),
+                    check=False,
+                )
         except Exception as e:
             raise RuntimeError(f"Git exec failed: {' '.join(args)} ({e})") from e
 
         if cp.returncode != 0 and not allow_fail:
             raise RuntimeError(f"Git failed ({cp.returncode}): {' '.join(args)}")
         return cp
+
+
+def _iter_nul_fields(stream: IO[bytes]) -> Iterator[str]:
+    """Yield NUL-terminated fields from a byte stream without reading it all into memory."""
+    buf = b""
+    for chunk in iter(lambda: stream.read(_READ_CHUNK), b""):
+        *fields, buf = (buf + chunk).split(b"\0")
+        for field in fields:
+            yield field.decode("utf-8", errors="surrogateescape")
+    if buf:
+        yield buf.decode("utf-8", errors="surrogateescape")
@@ -1,17 +1,37 @@
+import importlib
+
 import click
 
-from .commands.deploy import cmd as deploy_cmd
-from .commands.validate import cmd as validate_cmd
+# subcommand name → module defining it as `cmd`; modules are imported when the command is looked up, so an
+# invocation only loads the command it runs
+COMMANDS = {
+    "deploy": "fabric_deploy.cli.commands.deploy",
+    "plan": "fabric_deploy.cli.commands.plan",
+    "stats": "fabric_deploy.cli.commands.stats",
+    "validate": "fabric_deploy.cli.commands.validate",
+}
 
 
-@click.group(help="Microsoft Fabric deployment CLI")
-def cli() -> None:
-    pass
+class LazyGroup(click.Group):
+    """A click group whose subcommands are imported on first use."""
+
+    def __init__(self, *args, lazy_commands: dict[str, str], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands
 
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
 
-# register subcommands
-cli.add_command(deploy_cmd, name="deploy")
-cli.add_command(validate_cmd, name="validate")
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            module = importlib.import_module(self.lazy_commands[cmd_name])
+            self.add_command(module.cmd, name=cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS, help="Microsoft Fabric deployment CLI")
+def cli() -> None:
+    pass
 
 
 def main() -> None:
@@ -1,34 +1,76 @@
+import cProfile
 import sys
 from pathlib import Path
 
 import click
 
-from ...adapters.fabric_workspace import create_fabric_workspace_object
-from ...adapters.azure_auth import get_azure_credential
+from ...adapters.fabric_workspace import API_ROOT_URL_ENV, set_api_root_url
+from ...adapters.azure_auth import ACCESS_TOKEN_ENV, CREDENTIAL_CHOICES, get_shared_credential
 from ...adapters.git_ops import GitOperations
-from ...core import delta
-from ...core import fabric_items
-from ...core import deploy as deploy_core
-from ...core.deploy import DeploymentResult
-from ...core import lakehouse as lakehouse_core
+from ...core import definitions as definitions_core
+from ...core import orchestrator
+from ...core import plan as plan_core
+from ...core import shard as shard_core
+from ...core.item_index import ItemIndex
+from ...core.publisher import DEFAULT_MAX_RETRIES, DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND
+from ...core.fabric_items import parse_item_types
+from ...models.config import DeployMode, DeployTarget, load_targets
+from ...utils import tracing
 from ...utils.logging import setup_logging
 
 
 @click.command(help="Deploy artifacts to Microsoft Fabric.")
-@click.option("--workspace-id", "workspace_id", required=True, help="Microsoft Fabric Workspace ID")
+@click.option("--workspace-id", "workspace_id", default=None, help="Microsoft Fabric Workspace ID")
 @click.option(
     "--source-directory",
     default="./fabric",
     show_default=True,
     help="Directory containing Fabric artifacts (must be inside a git repo)",
 )
-@click.option("--environment", required=True, help="Target environment (dev|staging|prod)")
+@click.option("--environment", default=None, help="Target environment (dev|staging|prod)")
+@click.option(
+    "--targets",
+    "targets_file",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help=(
+        "JSON list of targets ({workspace_id, environment, deploy_mode?, name?}) to deploy the same commit to, "
+        "instead of --workspace-id/--environment. Repository work is done once; targets deploy concurrently."
+    ),
+)
+@click.option(
+    "--parallel-targets",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="With --targets: number of workspaces deployed at the same time.",
+)
 @click.option(
     "--deploy-mode",
-    type=click.Choice(["full", "incremental"], case_sensitive=False),
+    type=click.Choice(["full", "incremental", "hash"], case_sensitive=False),
     default="full",
     show_default=True,
-    help="full = deploy everything; incremental = deploy only changed items (via git tag)",
+    help=(
+        "full = deploy everything; incremental = deploy only items that differ from their last deployed revision "
+        "(via the deployment ledger); "
+        "hash = deploy only items whose normalized content differs from the deployment manifest "
+        "(default for targets that do not set their own)"
+    ),
+)
+@click.option(
+    "--include-dependents/--no-include-dependents",
+    default=True,
+    show_default=True,
+    help="Incremental mode: also deploy items that reference changed items, ordered by their dependencies.",
+)
+@click.option(
+    "--item-types",
+    default=None,
+    help=(
+        "Comma-separated item types to deploy (e.g. Report,SemanticModel); scanning, change detection, lakehouse "
+        "standardization, publishing and orphan cleanup skip all other types. Keeps its own deployment tag and "
+        "manifest (<environment>+<Types>)."
+    ),
 )
 @click.option(
     "--unpublish-orphan-items",
@@ -37,6 +79,15 @@ from ...utils.logging import setup_logging
     show_default=True,
     help="Unpublish orphan items from the workspace.",
 )
+@click.option(
+    "--orphan-sweep/--no-orphan-sweep",
+    default=False,
+    show_default=True,
+    help=(
+        "Incremental/hash mode: find orphans by diffing the whole workspace against the repository (as full mode "
+        "always does) instead of unpublishing only the items deleted since the last deployment, e.g. on a schedule."
+    ),
+)
 @click.option(
     "--standardize-default-lakehouse",
     is_flag=True,
@@ -44,11 +95,151 @@ from ...utils.logging import setup_logging
     show_default=True,
     help="Standardize default lakehouse references in notebooks before deployment",
 )
+@click.option(
+    "--overlay/--in-place",
+    default=False,
+    show_default=True,
+    help=(
+        "Write standardized notebooks to a staged deploy tree (hard links for untouched files) "
+        "instead of rewriting them in the git work tree."
+    ),
+)
+@click.option(
+    "--stage-directory",
+    default=None,
+    help="Where to build the staged deploy tree for --overlay (default: inside the repository's .git directory).",
+)
 @click.option(
     "--update-tag/--no-update-tag",
     default=True,
     show_default=True,
-    help="Maintain a git tag for last deployment to enable incremental mode.",
+    help=(
+        "Record the deployment in the per-item deployment ledger and git tag (and, in hash mode, the content "
+        "manifest) to enable incremental mode."
+    ),
+)
+@click.option(
+    "--shard",
+    default=None,
+    help=(
+        "i/N: publish only the i-th of N shards of the deployment (items that reference each other stay together, "
+        "shards are balanced by estimated publish cost), for a matrix of deploy jobs sharing one --plan. Shards "
+        "record what they publish in the ledger but do not unpublish orphans or move the tag; a final "
+        "--no-publish run does."
+    ),
+)
+@click.option(
+    "--publish/--no-publish",
+    default=True,
+    show_default=True,
+    help=(
+        "--no-publish: skip publishing and only unpublish orphans and update the deployment state (after shards; "
+        "requires --plan, and fails unless the ledger records every planned item as deployed)."
+    ),
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help=(
+        "Skip the items a previous run of the same target already published at this commit (from its checkpoint "
+        "journal), e.g. after a deploy failed part way."
+    ),
+)
+@click.option(
+    "--skip-unchanged/--no-skip-unchanged",
+    default=False,
+    show_default=True,
+    help=(
+        "Compare items with their deployed definitions (normalized, rendered for the environment) and publish only "
+        "those that differ, e.g. to run full deploys as drift reconciliation. Deployed hashes are cached per workspace."
+    ),
+)
+@click.option(
+    "--definition-cache-max-age",
+    type=click.IntRange(min=0),
+    default=definitions_core.DEFAULT_MAX_AGE,
+    show_default=True,
+    help="With --skip-unchanged, reuse cached deployed definition hashes at most this many seconds old (0 = always fetch).",
+)
+@click.option(
+    "--render-cache/--no-render-cache",
+    default=True,
+    show_default=True,
+    help=(
+        "Reuse item files rendered for the environment (logical ids, parameter file) by earlier runs, keyed by "
+        "file content, environment, workspace and parameters."
+    ),
+)
+@click.option(
+    "--max-workers",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_WORKERS,
+    show_default=True,
+    help="Concurrent publish calls, each publishing a share of the items whose references are already published.",
+)
+@click.option(
+    "--max-retries",
+    type=click.IntRange(min=0),
+    default=DEFAULT_MAX_RETRIES,
+    show_default=True,
+    help="Times a failed item publish is retried (with backoff) before the deployment fails.",
+)
+@click.option(
+    "--requests-per-second",
+    type=click.FloatRange(min=0.1),
+    default=DEFAULT_REQUESTS_PER_SECOND,
+    show_default=True,
+    help="Upper bound on Fabric API requests per second across workers; lowered automatically on HTTP 429.",
+)
+@click.option(
+    "--plan",
+    "plan_file",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Execute a plan written by `fabric-deploy plan` instead of resolving the scope (overrides --deploy-mode).",
+)
+@click.option(
+    "--credential",
+    type=click.Choice(CREDENTIAL_CHOICES),
+    default="auto",
+    show_default=True,
+    envvar="FABRIC_DEPLOY_CREDENTIAL",
+    help=(
+        "Credential to authenticate with; naming one skips the default chain's probing. "
+        f"auto = service principal if AZURE_CLIENT_* are set, else the default chain; token = {ACCESS_TOKEN_ENV}."
+    ),
+)
+@click.option(
+    "--token-cache/--no-token-cache",
+    default=False,
+    show_default=True,
+    envvar="FABRIC_DEPLOY_TOKEN_CACHE",
+    help="Keep tokens in an encrypted persistent cache so later runs reuse them (service principal, workload identity).",
+)
+@click.option(
+    "--api-root-url",
+    default=None,
+    envvar=API_ROOT_URL_ENV,
+    help="Fabric REST API root to call instead of the public one (e.g. a local mock API for load testing).",
+)
+@click.option(
+    "--trace-file",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write timing spans (phases, item publishes, git calls, API requests) as OpenTelemetry-style JSON lines.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Print the time spent per phase/span after the run.",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Also write a cProfile dump of the run (main thread) to this file, for pstats/snakeviz.",
 )
 @click.option("--dry-run", is_flag=True, default=False, show_default=True, help="Perform a dry run without changes")
 @click.option(
@@ -57,142 +248,207 @@ from ...utils.logging import setup_logging
     default=False,
     help="Enable verbose (debug-level) output.",
 )
-def cmd(
+def cmd(trace_file, profile, profile_output, **options):
+    tracer = tracing.start_trace()
+    profiler = cProfile.Profile() if profile_output else None
+    try:
+        if profiler is not None:
+            profiler.enable()
+        with tracer.span("deploy", **{"deploy.mode": options["deploy_mode"], "deploy.dry_run": options["dry_run"]}):
+            _deploy(**options)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_output)
+        if trace_file:
+            tracer.export(Path(trace_file))
+        if profile:
+            click.echo("\n⏱️  Time per span (inclusive; concurrent spans overlap):")
+            click.echo(tracing.format_summary(tracer))
+
+
+def _deploy(
+    *,
     workspace_id,
     source_directory,
     environment,
-    dry_run,
-    unpublish_orphan_items,
+    targets_file,
     deploy_mode,
-    standardize_default_lakehouse,
-    update_tag,
+    item_types,
+    stage_directory,
+    shard,
+    plan_file,
+    credential,
+    token_cache,
+    api_root_url,
     verbose,
+    **settings,
 ):
     """
-    Orchestration:
-      1) Show configuration, initialize logging, resolve paths
-      2) Validate source directory (exists + inside a Git repo)
-      3) Authenticate and create Fabric workspace clients
-         - primary client for deployment
-         - separate client for cleanup to avoid publish-time mutations
-      4) Optionally standardize default lakehouse references in notebooks
-      5) Determine deployment scope (full vs. incremental via git tag)
-      6) Execute deployment
-      7) Optionally unpublish orphan items
-      8) Optionally update deployment tag
-      9) Emit summary and exit with status
+    Checks the arguments into targets and core.orchestrator.DeployOptions (the remaining options, named like its
+    fields), then:
+      1) Show configuration, initialize logging, validate the source directory (exists + inside a Git repo)
+      2) Index the repository's items once
+      3) Authenticate once (token fetched up front and shared by every workspace client)
+      4) Load the plan, if any, and check it against the target and HEAD
+      5) Deploy to every target (core.orchestrator.run), emit the summary and exit with status
     """
 
+    if targets_file:
+        if workspace_id or environment or plan_file:
+            raise click.UsageError("--targets cannot be combined with --workspace-id, --environment or --plan")
+        try:
+            targets = load_targets(Path(targets_file), default_mode=DeployMode(deploy_mode.lower()))
+        except ValueError as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(2)
+    else:
+        if not workspace_id or not environment:
+            raise click.UsageError("--workspace-id and --environment are required (or use --targets)")
+        try:
+            targets = [DeployTarget(workspace_id=workspace_id, environment=environment, deploy_mode=deploy_mode)]
+        except ValueError as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(2)
+    fan_out = targets_file is not None
+
+    try:
+        item_types = parse_item_types(item_types)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--item-types")
+    for target in targets:
+        target.item_types = item_types
+
+    try:
+        shard = shard_core.parse(shard)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--shard")
+    options = orchestrator.DeployOptions(
+        **settings,
+        stage_directory=Path(stage_directory) if stage_directory else None,
+        shard=shard,
+        label_targets=fan_out,
+        echo=click.echo,
+    )
+    if shard is not None and not options.publish:
+        raise click.UsageError("--shard cannot be combined with --no-publish")
+    if not options.publish and not plan_file:
+        # the run finalizes what the shards published; only the plan says what that had to be
+        raise click.UsageError("--no-publish requires the --plan the shards executed")
+    if shard is not None and not plan_file and any(t.deploy_mode is DeployMode.INCREMENTAL for t in targets):
+        # each shard records its items in the ledger, which would change the scope seen by shards started later
+        raise click.UsageError("Incremental deploys can only be sharded from a plan: use --plan with --shard")
+    # orphans are unpublished once, by the final --no-publish run after all shards
+    options.unpublish_orphan_items = options.unpublish_orphan_items and shard is None
+
     # --- Print selected settings ---
     click.echo("────────────────────────────────────────────────────────────────")
     click.echo("🚀 Deployment configuration:")
-    click.echo(f"  Workspace ID:                    {workspace_id}")
-    click.echo(f"  Environment:                     {environment}")
+    if fan_out:
+        click.echo(f"  Targets:                         {len(targets)} ({targets_file})")
+        for t in targets:
+            click.echo(f"    - {t.name}: {t.workspace_id} env={t.environment} mode={t.deploy_mode.value}")
+        click.echo(f"  Parallel targets:                {options.parallel_targets}")
+    else:
+        click.echo(f"  Workspace ID:                    {workspace_id}")
+        click.echo(f"  Environment:                     {environment}")
+        click.echo(f"  Mode:                            {deploy_mode}")
     click.echo(f"  Source directory:                {source_directory}")
-    click.echo(f"  Mode:                            {deploy_mode}")
-    click.echo(f"  Unpublish orphans:               {unpublish_orphan_items}")
-    click.echo(f"  Standardize default lakehouse:   {standardize_default_lakehouse}")
-    click.echo(f"  Update tag:                      {update_tag}")
-    click.echo(f"  Dry run:                         {dry_run}")
+    click.echo(f"  Include dependents:              {options.include_dependents}")
+    click.echo(f"  Item types:                      {', '.join(item_types) if item_types else 'all'}")
+    click.echo(
+        f"  Unpublish orphans:               {options.unpublish_orphan_items}"
+        f"{' (sweep)' if options.orphan_sweep else ''}"
+    )
+    click.echo(f"  Standardize default lakehouse:   {options.standardize_default_lakehouse}")
+    click.echo(f"  Overlay:                         {options.overlay}")
+    click.echo(f"  Update tag:                      {options.update_tag}")
+    if shard is not None:
+        click.echo(f"  Shard:                           {shard[0]}/{shard[1]}")
+    if not options.publish:
+        click.echo(f"  Publish:                         {options.publish}")
+    click.echo(f"  Resume:                          {options.resume}")
+    click.echo(f"  Skip unchanged:                  {options.skip_unchanged}")
+    click.echo(f"  Render cache:                    {options.render_cache}")
+    click.echo(f"  Max workers:                     {options.max_workers}")
+    click.echo(f"  Credential:                      {credential}{' (persistent token cache)' if token_cache else ''}")
+    if api_root_url:
+        click.echo(f"  API root URL:                    {api_root_url}")
+    click.echo(f"  Plan:                            {plan_file}")
+    click.echo(f"  Dry run:                         {options.dry_run}")
     click.echo(f"  Verbose:                         {verbose}")
     click.echo("────────────────────────────────────────────────────────────────\n")
 
     setup_logging(verbose=verbose)
+    set_api_root_url(api_root_url)
     src_dir = Path(source_directory).resolve()
 
-    outputs: list[str] = []
-    results: list[DeploymentResult] = []
-
-    def record(res: DeploymentResult):
-        results.append(res)
-        outputs.append(res.message)
-
     # 1) sanity
     if not src_dir.exists() or not src_dir.is_dir():
         click.echo(f"Source directory not found: {src_dir}", err=True)
         sys.exit(2)
 
-    # 2) Ensure source_directory has a git repo connected to it
+    # Ensure source_directory has a git repo connected to it
     if not GitOperations.is_within_repo(src_dir):
         click.echo(f"Error: No Git repository found for source directory: '{src_dir}'")
         sys.exit(3)
 
-    # 3) auth + workspace object
-    creds = get_azure_credential()
-    workspace = create_fabric_workspace_object(
-        workspace_id=workspace_id,
-        environment=environment,
-        repo_directory=str(src_dir),
-        credentials=creds,
-    )
-    ## Prevents the cleanup operation from being affected by changes to the workspace during publish
-    clean_up_workspace = create_fabric_workspace_object(
-        workspace_id=workspace_id,
-        environment=environment,
-        repo_directory=str(src_dir),
-        credentials=creds,
-    )
+    # One git helper for the whole run: cached repo root and a single persistent cat-file session
+    git = GitOperations(src_dir)
+    click.get_current_context().call_on_close(git.close)
 
-    # 4) optional lakehouse processing
-    if standardize_default_lakehouse:
-        lakehouse_core.apply(source_root=src_dir)
+    # 2) Scan the source tree (or refresh the cached snapshot) once; every later step resolves items through it,
+    # so with --item-types the other types are never scanned, standardized, published or unpublished
+    with tracing.span("deploy.index"):
+        index = ItemIndex.load_or_build(src_dir, git, item_types)
 
-    # 5) selection (full vs incremental)
-    changed_fabric_items = None
-    mode = (deploy_mode or "full").lower()
+    # 3) auth: one credential and one pre-fetched token shared by every workspace client
+    try:
+        with tracing.span("deploy.auth", **{"auth.credential": credential}):
+            creds = get_shared_credential(credential, persistent_cache=token_cache)
+    except Exception as e:
+        click.echo(f"Error: authentication failed: {e}", err=True)
+        sys.exit(2)
+    click.get_current_context().call_on_close(creds.close)
 
-    if mode == "incremental":
-        if delta.is_initial_deployment(src_dir, environment):
-            click.echo("No previous deployment tag found → performing initial FULL deployment.")
-            mode = "full"
-        else:
-            changed_files = delta.get_changed_files(src_dir, environment, source_dir=str(src_dir))
-            deleted_files = delta.get_deleted_files(src_dir, environment, source_dir=str(src_dir))
-            changed_fabric_items = fabric_items.extract_changed_items(paths=changed_files)
-    # 6) deploy
-    if mode == "incremental":
-        changed_count = len(changed_fabric_items or [])
-        if changed_count == 0:
-            msg = (
-                f"ℹ️ Only deleted files detected for incremental deploy. Number of deleted files: {len(deleted_files)}"
-                if deleted_files
-                else "ℹ️ No changed items detected for incremental deploy."
-            )
-            result = DeploymentResult(True, 0, "incremental", msg)
-        else:
-            click.echo(f"Running incremental deploy. Number of items changed: {len(changed_fabric_items)}")
-            result = deploy_core.run_incremental(
-                workspace=workspace,
-                changed_items=changed_fabric_items,
-                dry_run=dry_run,
+    # 4) a plan is executed as written, for the target and commit it was made for
+    if plan_file:
+        plan = plan_core.DeploymentPlan.load(Path(plan_file))
+        try:
+            plan.check(
+                workspace_id=targets[0].workspace_id,
+                environment=targets[0].environment,
+                commit=git.head_commit(),
+                source_directory=src_dir.relative_to(git.repo_root()).as_posix(),
+                item_types=item_types,
             )
-    elif mode == "full":
-        click.echo("Running full deploy")
-        result = deploy_core.run_full(workspace=workspace, dry_run=dry_run)
+        except ValueError as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(2)
+        click.echo(
+            f"Executing plan {plan_file}: {len(plan.to_publish)} to publish, {len(plan.to_unpublish)} to unpublish"
+        )
+        options.plan = plan
 
-    else:
-        click.echo(f"Invalid deploy mode: {mode!r}. Must be 'full' or 'incremental'.", err=True)
+    # 5) deploy
+    try:
+        runs = orchestrator.run(targets, options, git=git, index=index, credential=creds)
+    except ValueError as e:
+        click.echo(str(e), err=True)
         sys.exit(1)
 
-    record(result)
-
-    # 7) Unpublish items no longer connected to the repo
-    if unpublish_orphan_items:
-        unpublish_result = deploy_core.run_unpublish_orphans(workspace=clean_up_workspace, dry_run=dry_run)
-        record(unpublish_result)
-
-    # 8) optional tag update
-    if update_tag:
-        try:
-            if dry_run:
-                click.echo("[Dry run]: 🔄 would update deployment tag at HEAD")
-            else:
-                delta.update_deployment_tag(src_dir, environment)
-        except RuntimeError as e:
-            click.echo(f"Warning: failed to update deployment tag: {e}", err=True)
-
     # Final consolidated output
-    all_ok = all(r.success for r in results) if results else True
-    click.echo("\n".join(outputs))
+    all_ok = all(run.success for run in runs)
+    for run in runs:
+        if fan_out:
+            click.echo(f"{'✅' if run.success else '❌'} {run.target.name} ({run.target.workspace_id}):")
+            click.echo("\n".join(f"  {r.message}" for r in run.results))
+        else:
+            click.echo("\n".join(r.message for r in run.results))
+    if fan_out:
+        failed = [run.target.name for run in runs if not run.success]
+        click.echo(
+            f"{len(runs) - len(failed)}/{len(runs)} target(s) deployed" + (f"; failed: {failed}" if failed else "")
+        )
     click.echo("✅ Deployment completed." if all_ok else "❌ Deployment finished with errors.")
     sys.exit(0 if all_ok else 1)
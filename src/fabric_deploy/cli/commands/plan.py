@@ -0,0 +1,230 @@
+import sys
+from pathlib import Path
+
+import click
+
+from ...adapters.fabric_workspace import API_ROOT_URL_ENV, create_fabric_workspace_object, set_api_root_url
+from ...adapters.azure_auth import ACCESS_TOKEN_ENV, CREDENTIAL_CHOICES, get_shared_credential
+from ...adapters.git_ops import GitOperations
+from ...core import deploy as deploy_core
+from ...core import inventory as inventory_core
+from ...core import plan as plan_core
+from ...core import scope as scope_core
+from ...core.fabric_items import parse_item_types
+from ...core.item_index import ItemIndex
+from ...core.plan import PlanAction
+from ...models.config import state_key
+from ...utils.logging import setup_logging
+
+
+@click.command(help="Plan a deployment: resolve the items to create/update/skip/unpublish and write a plan file.")
+@click.option("--workspace-id", "workspace_id", required=True, help="Microsoft Fabric Workspace ID")
+@click.option(
+    "--source-directory",
+    default="./fabric",
+    show_default=True,
+    help="Directory containing Fabric artifacts (must be inside a git repo)",
+)
+@click.option("--environment", required=True, help="Target environment (dev|staging|prod)")
+@click.option(
+    "--deploy-mode",
+    type=click.Choice(["full", "incremental", "hash"], case_sensitive=False),
+    default="full",
+    show_default=True,
+    help="Scope to plan for (see `deploy --deploy-mode`).",
+)
+@click.option(
+    "--include-dependents/--no-include-dependents",
+    default=True,
+    show_default=True,
+    help="Incremental/hash mode: also plan items that reference changed items.",
+)
+@click.option(
+    "--item-types",
+    default=None,
+    help="Comma-separated item types to plan for (see `deploy --item-types`); the plan is bound to them.",
+)
+@click.option(
+    "--unpublish-orphan-items/--no-unpublish-orphan-items",
+    default=True,
+    show_default=True,
+    help="Plan unpublishing of deployed items that no longer exist in the repository.",
+)
+@click.option(
+    "--orphan-sweep/--no-orphan-sweep",
+    default=False,
+    show_default=True,
+    help=(
+        "Incremental/hash mode: plan unpublishing every orphan in the workspace, "
+        "not just the items deleted since the baseline."
+    ),
+)
+@click.option(
+    "--inventory",
+    "inventory_path",
+    default=None,
+    help="Workspace inventory snapshot to plan against (default: cached in the repository's .git directory).",
+)
+@click.option(
+    "--inventory-max-age",
+    type=int,
+    default=inventory_core.DEFAULT_MAX_AGE,
+    show_default=True,
+    help="Re-list the workspace when the cached inventory is older than this many seconds.",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    default=False,
+    help="Never contact the workspace; plan against the cached inventory regardless of its age.",
+)
+@click.option(
+    "--credential",
+    type=click.Choice(CREDENTIAL_CHOICES),
+    default="auto",
+    show_default=True,
+    envvar="FABRIC_DEPLOY_CREDENTIAL",
+    help=(
+        "Credential to authenticate with; naming one skips the default chain's probing. "
+        f"auto = service principal if AZURE_CLIENT_* are set, else the default chain; token = {ACCESS_TOKEN_ENV}."
+    ),
+)
+@click.option(
+    "--token-cache/--no-token-cache",
+    default=False,
+    show_default=True,
+    envvar="FABRIC_DEPLOY_TOKEN_CACHE",
+    help="Keep tokens in an encrypted persistent cache so later runs reuse them (service principal, workload identity).",
+)
+@click.option(
+    "--api-root-url",
+    default=None,
+    envvar=API_ROOT_URL_ENV,
+    help="Fabric REST API root to call instead of the public one (e.g. a local mock API for load testing).",
+)
+@click.option(
+    "--output",
+    default="plan.json",
+    show_default=True,
+    help="Where to write the plan.",
+)
+@click.option(
+    "--verbose",
+    is_flag=True,
+    default=False,
+    help="Enable verbose (debug-level) output.",
+)
+def cmd(
+    workspace_id,
+    source_directory,
+    environment,
+    deploy_mode,
+    include_dependents,
+    item_types,
+    unpublish_orphan_items,
+    orphan_sweep,
+    inventory_path,
+    inventory_max_age,
+    offline,
+    credential,
+    token_cache,
+    api_root_url,
+    output,
+    verbose,
+):
+    """
+    Orchestration:
+      1) Resolve paths, validate the source directory and index the repository
+      2) Load the cached workspace inventory, or list the workspace once and cache the listing
+      3) Resolve the deployment scope exactly as `deploy` would
+      4) Classify and cost every item, write the plan and print a summary
+    """
+    setup_logging(verbose=verbose)
+    set_api_root_url(api_root_url)
+    src_dir = Path(source_directory).resolve()
+    try:
+        item_types = parse_item_types(item_types)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--item-types")
+
+    if not src_dir.exists() or not src_dir.is_dir():
+        click.echo(f"Source directory not found: {src_dir}", err=True)
+        sys.exit(2)
+
+    if not GitOperations.is_within_repo(src_dir):
+        click.echo(f"Error: No Git repository found for source directory: '{src_dir}'")
+        sys.exit(3)
+
+    with GitOperations(src_dir) as git:
+        index = ItemIndex.load_or_build(src_dir, git, item_types)
+
+        snapshot_path = (
+            Path(inventory_path) if inventory_path else inventory_core.default_inventory_path(git, workspace_id)
+        )
+        inventory = inventory_core.load_cached(snapshot_path, workspace_id, None if offline else inventory_max_age)
+        if inventory is None:
+            if offline:
+                click.echo(f"No cached inventory for workspace {workspace_id} at {snapshot_path}", err=True)
+                sys.exit(2)
+            try:
+                creds = get_shared_credential(credential, persistent_cache=token_cache)
+            except Exception as e:
+                click.echo(f"Error: authentication failed: {e}", err=True)
+                sys.exit(2)
+            workspace = create_fabric_workspace_object(
+                workspace_id=workspace_id,
+                environment=environment,
+                repo_directory=str(src_dir),
+                item_type_in_scope=item_types,
+                token_credential=creds,
+            )
+            inventory = inventory_core.WorkspaceInventory.fetch(workspace)
+            inventory.save(snapshot_path)
+        else:
+            click.echo(f"Using inventory snapshot from {inventory.age():.0f}s ago ({len(inventory)} item(s))")
+
+        scope = scope_core.resolve(
+            source_root=src_dir,
+            environment=state_key(environment, item_types),
+            mode=deploy_mode,
+            git=git,
+            index=index,
+            include_dependents=include_dependents,
+        )
+        if scope.mode != deploy_mode.lower():
+            click.echo(
+                f"No {deploy_mode} baseline for {state_key(environment, item_types)} → planning a FULL deployment."
+            )
+
+        plan = plan_core.build(
+            scope=scope,
+            index=index,
+            inventory=inventory,
+            environment=environment,
+            commit=git.head_commit(),
+            source_directory=src_dir.relative_to(git.repo_root()).as_posix(),
+            unpublish_orphans=unpublish_orphan_items,
+            orphan_sweep=orphan_sweep,
+            unpublishable_types=deploy_core.unpublishable_types(item_types),
+            durations=plan_core.load_durations(git),
+        )
+
+    plan.save(Path(output))
+
+    labels = {
+        PlanAction.CREATE: "+ create",
+        PlanAction.UPDATE: "~ update",
+        PlanAction.UNPUBLISH: "- unpublish",
+    }
+    click.echo("────────────────────────────────────────────────────────────────")
+    click.echo(f"📝 Deployment plan ({plan.mode}) for {environment} at {plan.commit[:12]}:")
+    for item in plan.items:
+        if item.action in labels:
+            click.echo(f"  {labels[item.action]:<12} {item.item_id:<60} ~{item.estimated_seconds:.0f}s")
+    counts = plan.counts()
+    click.echo(
+        f"  {counts['create']} to create, {counts['update']} to update, {counts['skip']} unchanged, "
+        f"{counts['unpublish']} to unpublish; estimated {plan.estimated_seconds() / 60:.1f} min"
+    )
+    click.echo("────────────────────────────────────────────────────────────────")
+    click.echo(f"✅ Plan written to {output}")
@@ -0,0 +1,142 @@
+import json
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+import click
+
+from ...adapters.git_ops import GitOperations
+from ...core import history as history_core
+from ...core import plan as plan_core
+from ...utils.logging import setup_logging
+
+
+@click.command(help="Report deployment performance from the recorded run history: item publish times and trends.")
+@click.option(
+    "--source-directory",
+    default="./fabric",
+    show_default=True,
+    help="Directory containing Fabric artifacts (must be inside a git repo); locates the history.",
+)
+@click.option("--workspace-id", "workspace_id", default=None, help="Only report deployments to this workspace.")
+@click.option(
+    "--runs",
+    "last_runs",
+    type=click.IntRange(min=1),
+    default=20,
+    show_default=True,
+    help="Number of most recent runs to report on.",
+)
+@click.option(
+    "--top",
+    type=click.IntRange(min=0),
+    default=10,
+    show_default=True,
+    help="Number of slowest items to list.",
+)
+@click.option(
+    "--json",
+    "as_json",
+    is_flag=True,
+    default=False,
+    help="Print the report as JSON (e.g. for schedulers) instead of tables.",
+)
+@click.option(
+    "--verbose",
+    is_flag=True,
+    default=False,
+    help="Enable verbose (debug-level) output.",
+)
+def cmd(source_directory, workspace_id, last_runs, top, as_json, verbose):
+    """
+    Summarizes the last runs recorded by `deploy`: per-run trend, mean time per phase, item publish time
+    percentiles and the slowest items with the estimate the planner currently uses for them.
+    """
+    setup_logging(verbose=verbose)
+    src_dir = Path(source_directory).resolve()
+    if not GitOperations.is_within_repo(src_dir):
+        click.echo(f"Error: No Git repository found for source directory: '{src_dir}'")
+        sys.exit(3)
+
+    with GitOperations(src_dir) as git:
+        path = history_core.history_path(git)
+        runs = history_core.load(path, workspace_id=workspace_id)[-last_runs:]
+        durations = plan_core.load_durations(git)
+
+    if not runs:
+        click.echo(f"No deployments recorded in {path}" + (f" for workspace {workspace_id}" if workspace_id else ""))
+        sys.exit(0)
+
+    trend = history_core.trend(runs)
+    items = history_core.item_stats(runs)
+    phases = history_core.phase_means(runs)
+    seconds = [i.seconds for run in runs for _, i in run.item_runs()]
+    overall = {
+        "runs": len(runs),
+        "items_published": len(seconds),
+        "p50": history_core.percentile(seconds, 50),
+        "p95": history_core.percentile(seconds, 95),
+    }
+
+    if as_json:
+        report = {
+            "overall": overall,
+            "phases": phases,
+            "runs": [asdict(r) for r in trend],
+            "items": [{**asdict(s), "estimated_seconds": durations.get(s.item_id)} for s in items],
+        }
+        click.echo(json.dumps(report, indent=1))
+        return
+
+    click.echo("────────────────────────────────────────────────────────────────")
+    click.echo(f"📈 Last {len(runs)} deployment(s):")
+    click.echo(
+        f"  {'started':<17} {'commit':<12} {'mode':<12} {'total s':>8} {'publish s':>9} {'items':>6} "
+        f"{'p50 s':>7} {'p95 s':>7} {'retries':>7} {'429s':>5}"
+    )
+    for r in trend:
+        started = time.strftime("%Y-%m-%d %H:%M", time.localtime(r.started_at))
+        click.echo(
+            f"  {started:<17} {r.commit[:12]:<12} {r.modes:<12} {r.seconds:>8.1f} {r.publish_seconds:>9.1f} "
+            f"{r.items:>6} {r.p50:>7.1f} {r.p95:>7.1f} {r.retries:>7} {r.throttled:>5}{'' if r.success else '  ❌'}"
+        )
+    if len(trend) > 1:
+        first, last = trend[0], trend[-1]
+        click.echo(
+            f"  trend: total {_change(first.seconds, last.seconds)}, "
+            f"item p50 {_change(first.p50, last.p50)}, p95 {_change(first.p95, last.p95)}"
+        )
+
+    click.echo("\n⏱️  Mean time per phase (concurrent targets add up):")
+    for name, mean in phases.items():
+        click.echo(f"  {name:<32} {mean:>9.2f}s")
+
+    click.echo(
+        f"\n📦 Item publish times: {overall['items_published']} publish(es) of {len(items)} item(s), "
+        f"p50 {overall['p50']:.1f}s, p95 {overall['p95']:.1f}s"
+    )
+    if top and items:
+        click.echo(
+            f"  {'item':<60} {'runs':>5} {'p50 s':>7} {'p95 s':>7} {'max s':>7} {'lro s':>6} {'KiB':>7} "
+            f"{'retries':>7} {'est. s':>7}"
+        )
+        for s in items[:top]:
+            estimate = durations.get(s.item_id)
+            click.echo(
+                f"  {s.item_id:<60} {s.runs:>5} {s.p50:>7.1f} {s.p95:>7.1f} {s.max:>7.1f} "
+                f"{s.operation_seconds:>6.1f} {s.bytes / 1024:>7.0f} {s.retries:>7} "
+                f"{(f'{estimate:.1f}' if estimate is not None else '-'):>7}"
+            )
+    errors = [s.estimate_error for s in items if s.estimate_error is not None]
+    if errors:
+        click.echo(
+            f"  estimates were off by {history_core.percentile(errors, 50):.0%} (median over items) before each run"
+        )
+    click.echo("────────────────────────────────────────────────────────────────")
+
+
+def _change(before: float, after: float) -> str:
+    if not before:
+        return f"{after:.1f}s"
+    return f"{before:.1f}s → {after:.1f}s ({(after - before) / before:+.0%})"
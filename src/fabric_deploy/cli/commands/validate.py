@@ -16,13 +16,22 @@ from ...utils.logging import setup_logging
     help="Directory containing Fabric artifacts (must be in a git repo)",
 )
 @click.option("--environment", required=True, help="Target environment (dev|staging|prod)")
+@click.option(
+    "--cache/--no-cache",
+    default=False,
+    show_default=True,
+    help=(
+        "Reuse results for item folders whose content is unchanged since the last validation. Caching writes to "
+        "the repository's .git directory (or FABRIC_DEPLOY_STATE_DIR); without it validation is read-only."
+    ),
+)
 @click.option(
     "--verbose",
     is_flag=True,
     default=False,
     help="Enable verbose (debug-level) output.",
 )
-def cmd(workspace_id, source_directory, environment, verbose):
+def cmd(workspace_id, source_directory, environment, cache, verbose):
     """Thin wrapper around core.validate.run()."""
     setup_logging(verbose=verbose)
 
@@ -31,6 +40,7 @@ def cmd(workspace_id, source_directory, environment, verbose):
             workspace_id=workspace_id,
             source_directory=Path(source_directory),
             environment=environment,
+            use_cache=cache,
         )
         click.echo("✅ Validation passed" if ok else "❌ Validation failed")
         sys.exit(0 if ok else 1)
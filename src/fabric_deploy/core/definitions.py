@@ -0,0 +1,158 @@
+"""
+core.definitions
+----------------
+Compares repository items with the definitions deployed in a workspace, so publishing can skip the items the
+workspace already holds (e.g. a nightly full deploy that only has to reconcile drift).
+
+Both sides are normalized before hashing. The repository item is rendered as fabric-cicd would publish it to the
+environment (logical ids, parameter file and workspace id replacement); the deployed definition is fetched with
+getDefinition. .platform parts are left out, JSON is canonicalized, line endings and trailing whitespace are
+normalized and default lakehouse references are replaced by the core.lakehouse placeholders. Deployed hashes are
+cached per workspace in the local state directory and reused while younger than the cache's max age; publishing
+an item records the hash it was published with, so the next run does not fetch it back.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from ..adapters import fabric_workspace as fabric
+from ..adapters.git_ops import GitOperations
+from ..utils.state import state_dir
+from .fabric_items import ITEM_PLATFORM_TYPE
+from .lakehouse import standardize_text
+
+if TYPE_CHECKING:
+    from fabric_cicd import FabricWorkspace
+
+    from .render_cache import RenderCache
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = "definition-hashes"
+DEFAULT_MAX_AGE = 6 * 3600
+_CACHE_VERSION = 1
+_TRAILING_WS_RE = re.compile(r"[ \t]+(?=\r?\n)|\r(?=\n)")
+
+
+def cache_path(git: GitOperations, workspace_id: str) -> Path:
+    return state_dir(git) / CACHE_DIR / f"{workspace_id}.json"
+
+
+def definition_hash(parts: Iterable[Tuple[str, bytes]]) -> str:
+    """Normalized hash of definition parts (path, content)."""
+    h = hashlib.sha256()
+    for path, content in sorted((p, c) for p, c in parts if p.rpartition("/")[2] != ITEM_PLATFORM_TYPE):
+        h.update(path.encode("utf-8"))
+        h.update(b"\0")
+        h.update(_normalize(content))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _normalize(content: bytes) -> bytes:
+    try:
+        text = content.decode("utf-8")
+    except UnicodeDecodeError:
+        return content
+    try:
+        text = json.dumps(json.loads(text), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    except ValueError:
+        text = _TRAILING_WS_RE.sub("", text).rstrip("\n") + "\n"
+    return standardize_text(text).encode("utf-8")
+
+
+class DeployedDefinitions:
+    """
+    Per-workspace cache of deployed definition hashes ({item_id: {guid, hash, at}}). unchanged() and record()
+    may be called from several publish workers.
+    """
+
+    def __init__(self, path: Path, *, max_age: float = DEFAULT_MAX_AGE):
+        self.path = Path(path)
+        self.max_age = max_age
+        self._entries: Dict[str, dict] = _load(self.path)
+        self._rendered: Dict[str, str] = {}  # item_id -> normalized hash of what this run publishes
+        self._lock = threading.Lock()
+
+    def unchanged(
+        self,
+        workspace: "FabricWorkspace",
+        item_ids: List[str],
+        *,
+        max_workers: int = 4,
+        render_cache: Optional["RenderCache"] = None,
+    ) -> List[str]:
+        """
+        The items (of item_ids) deployed with the definition they would be published with. Items that are not
+        deployed, of a type whose publish is more than its definition, or that cannot be rendered or fetched are
+        never reported unchanged. Requires a prepared workspace (see adapters.fabric_workspace.prepare_publish).
+        """
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="definitions") as pool:
+            same = list(pool.map(lambda item_id: self._compare(workspace, item_id, render_cache), item_ids))
+        fetched = sum(1 for item_id in item_ids if self._entries.get(item_id, {}).get("fetched"))
+        unchanged = [item_id for item_id, s in zip(item_ids, same) if s]
+        logger.info(
+            f"Compared {len(item_ids)} item(s) with their deployed definitions ({fetched} fetched): "
+            f"{len(unchanged)} unchanged"
+        )
+        return unchanged
+
+    def record(self, workspace: "FabricWorkspace", item_id: str) -> None:
+        """Note that item_id was just published with the definition compared by unchanged()."""
+        guid = fabric.deployed_guid(workspace, item_id)
+        with self._lock:
+            digest = self._rendered.get(item_id)
+            if digest is not None and guid:
+                self._entries[item_id] = {"guid": guid, "hash": digest, "at": time.time()}
+            else:
+                self._entries.pop(item_id, None)
+
+    def save(self) -> None:
+        with self._lock:
+            entries = {i: {k: v for k, v in e.items() if k != "fetched"} for i, e in sorted(self._entries.items())}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": _CACHE_VERSION, "items": entries}, indent=1), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def _compare(self, workspace: "FabricWorkspace", item_id: str, render_cache: Optional["RenderCache"]) -> bool:
+        try:
+            parts = fabric.rendered_definition(workspace, item_id, render_cache)
+        except Exception as exc:
+            logger.debug(f"Could not render {item_id} for comparison: {exc}")
+            return False
+        if parts is None:
+            return False
+        local = definition_hash(parts)
+        guid = fabric.deployed_guid(workspace, item_id)
+        with self._lock:
+            self._rendered[item_id] = local
+            cached = self._entries.get(item_id)
+        if not guid:
+            return False
+
+        if cached is not None and cached.get("guid") == guid and time.time() - cached.get("at", 0) <= self.max_age:
+            return cached["hash"] == local
+        try:
+            remote = definition_hash(fabric.deployed_definition(workspace, guid))
+        except Exception as exc:
+            logger.warning(f"⚠️  Could not fetch the deployed definition of {item_id}; publishing it: {exc}")
+            return False
+        with self._lock:
+            self._entries[item_id] = {"guid": guid, "hash": remote, "at": time.time(), "fetched": True}
+        return remote == local
+
+
+def _load(path: Path) -> Dict[str, dict]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return data.get("items", {}) if data.get("version") == _CACHE_VERSION else {}
@@ -1,31 +1,59 @@
 from pathlib import Path
+from typing import Iterable, Iterator
 
-from ..adapters.git_ops import GitOperations
+from ..adapters.git_ops import ChangeType, FileChange, GitOperations
 
 
-def _git(repo_root: Path) -> GitOperations:
-    return GitOperations(repo_root)
+def _git(repo_root: Path, git: GitOperations | None = None) -> GitOperations:
+    return git if git is not None else GitOperations(repo_root)
 
 
-def is_initial_deployment(repo_root: Path, environment: str) -> bool:
-    return _git(repo_root).is_initial_deployment(environment)
+def is_initial_deployment(repo_root: Path, environment: str, *, git: GitOperations | None = None) -> bool:
+    return _git(repo_root, git).is_initial_deployment(environment)
 
 
-def get_changed_files(repo_root: Path, environment: str, *, source_dir: str) -> list[str]:
+def iter_changes(
+    repo_root: Path, environment: str, *, source_dir: str, git: GitOperations | None = None
+) -> Iterator[FileChange]:
+    """Streams typed changes within source_dir since last deployment tag (repo-relative paths), in one git pass."""
+    g = _git(repo_root, git)
+    tag = g.get_deployment_tag(environment)
+    return g.iter_changes_since_tag(tag, source_dir=source_dir)
+
+
+def iter_changed_paths(changes: Iterable[FileChange], *, repo_root: Path, deleted: list[str]) -> Iterator[str]:
+    """
+    Yields non-deleted files from changes (ABS paths) while collecting deleted files into `deleted`
+    (repo-relative paths). The old side of a rename counts as deleted.
+    """
+    for change in changes:
+        if change.change_type is ChangeType.DELETED:
+            deleted.append(change.path)
+            continue
+        if change.change_type is ChangeType.RENAMED:
+            deleted.append(change.old_path)
+        yield str(repo_root / change.path)
+
+
+def get_changed_files(
+    repo_root: Path, environment: str, *, source_dir: str, git: GitOperations | None = None
+) -> list[str]:
     """Returns non-deleted files within source_dir since last deployment tag (ABS paths)."""
-    g = _git(repo_root)
+    g = _git(repo_root, git)
     tag = g.get_deployment_tag(environment)
     return g.get_changed_files_since_tag(tag, source_dir=source_dir)
 
 
-def get_deleted_files(repo_root: Path, environment: str, *, source_dir: str) -> list[str]:
+def get_deleted_files(
+    repo_root: Path, environment: str, *, source_dir: str, git: GitOperations | None = None
+) -> list[str]:
     """Returns deleted files within source_dir since last deployment tag (repo-relative paths)."""
-    g = _git(repo_root)
+    g = _git(repo_root, git)
     tag = g.get_deployment_tag(environment)
     return g.get_deleted_files_since_tag(tag, source_dir=source_dir)
 
 
-def update_deployment_tag(repo_root: Path, environment: str) -> None:
-    g = _git(repo_root)
+def update_deployment_tag(repo_root: Path, environment: str, *, git: GitOperations | None = None) -> None:
+    g = _git(repo_root, git)
     tag = g.get_deployment_tag(environment)
     g.create_or_update_tag(tag, ref="HEAD")
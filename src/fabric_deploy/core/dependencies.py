@@ -0,0 +1,152 @@
+"""
+core.dependencies
+-----------------
+Cross-item reference graph built from item definitions.
+
+Used by incremental deploys to expand the set of changed items to every item that
+(transitively) references them, and to order that set into publish waves.
+"""
+
+import json
+import logging
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+from .fabric_items import ITEM_PLATFORM_TYPE, PUBLISH_ORDER, FabricItem
+
+logger = logging.getLogger(__name__)
+
+# Logical IDs are how Fabric git integration references items of the same workspace
+# (e.g. pipeline notebook activities, notebook environment bindings).
+_GUID_RE = re.compile(rb"[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}")
+_LAKEHOUSE_NAME_RE = re.compile(rb'"default_lakehouse_name":\s*"([^"]+)"')
+_REPORT_DEFINITION = "definition.pbir"
+
+_PUBLISH_RANK: Dict[str, int] = {t: i for i, t in enumerate(PUBLISH_ORDER)}
+
+
+@dataclass
+class ReferenceGraph:
+    """Directed graph of item ids; an edge a -> b means item a references (depends on) item b."""
+
+    dependencies: Dict[str, Set[str]] = field(default_factory=dict)
+
+    def dependents(self) -> Dict[str, Set[str]]:
+        reverse: Dict[str, Set[str]] = {}
+        for item, deps in self.dependencies.items():
+            for dep in deps:
+                reverse.setdefault(dep, set()).add(item)
+        return reverse
+
+    def closure(self, changed: Iterable[str]) -> Set[str]:
+        """Return the changed items plus every item that transitively references one of them."""
+        reverse = self.dependents()
+        affected: Set[str] = set(changed)
+        queue = deque(affected)
+        while queue:
+            for dependent in reverse.get(queue.popleft(), ()):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    queue.append(dependent)
+        return affected
+
+    def waves(self, items: Iterable[str]) -> List[List[str]]:
+        """
+        Order items into waves: every item only depends on items in earlier waves.
+        Reference cycles cannot be ordered and are emitted together as a final wave.
+        """
+        remaining = set(items)
+        pending = {i: self.dependencies.get(i, set()) & remaining for i in remaining}
+        waves: List[List[str]] = []
+
+        while pending:
+            ready = sorted(i for i, deps in pending.items() if not deps)
+            if not ready:
+                cycle = sorted(pending)
+                logger.warning(f"⚠️  Reference cycle between {len(cycle)} item(s), publishing together: {cycle}")
+                waves.append(cycle)
+                break
+            waves.append(ready)
+            for i in ready:
+                del pending[i]
+            for deps in pending.values():
+                deps.difference_update(ready)
+
+        return waves
+
+
+def build_graph(items: Iterable[FabricItem]) -> ReferenceGraph:
+    """Scan the definition files of every item and record which other items each one references."""
+    items = list(items)
+    by_logical_id = {i.logical_id.lower().encode(): i.item_id for i in items if i.logical_id}
+    by_path = {i.path.resolve(): i.item_id for i in items}
+    lakehouses = {i.display_name.encode(): i.item_id for i in items if i.item_type == "Lakehouse"}
+
+    graph = ReferenceGraph()
+    for item in items:
+        refs: Set[str] = set()
+        for file_path in item.path.rglob("*"):
+            if not file_path.is_file() or file_path.name == ITEM_PLATFORM_TYPE:
+                continue
+            try:
+                content = file_path.read_bytes()
+            except OSError as e:
+                logger.warning(f"⚠️  Could not read {file_path}: {e}")
+                continue
+
+            refs.update(by_logical_id[g] for g in map(bytes.lower, _GUID_RE.findall(content)) if g in by_logical_id)
+
+            if item.item_type == "Notebook":
+                refs.update(lakehouses[n] for n in _LAKEHOUSE_NAME_RE.findall(content) if n in lakehouses)
+
+            if item.item_type == "Report" and file_path.name == _REPORT_DEFINITION:
+                target = _report_model_path(item.path, content)
+                if target is not None and target in by_path:
+                    refs.add(by_path[target])
+
+        refs.discard(item.item_id)
+        graph.dependencies[item.item_id] = refs
+
+    logger.debug(f"Reference graph: {sum(len(d) for d in graph.dependencies.values())} edge(s)")
+    return graph
+
+
+def publish_batches(graph: ReferenceGraph, waves: List[List[str]]) -> List[List[str]]:
+    """
+    Coalesce waves into as few publish calls as possible.
+
+    A single publish_all_items call publishes item types in PUBLISH_ORDER, so consecutive waves can share
+    a call as long as every dependency inside the batch is of a type published strictly earlier.
+    """
+    batches: List[List[str]] = []
+    current: Set[str] = set()
+
+    for wave in waves:
+        fits = all(
+            _rank(dep) < _rank(item) for item in wave for dep in graph.dependencies.get(item, ()) if dep in current
+        )
+        if current and not fits:
+            batches.append(sorted(current))
+            current = set()
+        current.update(wave)
+
+    if current:
+        batches.append(sorted(current))
+    return batches
+
+
+def _rank(item_id: str) -> int:
+    return _PUBLISH_RANK.get(item_id.rpartition(".")[2], len(_PUBLISH_RANK))
+
+
+def _report_model_path(report_dir: Path, content: bytes) -> Path | None:
+    """Resolve the semantic model folder a report is bound to via datasetReference.byPath."""
+    try:
+        by_path = (json.loads(content).get("datasetReference") or {}).get("byPath") or {}
+    except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+        return None
+    rel_path = by_path.get("path")
+    return (report_dir / rel_path).resolve() if rel_path else None
@@ -1,14 +1,18 @@
 from pathlib import Path
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+import base64
 import logging
+import sys
 
-from fabric_cicd import (
-    FabricWorkspace,
-    publish_all_items,
-    append_feature_flag,
-    append_feature_flag,
-    unpublish_all_orphan_items,
-)
+from ..adapters.fabric_workspace import unpublish_empty_folders
+from .dependencies import ReferenceGraph
+from .fabric_items import UNPUBLISH_FEATURE_FLAGS, UNPUBLISH_ORDER
+from .inventory import DeployedItem, WorkspaceInventory
+from .publisher import PublishOutcome, Publisher
+
+if TYPE_CHECKING:
+    from fabric_cicd import FabricWorkspace
 
 logger = logging.getLogger(__name__)
 
@@ -20,13 +24,30 @@ class DeploymentResult:
     deployed_items: int
     mode: str
     message: str = ""
+    # observed publish duration per item, retries included
+    item_seconds: dict[str, float] = field(default_factory=dict)
+    # ids of the items actually unpublished
+    removed_items: list[str] = field(default_factory=list)
+    # ids of the items skipped because the workspace already held their definition
+    unchanged_items: list[str] = field(default_factory=list)
+    # per item, when it was done (long-running operations included), in seconds since publishing started
+    item_completed: dict[str, float] = field(default_factory=dict)
+    # per item, the part of its publish duration spent waiting on long-running operations
+    operation_seconds: dict[str, float] = field(default_factory=dict)
+    # per published item, the attempts it took
+    item_attempts: dict[str, int] = field(default_factory=dict)
+    # ids of the items that could not be published
+    failed_items: list[str] = field(default_factory=list)
 
 
 def run_full(
     *,
-    workspace: FabricWorkspace,
+    workspace: "FabricWorkspace",
     dry_run: bool,
+    graph: ReferenceGraph | None = None,
+    publisher: Publisher | None = None,
 ) -> DeploymentResult:
+    """Publish every repository item, concurrently where graph (item references) allows."""
     if dry_run:
         msg = f"[Dry run]: 🔄 Would perform FULL deployment"
         logger.info(msg)
@@ -38,26 +59,42 @@ def run_full(
         workspace.workspace_id,
     )
     try:
-        publish_all_items(workspace)
-        return DeploymentResult(True, 0, "full", "Full deployment succeeded.")
+        outcomes = (publisher or Publisher(workspace)).publish(graph=graph)
     except Exception as exc:
         logger.exception("Full deployment failed.")
         return DeploymentResult(False, 0, "full", f"Full deployment failed: {exc}")
+    return _result("full", "Full deployment", outcomes)
 
 
-def run_incremental(*, workspace: FabricWorkspace, changed_items: list[str], dry_run: bool) -> DeploymentResult:
-
-    append_feature_flag("enable_experimental_features")
-    append_feature_flag("enable_items_to_include")
+def run_incremental(
+    *,
+    workspace: "FabricWorkspace",
+    changed_items: list[str],
+    dry_run: bool,
+    batches: list[list[str]] | None = None,
+    graph: ReferenceGraph | None = None,
+    publisher: Publisher | None = None,
+    mode: str = "incremental",
+) -> DeploymentResult:
+    """
+    Publish changed_items. When batches is given (dependency-ordered subsets of changed_items), a batch
+    only starts once the previous one is published; items within a batch are published concurrently.
+    With graph, items that reference a failed item are not published, all others are.
+    mode (incremental, hash, or the mode of a sharded deploy) labels the result.
+    """
+    label = f"{mode.capitalize()} deployment"
+    batches = batches or [list(changed_items)]
 
     if dry_run:
-        msg = f"[Dry run]: 🔄 Would deploy {len(changed_items)} item(s): {changed_items}"
+        msg = f"[Dry run]: 🔄 Would deploy {len(changed_items)} item(s) in {len(batches)} batch(es): {batches}"
         logger.info(msg)
-        return DeploymentResult(True, len(changed_items), "incremental", msg)
+        return DeploymentResult(True, len(changed_items), mode, msg)
 
     logger.info(
-        "📤 INCREMENTAL deployment: %d item(s) to env=%s workspace=%s",
+        "📤 %s deployment: %d item(s) in %d batch(es) to env=%s workspace=%s",
+        mode.upper(),
         len(changed_items),
+        len(batches),
         workspace.environment,
         workspace.workspace_id,
     )
@@ -65,27 +102,126 @@ def run_incremental(*, workspace: FabricWorkspace, changed_items: list[str], dry
     logger.debug(f"Changed items: {changed_items}")
 
     try:
-        publish_all_items(workspace, items_to_include=list(changed_items))
-        return DeploymentResult(True, len(changed_items), "incremental", "Incremental deployment succeeded.")
+        outcomes = (publisher or Publisher(workspace)).publish(list(changed_items), graph=graph, batches=batches)
     except Exception as exc:
-        logger.exception("Incremental deployment failed.")
-        return DeploymentResult(False, len(changed_items), "incremental", f"Incremental deployment failed: {exc}")
-
+        logger.exception(f"{label} failed.")
+        return DeploymentResult(False, 0, mode, f"{label} failed: {exc}")
+    return _result(mode, label, outcomes)
+
+
+def _result(mode: str, label: str, outcomes: list[PublishOutcome]) -> DeploymentResult:
+    published = [o for o in outcomes if o.success and not o.unchanged]
+    unchanged = [o.item_id for o in outcomes if o.unchanged]
+    failed = [o.item_id for o in outcomes if not o.success]
+    timings = dict(
+        item_seconds={o.item_id: o.seconds for o in published},
+        item_completed={o.item_id: o.completed for o in published},
+        operation_seconds={o.item_id: o.operation_seconds for o in published if o.operation_seconds},
+        item_attempts={o.item_id: o.attempts for o in published},
+        unchanged_items=unchanged,
+        failed_items=failed,
+    )
+    if failed:
+        return DeploymentResult(False, len(published), mode, f"{label} failed for: {failed}", **timings)
+    retried = sum(o.attempts > 1 for o in published)
+    msg = f"{label} succeeded ({len(published)} item(s)" + (f", {retried} after retries" if retried else "")
+    msg += f", {len(unchanged)} unchanged)." if unchanged else ")."
+    return DeploymentResult(True, len(published), mode, msg, **timings)
+
+
+def unpublishable_types(item_types: list[str] | None = None) -> list[str]:
+    """Item types (of item_types, default all) that may be unpublished with the current feature flags, in order."""
+    # feature flags live in fabric-cicd's constants; if fabric-cicd is not loaded none can have been set
+    constants = sys.modules.get("fabric_cicd.constants")
+    feature_flags = constants.FEATURE_FLAG if constants is not None else set()
+    return [
+        t
+        for t in UNPUBLISH_ORDER
+        if (item_types is None or t in item_types)
+        and (t not in UNPUBLISH_FEATURE_FLAGS or UNPUBLISH_FEATURE_FLAGS[t] in feature_flags)
+    ]
+
+
+def run_unpublish_orphans(
+    *,
+    workspace: "FabricWorkspace",
+    inventory: WorkspaceInventory | None,
+    orphans: list[DeployedItem],
+    dry_run: bool,
+) -> DeploymentResult:
+    """
+    Delete orphans (deployed items missing from the repository, in unpublish order) by id, then remove
+    workspace folders left empty. inventory is the workspace as it stands after publishing; without one
+    (orphans looked up individually) the folders are left for the next full sweep.
+    """
+    if not orphans:
+        return DeploymentResult(True, 0, "unpublish", "ℹ️ No orphan items to unpublish.")
 
-def run_unpublish_orphans(*, workspace: FabricWorkspace, dry_run: bool, item_name_exclude_regex: str = "^$"):
     if dry_run:
-        msg = f"[Dry run]: 🔄 Would unpublish orphan items"
+        msg = f"[Dry run]: 🔄 Would unpublish {len(orphans)} orphan item(s): {[o.item_id for o in orphans]}"
+        logger.info(msg)
         return DeploymentResult(True, 0, "unpublish", msg)
 
     logger.info(
-        "🧹 Unpublishing orphan items in env=%s workspace=%s",
+        "🧹 Unpublishing %d orphan item(s) in env=%s workspace=%s",
+        len(orphans),
         workspace.environment,
         workspace.workspace_id,
     )
 
+    removed: list[str] = []
+    failed: list[str] = []
     try:
-        unpublish_all_orphan_items(workspace, item_name_exclude_regex=item_name_exclude_regex)
-        return DeploymentResult(True, 0, "unpublish", "Unpublish orphans succeeded.")
+        for item in _unpublish_order(workspace, orphans):
+            logger.info(f"Unpublishing {item.item_type} '{item.display_name}'")
+            try:
+                workspace.endpoint.invoke(method="DELETE", url=f"{workspace.base_api_url}/items/{item.guid}")
+                removed.append(item.item_id)
+            except Exception as exc:
+                # like fabric-cicd: a failed delete is reported, not fatal
+                logger.warning(f"⚠️  Failed to unpublish {item.item_id}: {exc}")
+                failed.append(item.item_id)
+
+        if inventory is not None:
+            unpublish_empty_folders(workspace, inventory.updated(removed=removed).folder_ids())
     except Exception as exc:
         logger.error("Unpublish orphans failed.")
-        return DeploymentResult(False, 0, "unpublish", f"Unpublish orphans failed: {exc}")
+        return DeploymentResult(
+            False, len(removed), "unpublish", f"Unpublish orphans failed: {exc}", removed_items=removed
+        )
+
+    msg = f"Unpublish orphans succeeded ({len(removed)} item(s))."
+    if failed:
+        msg += f" Failed to unpublish: {failed}"
+    return DeploymentResult(True, len(removed), "unpublish", msg, removed_items=removed)
+
+
+def _unpublish_order(workspace: "FabricWorkspace", orphans: list[DeployedItem]) -> list[DeployedItem]:
+    """
+    Orphans come in type order already; pipelines that invoke other orphan pipelines must go before them,
+    which (as in fabric-cicd) needs their deployed definitions.
+    """
+    pipelines = {o.guid.lower(): o for o in orphans if o.item_type == "DataPipeline"}
+    if len(pipelines) < 2:
+        return orphans
+
+    graph = ReferenceGraph()
+    for guid, pipeline in pipelines.items():
+        response = workspace.endpoint.invoke(
+            method="POST", url=f"{workspace.base_api_url}/items/{pipeline.guid}/getDefinition"
+        )
+        content = "".join(
+            base64.b64decode(part["payload"]).decode("utf-8")
+            for part in response["body"]["definition"]["parts"]
+            if part["path"] == "pipeline-content.json"
+        ).lower()
+        graph.dependencies[pipeline.item_id] = {
+            other.item_id for other_guid, other in pipelines.items() if other_guid != guid and other_guid in content
+        }
+
+    # waves list referenced pipelines first; delete in reverse
+    ordered = [item_id for wave in reversed(graph.waves(graph.dependencies)) for item_id in wave]
+    by_id = {o.item_id: o for o in pipelines.values()}
+    first = next(n for n, o in enumerate(orphans) if o.item_type == "DataPipeline")
+    rest = [o for o in orphans if o.item_type != "DataPipeline"]
+    return rest[:first] + [by_id[i] for i in ordered] + rest[first:]
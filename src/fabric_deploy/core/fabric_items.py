@@ -1,7 +1,16 @@
 # core/fabric_items.py
 import json
-from pathlib import PurePath, Path
-from typing import Iterable, Optional, List, Set
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import PurePath, PurePosixPath, Path
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, List, Set
+
+if TYPE_CHECKING:
+    from ..adapters.git_ops import GitOperations
+    from .item_index import ItemIndex
+
+logger = logging.getLogger(__name__)
 
 # Single source of truth for supported Microsoft Fabric item types
 SUPPORTED_ITEM_TYPES: Set[str] = {
@@ -25,50 +34,207 @@ SUPPORTED_ITEM_TYPES: Set[str] = {
     "Dataflow",
 }
 
+# Order in which fabric-cicd's publish_all_items publishes item types within a single call
+PUBLISH_ORDER: List[str] = [
+    "VariableLibrary",
+    "Warehouse",
+    "MirroredDatabase",
+    "Lakehouse",
+    "SQLDatabase",
+    "Environment",
+    "Notebook",
+    "Eventhouse",
+    "SemanticModel",
+    "Report",
+    "CopyJob",
+    "KQLDatabase",
+    "KQLQueryset",
+    "Reflex",
+    "Eventstream",
+    "KQLDashboard",
+    "Dataflow",
+    "DataPipeline",
+]
+
+# Order in which fabric-cicd's unpublish_all_orphan_items removes item types (dependents first)
+UNPUBLISH_ORDER: List[str] = [
+    "DataPipeline",
+    "Dataflow",
+    "Eventstream",
+    "Reflex",
+    "KQLDashboard",
+    "KQLQueryset",
+    "KQLDatabase",
+    "CopyJob",
+    "Report",
+    "SemanticModel",
+    "Eventhouse",
+    "Notebook",
+    "Environment",
+    "MirroredDatabase",
+    "SQLDatabase",
+    "Lakehouse",
+    "Warehouse",
+    "VariableLibrary",
+]
+
+# Item types fabric-cicd only unpublishes when the matching feature flag is set
+UNPUBLISH_FEATURE_FLAGS: Dict[str, str] = {
+    "Lakehouse": "enable_lakehouse_unpublish",
+    "SQLDatabase": "enable_sqldatabase_unpublish",
+    "Warehouse": "enable_warehouse_unpublish",
+    "Eventhouse": "enable_eventhouse_unpublish",
+}
+
 ITEM_PLATFORM_TYPE = ".platform"
 ITEM_DISPLAY_NAME = "displayName"
 
 
-def _read_display_name(item_dir: Path) -> Optional[str]:
-    platform_file = item_dir / ITEM_PLATFORM_TYPE
-    try:
-        with platform_file.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data.get("metadata", {}).get(ITEM_DISPLAY_NAME)
-    except (FileNotFoundError, json.JSONDecodeError):
-        raise Exception(f"Platform file not found")
-
+@dataclass(frozen=True)
+class FabricItem:
+    """A Fabric item folder in the source tree, as described by its .platform file."""
 
-def _extract_item_id(path: str) -> Optional[str]:
-    """
-    Given a file path, return the Fabric item ID (e.g., 'foo.Notebook')
-    if the path is part of a recognized Fabric item folder.
-    """
-    parts = PurePath(path).parts
-    print(parts)
-    # Ignore the last segment (usually the file name)
-    for idx, segment in enumerate(parts[:-1]):
-        if "." not in segment:
-            continue
-        name, _, item_type = segment.rpartition(".")
-        if name and item_type in SUPPORTED_ITEM_TYPES:
-            item_dir = Path(*parts[: idx + 1])  # path up to and including this segment
-            display_name = _read_display_name(item_dir)
-            return f"{display_name}.{item_type}"
+    item_type: str
+    display_name: str
+    logical_id: str
+    path: Path
 
-    return None
+    @property
+    def item_id(self) -> str:
+        return f"{self.display_name}.{self.item_type}"
 
 
-def extract_changed_items(paths: Iterable[str]) -> List[str]:
+def extract_changed_items(paths: Iterable[str], index: "ItemIndex") -> List[str]:
     """
     Given a list of changed file paths,
-    return unique Fabric item IDs (e.g., 'foo.Notebook', 'bar.DataPipeline').
+    return unique Fabric item IDs (e.g., 'foo.Notebook', 'bar.DataPipeline'), resolved through index.
     """
     found_items: Set[str] = set()
 
     for path in paths:
-        item_id = _extract_item_id(path)
-        if item_id:
-            found_items.add(item_id)
+        item = index.resolve(path)
+        if item is not None:
+            found_items.add(item.item_id)
 
     return sorted(found_items)
+
+
+def parse_item_types(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated list of item types (matched case-insensitively, returned in publish order);
+    None or an empty value means all types.
+    """
+    if not value or not value.strip():
+        return None
+    known = {t.lower(): t for t in SUPPORTED_ITEM_TYPES}
+    wanted = set()
+    for name in filter(None, (v.strip() for v in value.split(","))):
+        if name.lower() not in known:
+            raise ValueError(f"Unsupported item type: {name!r} (supported: {', '.join(sorted(SUPPORTED_ITEM_TYPES))})")
+        wanted.add(known[name.lower()])
+    return [t for t in PUBLISH_ORDER if t in wanted] or None
+
+
+def read_item(item_dir: Path) -> Optional[FabricItem]:
+    """
+    Parse item_dir/.platform; returns None if it is missing or describes an unsupported item type.
+    Raises if it is not valid JSON or names no item.
+    """
+    platform_file = Path(item_dir) / ITEM_PLATFORM_TYPE
+    try:
+        content = platform_file.read_bytes()
+    except FileNotFoundError:
+        return None
+    return _item_from_platform(content, Path(item_dir), platform_file)
+
+
+def _item_from_platform(content: bytes, item_dir: Path, platform_file: PurePath) -> Optional[FabricItem]:
+    """The item described by the content of its .platform file; None for unsupported item types."""
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise Exception(f"Invalid platform file: {platform_file} ({e})")
+    metadata = data.get("metadata", {})
+    if metadata.get("type") not in SUPPORTED_ITEM_TYPES:
+        return None
+    if not metadata.get(ITEM_DISPLAY_NAME):
+        raise Exception(f"Invalid platform file: {platform_file} (no metadata.{ITEM_DISPLAY_NAME})")
+    return FabricItem(
+        item_type=metadata["type"],
+        display_name=metadata[ITEM_DISPLAY_NAME],
+        logical_id=data.get("config", {}).get("logicalId", ""),
+        path=item_dir,
+    )
+
+
+def extract_deleted_items(
+    paths: Iterable[str], *, git: "GitOperations", revision: str, existing_ids: Iterable[str]
+) -> List[FabricItem]:
+    """
+    Given repo-relative paths as of revision (deleted files, or .platform files changed since), return the items
+    they belonged to at revision that no longer exist (by item id) in existing_ids. Each path is mapped to its
+    item folder through the .platform file at revision, so deleting part of an item, or moving its folder, does
+    not count; renaming it does.
+    """
+    existing = set(existing_ids)
+    platforms: Dict[PurePosixPath, Optional[FabricItem]] = {}
+    found: Dict[str, FabricItem] = {}
+
+    for path in paths:
+        for item_dir in PurePosixPath(path).parents:
+            if item_dir == PurePosixPath("."):
+                break
+            if item_dir not in platforms:
+                platforms[item_dir] = _read_item_at(git, revision, item_dir)
+            item = platforms[item_dir]
+            if item is not None:
+                if item.item_id not in existing:
+                    found[item.item_id] = item
+                break
+
+    return sorted(found.values(), key=lambda i: i.item_id)
+
+
+def _read_item_at(git: "GitOperations", revision: str, item_dir: PurePosixPath) -> Optional[FabricItem]:
+    """
+    Like read_item, for an item folder (repo-relative) as of a git revision. An invalid .platform file there is
+    logged and skipped: the item cannot be identified, so it is not offered for unpublishing.
+    """
+    platform_file = f"{revision}:{item_dir.as_posix()}/{ITEM_PLATFORM_TYPE}"
+    content = git.read_object(platform_file)
+    if content is None:
+        return None
+    try:
+        return _item_from_platform(content, Path(item_dir), PurePosixPath(platform_file))
+    except Exception as e:
+        logger.warning(f"⚠️  Not unpublishing the item deleted with folder {item_dir}: {e}")
+        return None
+
+
+def discover_items(source_root: Path, item_types: Optional[Iterable[str]] = None) -> List[FabricItem]:
+    """
+    Walk source_root once and return every supported Fabric item folder (a folder holding a .platform file),
+    optionally only those of item_types. Item folders are not descended into, and with item_types neither are
+    folders named after another item type (<name>.<Type>, as Fabric git integration names item folders).
+    """
+    wanted = set(item_types) if item_types is not None else None
+    found: List[FabricItem] = []
+
+    for root, dirs, files in os.walk(source_root):
+        if ITEM_PLATFORM_TYPE not in files:
+            if wanted is not None:
+                dirs[:] = [d for d in dirs if folder_item_type(d) in wanted or folder_item_type(d) is None]
+            continue
+        dirs[:] = []  # item definitions never nest other items
+
+        item = read_item(Path(root))
+        if item is not None and (wanted is None or item.item_type in wanted):
+            found.append(item)
+
+    return sorted(found, key=lambda i: i.item_id)
+
+
+def folder_item_type(name: str) -> Optional[str]:
+    """The supported item type a folder name ends in (<name>.<Type>), if any."""
+    _, dot, suffix = name.rpartition(".")
+    return suffix if dot and suffix in SUPPORTED_ITEM_TYPES else None
@@ -0,0 +1,238 @@
+"""
+core.history
+------------
+Deployment history: one JSON line per deploy run, for performance trends.
+
+A run record holds the time spent per deploy phase (the deploy.* spans of the run's trace) and, per target, the
+items published with their duration, time spent on long-running operations, attempts, definition size and the
+duration estimate they were planned with, plus the number of 429 responses the target was throttled with. Records
+are appended to a JSON lines file in the local state directory (the last DEFAULT_KEEP runs are kept) and summarized
+by `fabric-deploy stats`.
+"""
+
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..adapters.git_ops import GitOperations
+from ..utils.state import state_dir
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILE = "history.jsonl"
+HISTORY_VERSION = 1
+DEFAULT_KEEP = 500
+
+
+def history_path(git: GitOperations) -> Path:
+    return state_dir(git) / HISTORY_FILE
+
+
+@dataclass
+class ItemRun:
+    seconds: float
+    attempts: int = 1
+    # of seconds, the time spent waiting on long-running operations
+    operation_seconds: float = 0.0
+    # size of the item's definition files in the repository
+    bytes: int = 0
+    # duration the item was expected to take (core.plan.estimate_seconds) before this run
+    estimated_seconds: Optional[float] = None
+
+
+@dataclass
+class TargetRun:
+    workspace_id: str
+    environment: str
+    mode: str
+    success: bool
+    shard: Optional[str] = None  # "i/N"
+    items: Dict[str, ItemRun] = field(default_factory=dict)
+    failed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    removed: int = 0
+    # 429 responses received while publishing
+    throttled: int = 0
+
+    @property
+    def retries(self) -> int:
+        return sum(i.attempts - 1 for i in self.items.values())
+
+
+@dataclass
+class RunRecord:
+    started_at: float
+    seconds: float
+    commit: str
+    success: bool
+    # total seconds per phase span (deploy.publish, deploy.scope, …), summed over targets
+    phases: Dict[str, float] = field(default_factory=dict)
+    targets: List[TargetRun] = field(default_factory=list)
+
+    def item_runs(self) -> Iterator[Tuple[str, ItemRun]]:
+        """(item_id, ItemRun) for every item published by the run."""
+        for target in self.targets:
+            yield from target.items.items()
+
+    def to_dict(self) -> dict:
+        return {"version": HISTORY_VERSION, **asdict(self)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunRecord":
+        targets = [
+            TargetRun(**{**t, "items": {i: ItemRun(**r) for i, r in t.get("items", {}).items()}})
+            for t in data.get("targets", [])
+        ]
+        return cls(
+            started_at=data["started_at"],
+            seconds=data["seconds"],
+            commit=data["commit"],
+            success=data["success"],
+            phases=data.get("phases", {}),
+            targets=targets,
+        )
+
+
+def append(path: Path, record: RunRecord, *, keep: int = DEFAULT_KEEP) -> None:
+    """Add record to the history at path, dropping the oldest runs beyond keep."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps(record.to_dict(), separators=(",", ":"))
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        lines = []
+    if len(lines) < keep:
+        with path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        return
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text("\n".join([*lines[len(lines) - keep + 1 :], line]) + "\n", encoding="utf-8")
+    tmp.replace(path)
+
+
+def load(path: Path, *, workspace_id: Optional[str] = None, since: Optional[float] = None) -> List[RunRecord]:
+    """Recorded runs, oldest first; with workspace_id, only its targets (and runs that deployed to it)."""
+    runs: List[RunRecord] = []
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return runs
+    for line in lines:
+        try:
+            data = json.loads(line)
+            if data.get("version") != HISTORY_VERSION:
+                continue
+            run = RunRecord.from_dict(data)
+        except (ValueError, KeyError, TypeError):
+            logger.debug(f"Skipping unreadable history line: {line[:80]}")
+            continue
+        if since is not None and run.started_at < since:
+            continue
+        if workspace_id is not None:
+            run.targets = [t for t in run.targets if t.workspace_id == workspace_id]
+            if not run.targets:
+                continue
+        runs.append(run)
+    return runs
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100) of values."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+@dataclass
+class ItemStats:
+    item_id: str
+    runs: int
+    p50: float
+    p95: float
+    max: float
+    retries: int
+    operation_seconds: float  # median
+    bytes: int  # latest
+    # median of |actual - estimate| / actual over the runs that had an estimate
+    estimate_error: Optional[float]
+
+
+def item_stats(runs: Iterable[RunRecord]) -> List[ItemStats]:
+    """Publish time statistics per item over runs, slowest (by p50) first."""
+    observed: Dict[str, List[ItemRun]] = {}
+    for run in runs:
+        for item_id, item in run.item_runs():
+            observed.setdefault(item_id, []).append(item)
+    stats = []
+    for item_id, items in observed.items():
+        seconds = [i.seconds for i in items]
+        errors = [abs(i.seconds - i.estimated_seconds) / i.seconds for i in items if i.estimated_seconds and i.seconds]
+        stats.append(
+            ItemStats(
+                item_id=item_id,
+                runs=len(items),
+                p50=percentile(seconds, 50),
+                p95=percentile(seconds, 95),
+                max=max(seconds),
+                retries=sum(i.attempts - 1 for i in items),
+                operation_seconds=percentile([i.operation_seconds for i in items], 50),
+                bytes=items[-1].bytes,
+                estimate_error=percentile(errors, 50) if errors else None,
+            )
+        )
+    return sorted(stats, key=lambda s: (-s.p50, s.item_id))
+
+
+@dataclass
+class RunSummary:
+    """One row of the trend: a run's totals."""
+
+    started_at: float
+    commit: str
+    modes: str
+    success: bool
+    seconds: float
+    publish_seconds: float
+    items: int
+    unchanged: int
+    retries: int
+    throttled: int
+    p50: float
+    p95: float
+
+
+def trend(runs: Iterable[RunRecord]) -> List[RunSummary]:
+    rows = []
+    for run in runs:
+        seconds = [i.seconds for _, i in run.item_runs()]
+        rows.append(
+            RunSummary(
+                started_at=run.started_at,
+                commit=run.commit,
+                modes=",".join(sorted({t.mode for t in run.targets})),
+                success=run.success,
+                seconds=run.seconds,
+                publish_seconds=run.phases.get("deploy.publish", 0.0),
+                items=len(seconds),
+                unchanged=sum(t.unchanged for t in run.targets),
+                retries=sum(t.retries for t in run.targets),
+                throttled=sum(t.throttled for t in run.targets),
+                p50=percentile(seconds, 50),
+                p95=percentile(seconds, 95),
+            )
+        )
+    return rows
+
+
+def phase_means(runs: List[RunRecord]) -> Dict[str, float]:
+    """Mean seconds per phase over the runs that had it, longest first."""
+    totals: Dict[str, List[float]] = {}
+    for run in runs:
+        for name, seconds in run.phases.items():
+            totals.setdefault(name, []).append(seconds)
+    means = {name: sum(s) / len(s) for name, s in totals.items()}
+    return dict(sorted(means.items(), key=lambda kv: -kv[1]))
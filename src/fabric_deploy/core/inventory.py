@@ -0,0 +1,199 @@
+"""
+core.inventory
+--------------
+Snapshot of the items deployed in a Fabric workspace.
+
+Fetched with a single (paginated) call to the workspace items API and cached as JSON in the local state
+directory with a TTL, so planning can run against a recent listing without listing the workspace again. Deploys
+never delete by a cached listing: they list the workspace (or look items up) themselves. A fetched inventory is never mutated: the pre-publish snapshot stays intact for orphan detection, and
+publish/unpublish results produce an updated copy that is persisted for the next run.
+"""
+
+import json
+import logging
+import re
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from types import MappingProxyType
+from typing import Iterable, Iterator, List, Mapping, Optional
+
+from ..adapters.git_ops import GitOperations
+from ..utils.state import state_dir
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_DIR = "inventory"
+DEFAULT_MAX_AGE = 600
+_INVENTORY_VERSION = 1
+
+
+@dataclass(frozen=True)
+class DeployedItem:
+    item_type: str
+    display_name: str
+    guid: str
+    description: str = ""
+    folder_id: str = ""
+
+    @property
+    def item_id(self) -> str:
+        return f"{self.display_name}.{self.item_type}"
+
+    @classmethod
+    def from_api(cls, entry: dict) -> "DeployedItem":
+        """Build from an entry of the workspace items API (List Items)."""
+        return cls(
+            item_type=entry["type"],
+            display_name=entry["displayName"],
+            guid=entry["id"],
+            description=entry.get("description") or "",
+            folder_id=entry.get("folderId") or "",
+        )
+
+
+@dataclass(frozen=True)
+class WorkspaceInventory:
+    workspace_id: str
+    fetched_at: float  # when the workspace was last listed; updates from our own deploys keep it
+    items: Mapping[str, DeployedItem] = field(default_factory=dict)
+
+    def __post_init__(self):
+        object.__setattr__(self, "items", MappingProxyType(dict(self.items)))
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def get(self, item_id: str) -> Optional[DeployedItem]:
+        return self.items.get(item_id)
+
+    def item_ids(self, item_types: Optional[Iterable[str]] = None) -> list[str]:
+        wanted = set(item_types) if item_types is not None else None
+        return sorted(i for i, item in self.items.items() if wanted is None or item.item_type in wanted)
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def folder_ids(self) -> set[str]:
+        return {i.folder_id for i in self.items.values() if i.folder_id}
+
+    def updated(self, published: Iterable[DeployedItem] = (), removed: Iterable[str] = ()) -> "WorkspaceInventory":
+        """Return a copy reflecting items published (created or updated) and removed by this run."""
+        items = dict(self.items)
+        for item_id in removed:
+            items.pop(item_id, None)
+        items.update((item.item_id, item) for item in published)
+        return replace(self, items=items)
+
+    @classmethod
+    def fetch(cls, workspace) -> "WorkspaceInventory":
+        """List the deployed items through a FabricWorkspace's endpoint, following continuation links."""
+        items = {item.item_id: item for item in _list_items(workspace, f"{workspace.base_api_url}/items")}
+        logger.info(f"📋 Listed {len(items)} deployed item(s) in workspace {workspace.workspace_id}")
+        return cls(workspace_id=workspace.workspace_id, fetched_at=time.time(), items=items)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["WorkspaceInventory"]:
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.get("version") != _INVENTORY_VERSION:
+            return None
+        items = (DeployedItem.from_api(e) for e in data["items"])
+        return cls(
+            workspace_id=data["workspace_id"],
+            fetched_at=data["fetched_at"],
+            items={i.item_id: i for i in items},
+        )
+
+    def save(self, path: Path) -> None:
+        data = {
+            "version": _INVENTORY_VERSION,
+            "workspace_id": self.workspace_id,
+            "fetched_at": self.fetched_at,
+            "items": [
+                {
+                    "type": i.item_type,
+                    "displayName": i.display_name,
+                    "id": i.guid,
+                    "description": i.description,
+                    "folderId": i.folder_id,
+                }
+                for _, i in sorted(self.items.items())
+            ],
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+        tmp.replace(path)
+
+
+def default_inventory_path(git: GitOperations, workspace_id: str) -> Path:
+    return state_dir(git) / INVENTORY_DIR / f"{workspace_id}.json"
+
+
+def load_cached(path: Path, workspace_id: str, max_age: Optional[float]) -> Optional[WorkspaceInventory]:
+    """Return the cached inventory at path if it belongs to workspace_id and is at most max_age seconds old."""
+    inventory = WorkspaceInventory.load(path)
+    if inventory is None or inventory.workspace_id != workspace_id:
+        return None
+    if max_age is not None and inventory.age() > max_age:
+        logger.debug(f"Inventory snapshot {path} is {inventory.age():.0f}s old, refreshing")
+        return None
+    return inventory
+
+
+def _list_items(workspace, url: str) -> Iterator[DeployedItem]:
+    while url:
+        response = workspace.endpoint.invoke(method="GET", url=url)
+        body = response.get("body") or {}
+        for entry in body.get("value", []):
+            yield DeployedItem.from_api(entry)
+        url = body.get("continuationUri") or (response.get("header") or {}).get("continuationUri")
+
+
+def select(inventory: WorkspaceInventory, item_ids: Iterable[str], item_types: Iterable[str]) -> List[DeployedItem]:
+    """The deployed items among item_ids whose type is in item_types, in item_types order."""
+    rank = {t: n for n, t in enumerate(item_types)}
+    found = [inventory.get(i) for i in set(item_ids) if i in inventory]
+    return sorted((i for i in found if i.item_type in rank), key=lambda i: (rank[i.item_type], i.item_id))
+
+
+def lookup(workspace, item_ids: Iterable[str], item_types: Iterable[str]) -> List[DeployedItem]:
+    """
+    Like select, against the workspace itself when there is no inventory: only the types of item_ids are listed
+    (one filtered List Items call per type) instead of the whole workspace.
+    """
+    item_ids = set(item_ids)
+    wanted = {item_id.rpartition(".")[2] for item_id in item_ids}
+    item_types = [t for t in item_types if t in wanted]
+    items = {
+        item.item_id: item
+        for item_type in item_types
+        for item in _list_items(workspace, f"{workspace.base_api_url}/items?type={item_type}")
+        if item.item_id in item_ids
+    }
+    return select(WorkspaceInventory(workspace.workspace_id, time.time(), items), item_ids, item_types)
+
+
+def find_orphans(
+    inventory: WorkspaceInventory,
+    repository_ids: Iterable[str],
+    item_types: Iterable[str],
+    item_name_exclude_regex: str = "^$",
+) -> List[DeployedItem]:
+    """Deployed items of item_types that no longer exist in the repository, in item_types order."""
+    rank = {t: n for n, t in enumerate(item_types)}
+    repository_ids = set(repository_ids)
+    exclude = re.compile(item_name_exclude_regex)
+    orphans = [
+        item
+        for item_id, item in inventory.items.items()
+        if item.item_type in rank and item_id not in repository_ids and not exclude.match(item.display_name)
+    ]
+    return sorted(orphans, key=lambda i: (rank[i.item_type], i.item_id))
@@ -0,0 +1,229 @@
+"""
+core.item_index
+---------------
+Index of the Fabric item folders under a source directory.
+
+The tree is scanned (and every .platform file parsed) once per run; paths are resolved to
+their owning item through a prefix trie in O(path depth). A snapshot of the index can be
+persisted in the local state directory and refreshed from the git diff on the next run.
+"""
+
+import json
+import logging
+from pathlib import Path, PurePath
+from typing import Dict, Iterable, List, Optional
+
+from ..adapters.git_ops import ChangeType, FileChange, GitOperations
+from ..utils.state import state_dir
+from .fabric_items import ITEM_PLATFORM_TYPE, FabricItem, discover_items, read_item
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "item-index.json"
+_SNAPSHOT_VERSION = 1
+
+
+class _TrieNode:
+    __slots__ = ("children", "item")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.item: Optional[FabricItem] = None
+
+
+class ItemIndex:
+    """Maps item directories to their .platform metadata and resolves file paths to items."""
+
+    def __init__(self, source_root: Path, items: Iterable[FabricItem] = (), item_types: Optional[Iterable[str]] = None):
+        self.source_root = Path(source_root).resolve()
+        # None = every supported type; otherwise items of other types are never indexed
+        self.item_types: Optional[frozenset] = frozenset(item_types) if item_types is not None else None
+        self._by_dir: Dict[PurePath, FabricItem] = {}
+        self._root = _TrieNode()
+        for item in items:
+            self.add(item)
+
+    @classmethod
+    def build(cls, source_root: Path, item_types: Optional[Iterable[str]] = None) -> "ItemIndex":
+        """Scan source_root once and index every supported item (of item_types, when given)."""
+        source_root = Path(source_root).resolve()
+        index = cls(source_root, discover_items(source_root, item_types), item_types)
+        logger.debug(f"Indexed {len(index)} item(s) under {index.source_root}")
+        return index
+
+    @classmethod
+    def load_or_build(
+        cls, source_root: Path, git: GitOperations, item_types: Optional[Iterable[str]] = None
+    ) -> "ItemIndex":
+        """
+        Load the persisted snapshot and bring it up to date from the git diff (committed changes since
+        the snapshot, then uncommitted and untracked changes), or scan the tree if there is no usable snapshot.
+        The snapshot itself only ever reflects HEAD. With item_types only those types are indexed; a snapshot
+        is usable if it covers them, and a scan skips the folders of other types.
+        """
+        source_root = Path(source_root).resolve()
+        snapshot_path = state_dir(git) / SNAPSHOT_FILE
+        head = git.head_commit()
+
+        index = None
+        snapshot = _read_snapshot(snapshot_path)
+        if (
+            snapshot
+            and snapshot.get("source_root") == str(source_root)
+            and _covers(snapshot.get("item_types"), item_types)
+        ):
+            try:
+                index = cls._from_snapshot(source_root, snapshot)
+                if snapshot.get("commit") != head:
+                    index.refresh(git.iter_changes(snapshot["commit"], str(source_root), target=head), git.repo_root())
+            except Exception as e:
+                logger.debug(f"Item index snapshot unusable, rescanning: {e}")
+                index = None
+
+        if index is None:
+            index = cls.build(source_root, item_types)
+            # the scan sees the working tree; only persist it when it matches HEAD
+            if any(True for _ in git.iter_changes(head, str(source_root), target=None)) or git.list_untracked_files(
+                str(source_root)
+            ):
+                return index
+            index.save(snapshot_path, head)
+            return index
+
+        index.save(snapshot_path, head)
+
+        # overlay local modifications without persisting them
+        repo_root = git.repo_root()
+        index.refresh(git.iter_changes(head, str(source_root), target=None), repo_root)
+        untracked = git.list_untracked_files(str(source_root))
+        index.refresh((FileChange(ChangeType.ADDED, p) for p in untracked), repo_root)
+        return index.restricted(item_types)
+
+    def __len__(self) -> int:
+        return len(self._by_dir)
+
+    def __iter__(self):
+        return iter(self.items())
+
+    def items(self, item_types: Optional[Iterable[str]] = None) -> List[FabricItem]:
+        """All indexed items (optionally restricted to item_types), sorted by item id."""
+        wanted = set(item_types) if item_types is not None else None
+        return sorted(
+            (i for i in self._by_dir.values() if wanted is None or i.item_type in wanted), key=lambda i: i.item_id
+        )
+
+    def item_ids(self) -> List[str]:
+        return [i.item_id for i in self.items()]
+
+    def restricted(self, item_types: Optional[Iterable[str]]) -> "ItemIndex":
+        """This index limited to item_types (itself when that changes nothing)."""
+        if item_types is None or (self.item_types is not None and self.item_types <= set(item_types)):
+            return self
+        return ItemIndex(self.source_root, self.items(item_types), item_types)
+
+    def add(self, item: FabricItem) -> None:
+        if self.item_types is not None and item.item_type not in self.item_types:
+            return
+        rel = self._relative(item.path)
+        if rel is None:
+            raise ValueError(f"Item {item.path} is outside {self.source_root}")
+        node = self._root
+        for part in rel.parts:
+            node = node.children.setdefault(part, _TrieNode())
+        node.item = item
+        self._by_dir[rel] = item
+
+    def remove(self, item_dir: Path) -> None:
+        rel = self._relative(item_dir)
+        if rel is None or self._by_dir.pop(rel, None) is None:
+            return
+        node = self._root
+        for part in rel.parts:
+            node = node.children[part]
+        node.item = None
+
+    def resolve(self, path: str | Path) -> Optional[FabricItem]:
+        """Return the item owning path (an item folder or any file below it), if any."""
+        rel = self._relative(Path(path))
+        if rel is None:
+            return None
+        node = self._root
+        for part in rel.parts:
+            node = node.children.get(part)
+            if node is None:
+                return None
+            if node.item is not None:
+                return node.item
+        return None
+
+    def refresh(self, changes: Iterable[FileChange], repo_root: Path) -> None:
+        """Apply git changes (repo-relative paths) to the index; only .platform files affect it."""
+        for change in changes:
+            if change.change_type is ChangeType.RENAMED and PurePath(change.old_path).name == ITEM_PLATFORM_TYPE:
+                self.remove(repo_root / PurePath(change.old_path).parent)
+            if PurePath(change.path).name != ITEM_PLATFORM_TYPE:
+                continue
+            item_dir = repo_root / PurePath(change.path).parent
+            self.remove(item_dir)
+            if change.change_type is not ChangeType.DELETED:
+                item = read_item(item_dir)
+                if item is not None:
+                    self.add(item)
+
+    def save(self, path: Path, commit: str) -> None:
+        data = {
+            "version": _SNAPSHOT_VERSION,
+            "commit": commit,
+            "source_root": str(self.source_root),
+            "item_types": sorted(self.item_types) if self.item_types is not None else None,
+            "items": [
+                {
+                    "path": rel.as_posix(),
+                    "type": item.item_type,
+                    "displayName": item.display_name,
+                    "logicalId": item.logical_id,
+                }
+                for rel, item in sorted(self._by_dir.items())
+            ],
+        }
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        tmp.replace(path)
+
+    @classmethod
+    def _from_snapshot(cls, source_root: Path, snapshot: dict) -> "ItemIndex":
+        return cls(
+            source_root,
+            (
+                FabricItem(
+                    item_type=entry["type"],
+                    display_name=entry["displayName"],
+                    logical_id=entry["logicalId"],
+                    path=source_root / entry["path"],
+                )
+                for entry in snapshot["items"]
+            ),
+            snapshot.get("item_types"),
+        )
+
+    def _relative(self, path: Path) -> Optional[PurePath]:
+        try:
+            return PurePath(path).relative_to(self.source_root)
+        except ValueError:
+            try:
+                return Path(path).resolve().relative_to(self.source_root)
+            except ValueError:
+                return None
+
+
+def _read_snapshot(path: Path) -> Optional[dict]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return data if data.get("version") == _SNAPSHOT_VERSION else None
+
+
+def _covers(indexed: Optional[Iterable[str]], wanted: Optional[Iterable[str]]) -> bool:
+    """Whether an index of the indexed types (None = all) holds every item of the wanted types (None = all)."""
+    return indexed is None or (wanted is not None and set(wanted) <= set(indexed))
@@ -0,0 +1,114 @@
+"""
+core.journal
+------------
+Per-target checkpoint journal of a deployment run.
+
+Each item's publish outcome is appended to a JSON-lines file in the local state directory as soon as it is
+known, after a header naming the commit, workspace and mode of the run. `deploy --resume` reads the journal
+back and skips the items it already published at the same commit, so a failure late in a long deploy only
+costs the items that were left.
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Set
+
+from ..adapters.git_ops import GitOperations
+from ..utils.state import state_dir
+
+if TYPE_CHECKING:
+    from .publisher import PublishOutcome
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIR = "journals"
+_JOURNAL_VERSION = 1
+
+
+def journal_path(git: GitOperations, key: str) -> Path:
+    """Journal of the target whose deployment state is keyed by key (see DeployTarget.state_key)."""
+    return state_dir(git) / JOURNAL_DIR / f"{key}.jsonl"
+
+
+class Journal:
+    """Append-only record of one target's publish outcomes; safe to record from several publish workers."""
+
+    def __init__(self, path: Path, *, commit: str, workspace_id: str, published: Optional[Set[str]] = None):
+        self.path = Path(path)
+        self.commit = commit
+        self.workspace_id = workspace_id
+        # items published successfully at commit, by this run or the run it resumes
+        self.published: Set[str] = set(published or ())
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, path: Path, *, commit: str, workspace_id: str, mode: str, resume: bool = False) -> "Journal":
+        """
+        Open the journal for a run at commit. With resume, an existing journal of the same commit and workspace
+        is continued and its published items are kept; otherwise the journal is started over.
+        """
+        path = Path(path)
+        if resume:
+            previous = read(path)
+            if previous is None:
+                logger.info(f"No checkpoint journal at {path}; nothing to resume")
+            elif previous["commit"] != commit or previous["workspace_id"] != workspace_id:
+                logger.warning(
+                    f"⚠️  Checkpoint journal is for commit {previous['commit'][:12]} in workspace "
+                    f"{previous['workspace_id']}, not {commit[:12]} in {workspace_id}; starting over"
+                )
+            else:
+                journal = cls(path, commit=commit, workspace_id=workspace_id, published=previous["published"])
+                logger.info(
+                    f"♻️  Resuming from checkpoint journal: {len(journal.published)} item(s) already published "
+                    f"at {commit[:12]}"
+                )
+                return journal
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        header = {
+            "version": _JOURNAL_VERSION,
+            "commit": commit,
+            "workspace_id": workspace_id,
+            "mode": mode,
+            "started_at": time.time(),
+        }
+        path.write_text(json.dumps(header) + "\n", encoding="utf-8")
+        return cls(path, commit=commit, workspace_id=workspace_id)
+
+    def record(self, outcome: "PublishOutcome") -> None:
+        line = json.dumps({**asdict(outcome), "at": time.time()})
+        with self._lock:
+            # one write + flush per item, so the journal survives the process being killed mid-deploy
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            if outcome.success:
+                self.published.add(outcome.item_id)
+
+
+def read(path: Path) -> Optional[dict]:
+    """The journal's header fields plus the set of items it records as published, or None if there is none."""
+    try:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+    except FileNotFoundError:
+        return None
+    try:
+        header = json.loads(lines[0])
+    except (IndexError, json.JSONDecodeError):
+        return None
+    if header.get("version") != _JOURNAL_VERSION:
+        return None
+
+    published: Set[str] = set()
+    for line in lines[1:]:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            break  # a write cut short by the process dying; everything before it is intact
+        if entry.get("success"):
+            published.add(entry["item_id"])
+    return {**header, "published": published}
@@ -1,13 +1,49 @@
 import logging
+import mmap
+import os
 import pathlib
 import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Iterable, Optional
 
-logger = logging.getLogger(__name__)
+if TYPE_CHECKING:
+    from .item_index import ItemIndex
 
+logger = logging.getLogger(__name__)
 
-def apply(source_root: pathlib.Path) -> None:
+_PLACEHOLDERS = {
+    "default_lakehouse": "REPLACEME_LAKEHOUSE",
+    "default_lakehouse_name": "REPLACEME_LAKEHOUSE_NAME",
+    "default_lakehouse_workspace_id": "REPLACEME_WORKSPACE_ID",
+    "lakehouse_id": "REPLACEME_LAKEHOUSE",
+}
+
+# All replacements in one alternation, so each file is scanned and rewritten in a single pass
+_PATTERN = (
+    r'"(?P<id_key>default_lakehouse|default_lakehouse_workspace_id|lakehouse_id)":\s*"[0-9a-fA-F-]{36}"'
+    r'|"(?P<name_key>default_lakehouse_name)":\s*"[^"]+"'
+)
+_TEXT_RE = re.compile(_PATTERN)
+_BYTES_RE = re.compile(_PATTERN.encode())
+
+# Files above this size are rewritten from a memory map instead of being read into memory
+_MMAP_THRESHOLD = 10 * 1024 * 1024
+# Below this many files, process start-up costs more than it saves
+_PARALLEL_THRESHOLD = 32
+
+
+def apply(
+    source_root: pathlib.Path,
+    index: Optional["ItemIndex"] = None,
+    items: Optional[Iterable[str]] = None,
+    max_workers: Optional[int] = None,
+) -> None:
     """
     Standardize default lakehouse references in all notebooks under source_root.
+    With an ItemIndex, notebook folders are taken from the index instead of walking the tree,
+    and `items` (item ids) restricts processing to those notebooks.
 
     Replaces IDs, workspace IDs, and names with placeholders:
       - REPLACEME_LAKEHOUSE
@@ -20,57 +56,86 @@ def apply(source_root: pathlib.Path) -> None:
 
     logger.info(f"🔄 Standardizing lakehouse references in: {source_root}")
 
-    patterns, scan_pattern = _get_patterns()
+    if index is not None:
+        wanted = set(items) if items is not None else None
+        notebook_dirs = [
+            item.path for item in index.items(item_types={"Notebook"}) if wanted is None or item.item_id in wanted
+        ]
+    else:
+        notebook_dirs = [d for d in source_root.rglob("*.Notebook") if d.is_dir()]
 
-    for notebook_dir in source_root.rglob("*.Notebook"):
-        if not notebook_dir.is_dir():
-            continue
-        _process_notebook_dir(notebook_dir, patterns, scan_pattern)
+    files = [str(f) for d in notebook_dirs for f in d.glob("*.py")]
 
-    logger.info("✅ Lakehouse standardization completed.")
+    if len(files) < _PARALLEL_THRESHOLD:
+        changed = sum(map(_process_file, files))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            changed = sum(pool.map(_process_file, files, chunksize=max(1, len(files) // ((os.cpu_count() or 1) * 4))))
 
+    logger.info(f"✅ Lakehouse standardization completed ({changed}/{len(files)} file(s) updated).")
 
-def _process_notebook_dir(notebook_dir: pathlib.Path, patterns, scan_pattern) -> None:
-    """Process all .py files in a given notebook directory."""
-    for file_path in notebook_dir.glob("*.py"):
-        try:
-            if file_path.stat().st_size > 10 * 1024 * 1024:
-                logger.warning(f"⚠️  Skipping large file: {file_path}")
-                continue
-            _process_file(file_path, patterns, scan_pattern)
-        except Exception as e:
-            logger.warning(f"⚠️  Could not process {file_path}: {e}")
 
+def standardize_text(text: str) -> str:
+    """Return text with default lakehouse references replaced by placeholders."""
+    return _TEXT_RE.sub(_replace_text, text)
 
-def _process_file(file_path: pathlib.Path, patterns, scan_pattern) -> None:
-    """Standardize a single notebook file if lakehouse references are found."""
-    try:
-        text = file_path.read_text(encoding="utf-8")
-        if not scan_pattern.search(text):
-            return
 
-        new_text = text
-        for pattern, replacement in patterns:
-            new_text = pattern.sub(replacement, new_text)
+def standardize_file(src: pathlib.Path, dest: Optional[pathlib.Path] = None) -> bool:
+    """
+    Standardize one file, writing the result to dest (in place when dest is None).
+    Returns True if the content changed; when it does not, dest is not written.
+    """
+    src = pathlib.Path(src)
+    if src.stat().st_size > _MMAP_THRESHOLD:
+        return _standardize_large_file(src, pathlib.Path(dest) if dest else src)
+
+    text = src.read_text(encoding="utf-8")
+    new_text = _TEXT_RE.sub(_replace_text, text)
+    if new_text == text:
+        return False
+    (pathlib.Path(dest) if dest else src).write_text(new_text, encoding="utf-8")
+    return True
 
-        if new_text != text:
-            file_path.write_text(new_text, encoding="utf-8")
-            logger.debug(f"📝 Standardized: {file_path.name}")
 
+def _process_file(file_path: str) -> bool:
+    """Standardize a single notebook file in place; returns True if it was rewritten."""
+    try:
+        if standardize_file(pathlib.Path(file_path)):
+            logger.debug(f"📝 Standardized: {pathlib.Path(file_path).name}")
+            return True
     except Exception as e:
         logger.warning(f"⚠️  Error processing {file_path}: {e}")
+    return False
 
 
-def _get_patterns():
-    """Precompiled regex patterns for replacing lakehouse references."""
-    patterns = [
-        (re.compile(r'"default_lakehouse":\s*"([0-9a-fA-F-]{36})"'), '"default_lakehouse": "REPLACEME_LAKEHOUSE"'),
-        (re.compile(r'"default_lakehouse_name":\s*"[^"]+"'), '"default_lakehouse_name": "REPLACEME_LAKEHOUSE_NAME"'),
-        (
-            re.compile(r'"default_lakehouse_workspace_id":\s*"([0-9a-fA-F-]{36})"'),
-            '"default_lakehouse_workspace_id": "REPLACEME_WORKSPACE_ID"',
-        ),
-        (re.compile(r'"lakehouse_id":\s*"([0-9a-fA-F-]{36})"'), '"lakehouse_id": "REPLACEME_LAKEHOUSE"'),
-    ]
-    scan_pattern = re.compile(r'"(default_)?lakehouse(_name|_workspace_id|_id)?":\s*"', re.IGNORECASE)
-    return patterns, scan_pattern
+def _standardize_large_file(src: pathlib.Path, dest: pathlib.Path) -> bool:
+    """Stream matches out of a memory-mapped file into a temporary file, then swap it in."""
+    with src.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if _BYTES_RE.search(mm) is None:
+            return False
+
+        fd, tmp = tempfile.mkstemp(dir=dest.parent, prefix=f".{dest.name}.")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                pos = 0
+                for m in _BYTES_RE.finditer(mm):
+                    out.write(mm[pos : m.start()])
+                    out.write(_replace_bytes(m))
+                    pos = m.end()
+                out.write(mm[pos:])
+            shutil.copymode(src, tmp)
+            os.replace(tmp, dest)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return True
+
+
+def _replace_text(m: re.Match) -> str:
+    key = m.group("id_key") or m.group("name_key")
+    return f'"{key}": "{_PLACEHOLDERS[key]}"'
+
+
+def _replace_bytes(m: re.Match) -> bytes:
+    key = (m.group("id_key") or m.group("name_key")).decode()
+    return f'"{key}": "{_PLACEHOLDERS[key]}"'.encode()
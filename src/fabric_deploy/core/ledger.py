@@ -0,0 +1,133 @@
+"""
+core.ledger
+-----------
+Per-item deployment ledger of an environment.
+
+For every item the ledger records the git tree of its folder as last deployed successfully, the commit it was
+deployed from and when. Incremental deploys publish exactly the items whose folder tree differs from their own
+ledger entry, and unpublish the items the ledger knows but the repository no longer has; a partially failed
+deploy records the items it did publish, so the next run neither repeats them nor skips the ones that failed.
+
+The ledger is a JSON blob under refs/fabric-deploy/ledgers/<env>. Every update is a compare-and-swap of that
+ref, re-read and retried on conflict, and merges per item (latest deployment wins), so concurrent pipelines
+cannot clobber each other's entries; `merge` applies the same rule to a ledger fetched from a remote.
+"""
+
+import json
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+
+from ..adapters.git_ops import GitOperations
+from .item_index import ItemIndex
+
+logger = logging.getLogger(__name__)
+
+LEDGER_REF_PREFIX = "refs/fabric-deploy/ledgers"
+_LEDGER_VERSION = 1
+_CAS_ATTEMPTS = 5
+
+
+def ledger_ref(environment: str) -> str:
+    return f"{LEDGER_REF_PREFIX}/{environment}"
+
+
+def load(git: GitOperations, environment: str) -> Optional[Dict[str, dict]]:
+    """Return the {item_id: entry} ledger for environment, or None if there is none."""
+    oid = git.ref_oid(ledger_ref(environment))
+    return _read(git, oid) if oid else None
+
+
+def deployed(entries: Dict[str, dict]) -> Dict[str, dict]:
+    """The entries of items currently deployed (removed items are kept as tombstones for merging)."""
+    return {item_id: e for item_id, e in entries.items() if not e.get("removed")}
+
+
+def item_trees(git: GitOperations, index: ItemIndex, revision: str = "HEAD") -> Dict[str, Optional[str]]:
+    """
+    Tree id of every indexed item folder at revision (None for items not committed there). Like incremental
+    deploys by tag, this looks at committed content only; in-place lakehouse standardization is not a change.
+    """
+    repo_root = git.repo_root()
+    trees = git.tree_ids(index.source_root.relative_to(repo_root).as_posix(), revision)
+    return {item.item_id: trees.get(item.path.relative_to(repo_root).as_posix()) for item in index.items()}
+
+
+def changed_items(trees: Dict[str, Optional[str]], entries: Dict[str, dict]) -> List[str]:
+    """Items that are new, were removed, or whose folder tree differs from their last deployed one."""
+    return sorted(
+        item_id
+        for item_id, tree in trees.items()
+        if tree is None or entries.get(item_id, {}).get("tree") != tree  # tombstones have no tree
+    )
+
+
+def deleted_items(entries: Dict[str, dict], current_ids: Iterable[str]) -> List[str]:
+    """Items the ledger records as deployed that are no longer in the repository."""
+    return sorted(set(deployed(entries)) - set(current_ids))
+
+
+def record(
+    git: GitOperations,
+    environment: str,
+    *,
+    commit: str,
+    published: Dict[str, Optional[str]],
+    removed: Iterable[str] = (),
+    baseline: Optional[Dict[str, Optional[str]]] = None,
+) -> None:
+    """
+    Record published ({item_id: tree}) and removed items in the ledger. baseline ({item_id: tree}) seeds a
+    ledger that does not exist yet, e.g. from the trees at the previous deployment tag.
+    """
+    now = time.time()
+    update = {item_id: {"commit": commit, "tree": tree, "at": now} for item_id, tree in published.items()}
+    tombstones = {item_id: {"removed": True, "at": now} for item_id in removed}
+    update.update(tombstones)
+    seed = {item_id: {"commit": None, "tree": tree, "at": 0} for item_id, tree in (baseline or {}).items()}
+    _update(git, environment, lambda current: _merge(seed if current is None else current, update))
+    logger.info(f"Ledger for {environment} updated ({len(published)} published, {len(tombstones)} removed)")
+
+
+def merge(git: GitOperations, environment: str, other_oid: str) -> None:
+    """Merge another copy of the ledger (a blob id, e.g. the remote ledger after a rejected push) into ours."""
+    other = _read(git, other_oid) or {}
+    _update(git, environment, lambda current: _merge(current or {}, other))
+
+
+def _merge(ours: Dict[str, dict], theirs: Dict[str, dict]) -> Dict[str, dict]:
+    """Per item, the most recent of both entries."""
+    merged = dict(ours)
+    for item_id, entry in theirs.items():
+        if item_id not in merged or entry.get("at", 0) >= merged[item_id].get("at", 0):
+            merged[item_id] = entry
+    return merged
+
+
+def _update(git: GitOperations, environment: str, apply) -> None:
+    """Compare-and-swap the ledger ref to apply(current entries or None), retrying when it moved meanwhile."""
+    ref = ledger_ref(environment)
+    for _ in range(_CAS_ATTEMPTS):
+        old = git.ref_oid(ref)
+        entries = apply(_read(git, old) if old else None)
+        data = {"version": _LEDGER_VERSION, "items": dict(sorted(entries.items()))}
+        new = git.write_blob(json.dumps(data, indent=1).encode("utf-8"))
+        try:
+            git.update_ref(ref, new, old or "")
+            return
+        except RuntimeError:
+            if git.ref_oid(ref) == old:
+                raise  # not a lost race
+            logger.info(f"Ledger for {environment} was updated concurrently; merging and retrying")
+    raise RuntimeError(f"Ledger for {environment} kept changing; gave up after {_CAS_ATTEMPTS} attempts")
+
+
+def _read(git: GitOperations, oid: str) -> Optional[Dict[str, dict]]:
+    raw = git.read_object(oid)
+    if raw is None:
+        return None
+    data = json.loads(raw)
+    if data.get("version") != _LEDGER_VERSION:
+        logger.warning(f"⚠️  Ignoring ledger with unsupported version {data.get('version')}")
+        return None
+    return data["items"]
@@ -0,0 +1,116 @@
+"""
+core.manifest
+-------------
+Per-environment manifest of normalized item content hashes.
+
+Hashes ignore cosmetic differences (line endings, trailing whitespace, lakehouse references
+rewritten by core.lakehouse), so only items whose deployable content really changed are published.
+The manifest is stored in the repository as a blob under refs/fabric-deploy/manifests/<env>,
+next to the latestDeployed/<env> tag, and can be pushed and fetched the same way.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from ..adapters.git_ops import GitOperations
+from .fabric_items import FabricItem
+from .lakehouse import standardize_text
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_REF_PREFIX = "refs/fabric-deploy/manifests"
+_MANIFEST_VERSION = 1
+
+_CHUNK = 1024 * 1024
+_SNIFF = 8 * 1024
+_TRAILING_WS_RE = re.compile(rb"[ \t]+(?=\r?\n)|\r(?=\n)")
+# below this many items, process start-up costs more than hashing serially
+_PARALLEL_THRESHOLD = 64
+
+
+def manifest_ref(environment: str) -> str:
+    return f"{MANIFEST_REF_PREFIX}/{environment}"
+
+
+def load(git: GitOperations, environment: str) -> Optional[Dict[str, str]]:
+    """Return the stored {item_id: hash} manifest for environment, or None if there is none."""
+    raw = git.read_object(manifest_ref(environment))
+    if raw is None:
+        return None
+    data = json.loads(raw)
+    if data.get("version") != _MANIFEST_VERSION:
+        logger.warning(f"⚠️  Ignoring manifest with unsupported version {data.get('version')} for {environment}")
+        return None
+    return data["items"]
+
+
+def save(git: GitOperations, environment: str, hashes: Dict[str, str], commit: str) -> None:
+    data = {"version": _MANIFEST_VERSION, "commit": commit, "items": dict(sorted(hashes.items()))}
+    oid = git.write_blob(json.dumps(data, indent=1).encode("utf-8"))
+    git.update_ref(manifest_ref(environment), oid)
+    logger.info(f"Manifest for {environment} updated ({len(hashes)} item(s))")
+
+
+def compute(items: Iterable[FabricItem], max_workers: Optional[int] = None) -> Dict[str, str]:
+    """Hash every item, in parallel processes for larger repositories."""
+    items = list(items)
+    paths = [str(i.path) for i in items]
+
+    if len(items) < _PARALLEL_THRESHOLD:
+        digests = map(hash_item_dir, paths)
+        return {i.item_id: d for i, d in zip(items, digests)}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        digests = pool.map(hash_item_dir, paths, chunksize=max(1, len(paths) // ((os.cpu_count() or 1) * 4)))
+        return {i.item_id: d for i, d in zip(items, digests)}
+
+
+def changed_items(current: Dict[str, str], manifest: Dict[str, str]) -> list[str]:
+    """Items that are new or whose hash differs from the manifest."""
+    return sorted(item_id for item_id, digest in current.items() if manifest.get(item_id) != digest)
+
+
+def hash_item_dir(item_dir: str) -> str:
+    """Normalized content hash of an item folder: relative file paths plus normalized file contents."""
+    root = Path(item_dir)
+    h = hashlib.sha256()
+    for file_path in sorted(p for p in root.rglob("*") if p.is_file()):
+        h.update(file_path.relative_to(root).as_posix().encode("utf-8"))
+        h.update(b"\0")
+        _hash_file(file_path, h)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _hash_file(file_path: Path, h) -> None:
+    """Stream a file into h; text files are normalized chunk by chunk, split on line boundaries."""
+    with file_path.open("rb") as f:
+        head = f.read(_SNIFF)
+        if b"\0" in head:
+            h.update(head)
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                h.update(chunk)
+            return
+
+        pending = head
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            pending += chunk
+            cut = pending.rfind(b"\n") + 1
+            if cut:
+                h.update(_normalize(pending[:cut]))
+                pending = pending[cut:]
+        if pending:
+            h.update(_normalize(pending if pending.endswith(b"\n") else pending + b"\n"))
+
+
+def _normalize(block: bytes) -> bytes:
+    """Normalize a block of complete lines: LF endings, no trailing whitespace, lakehouse placeholders."""
+    block = _TRAILING_WS_RE.sub(b"", block)
+    text = block.decode("utf-8", errors="surrogateescape")
+    return standardize_text(text).encode("utf-8", errors="surrogateescape")
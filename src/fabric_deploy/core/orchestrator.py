@@ -0,0 +1,583 @@
+"""
+core.orchestrator
+-----------------
+Deployment of one commit to one or more targets (workspace + environment).
+
+`run` resolves every target's scope (or takes it from a plan), standardizes lakehouse references once for all
+targets, then publishes and unpublishes per target, concurrently across targets, each with its own Publisher and
+journal. A failing target does not stop the others; its failure is one of its results. The run is then recorded
+from the calling thread: ledger, deployment tag, manifest, publish durations and history. The settings shared by all
+targets are a DeployOptions; `fabric-deploy deploy` only parses and checks its arguments into one.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
+
+from ..adapters.fabric_workspace import create_fabric_workspace_object, published_items
+from ..adapters.git_ops import GitOperations
+from ..models.config import DeployMode, DeployTarget
+from ..utils import tracing
+from . import definitions as definitions_core
+from . import deploy as deploy_core
+from . import dependencies
+from . import history as history_core
+from . import inventory as inventory_core
+from . import lakehouse as lakehouse_core
+from . import ledger, manifest
+from . import plan as plan_core
+from . import render_cache as render_cache_core
+from . import scope as scope_core
+from . import shard as shard_core
+from . import staging
+from .deploy import DeploymentResult
+from .item_index import ItemIndex
+from .journal import Journal, journal_path
+from .publisher import DEFAULT_MAX_RETRIES, DEFAULT_MAX_WORKERS, DEFAULT_REQUESTS_PER_SECOND, Publisher
+
+if TYPE_CHECKING:
+    from fabric_cicd import FabricWorkspace
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DeployOptions:
+    """Settings of a deploy run, shared by all its targets (see `fabric-deploy deploy --help`)."""
+
+    dry_run: bool = False
+    # False: only unpublish orphans and record the state, for what the shards of options.plan published
+    publish: bool = True
+    unpublish_orphan_items: bool = True
+    orphan_sweep: bool = False
+    include_dependents: bool = True
+    standardize_default_lakehouse: bool = True
+    overlay: bool = False
+    stage_directory: Optional[Path] = None
+    update_tag: bool = True
+    # (i, N): publish only the i-th of N shards of every target's deployment
+    shard: Optional[Tuple[int, int]] = None
+    resume: bool = False
+    skip_unchanged: bool = False
+    definition_cache_max_age: float = definitions_core.DEFAULT_MAX_AGE
+    render_cache: bool = True
+    max_workers: int = DEFAULT_MAX_WORKERS
+    max_retries: int = DEFAULT_MAX_RETRIES
+    requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND
+    parallel_targets: int = 4
+    # the plan to execute instead of resolving the scope (one target, already checked against it)
+    plan: Optional[plan_core.DeploymentPlan] = None
+    # prefix every message about a target with its name
+    label_targets: bool = False
+    # progress messages for the user
+    echo: Callable[[str], None] = print
+
+
+@dataclass
+class TargetRun:
+    """A target's resolved deployment: workspace client, pre-publish snapshot, scope and results."""
+
+    target: DeployTarget
+    label: str
+    workspace: "FabricWorkspace"
+    inventory_path: Path
+    snapshot: Optional[inventory_core.WorkspaceInventory]
+    plan: Optional[plan_core.DeploymentPlan]
+    mode: str
+    changed_items: Optional[List[str]]
+    batches: Optional[List[List[str]]]
+    deleted_files: List[str]
+    to_unpublish: Optional[List[str]]  # item ids to unpublish directly; None = sweep the workspace for orphans
+    item_hashes: Optional[Dict[str, str]]
+    shard: Optional[Tuple[int, int]] = None  # (i, N): changed_items holds only this shard's items
+    results: List[DeploymentResult] = field(default_factory=list)
+    throttled: int = 0  # 429 responses received while publishing
+    absent: Set[str] = field(default_factory=set)  # of to_unpublish, items the workspace listing no longer has
+
+    @property
+    def success(self) -> bool:
+        return all(r.success for r in self.results)
+
+
+def run(
+    targets: List[DeployTarget], options: DeployOptions, *, git: GitOperations, index: ItemIndex, credential
+) -> List[TargetRun]:
+    """
+    Deploy HEAD to targets: the items of index, with credential shared by every workspace client.
+    Returns a run per target; its results are the publish result, then the unpublish result if enabled.
+    Raises ValueError if a target's deployment scope cannot be resolved.
+
+      1) Repository-derived inputs shared by all targets (item folder trees, reference graph, content hashes)
+      2) Per target: a workspace client and the deployment scope (full, incremental via the per-item ledger, hash
+         via content manifest, or verbatim from the plan), narrowed to a shard if given
+         - changed scope is expanded to dependent items and ordered into waves
+         - for an orphan sweep, the deployed items are listed once as an immutable pre-publish snapshot
+      3) Lakehouse standardization of the items being deployed, once for all targets, in place or into a staged
+         overlay tree that the workspace clients are pointed at
+      4) Per target, concurrently: publishing in dependency order, then orphan unpublishing
+         - every item outcome is checkpointed in the target's journal; resume skips the items already published at
+           HEAD by the previous run
+         - with skip_unchanged, items whose deployed definition matches the rendered repository item are skipped
+         - item files are rendered for the environment through the content-addressed render cache
+         - incremental/hash: unpublishes the items deleted since the baseline; full or orphan_sweep: every deployed
+           item missing from the repository
+      5) Per target: published and unpublished items in the ledger (compare-and-swap), the tag (only if publishing
+         succeeded) and, in hash mode, the content manifest; then the publish durations and the run history
+    """
+    src_dir = index.source_root
+
+    # item folder trees are taken before lakehouse standardization can touch the work tree
+    graph = item_hashes = item_trees = None
+    if options.update_tag or any(t.deploy_mode is DeployMode.INCREMENTAL for t in targets):
+        with tracing.span("deploy.item_trees"):
+            item_trees = ledger.item_trees(git, index)
+    # the reference graph orders publishing and keeps items referencing a failed item from being published
+    if len(targets) > 1 or options.publish:
+        with tracing.span("deploy.shared_inputs"):
+            graph = dependencies.build_graph(index.items())
+            if len(targets) > 1 and any(t.deploy_mode is DeployMode.HASH for t in targets):
+                item_hashes = manifest.compute(index.items())
+
+    runs = []
+    for target in targets:
+        with tracing.span("deploy.prepare", **_target_attributes(target)):
+            runs.append(
+                prepare_target(
+                    target,
+                    options,
+                    git=git,
+                    index=index,
+                    credential=credential,
+                    graph=graph,
+                    item_hashes=item_hashes,
+                    item_trees=item_trees,
+                )
+            )
+
+    if options.standardize_default_lakehouse and options.publish:
+        items_in_scope: Optional[Set[str]] = set()
+        for target_run in runs:
+            if target_run.changed_items is None:
+                items_in_scope = None
+                break
+            items_in_scope.update(target_run.changed_items or ())
+        if options.overlay:
+            with tracing.span("deploy.stage"):
+                stage_root = staging.stage(
+                    source_root=src_dir,
+                    stage_root=options.stage_directory or staging.default_stage_dir(git),
+                    index=index,
+                    git=git,
+                    items=items_in_scope,
+                )
+            # publish from the staged tree; the work tree stays untouched
+            for target_run in runs:
+                target_run.workspace.repository_directory = stage_root
+        else:
+            with tracing.span("deploy.lakehouse"):
+                lakehouse_core.apply(source_root=src_dir, index=index, items=items_in_scope)
+
+    root = tracing.current_span()
+    head = git.head_commit()
+
+    def execute(target_run: TargetRun) -> None:
+        try:
+            journal = definitions = rendered = None
+            if not options.dry_run and options.render_cache:
+                rendered = render_cache_core.RenderCache(render_cache_core.cache_dir(git))
+            if not options.dry_run and options.skip_unchanged:
+                definitions = definitions_core.DeployedDefinitions(
+                    definitions_core.cache_path(git, target_run.target.workspace_id),
+                    max_age=options.definition_cache_max_age,
+                )
+            if not options.dry_run:
+                journal = Journal.start(
+                    journal_path(git, target_run.target.state_key),
+                    commit=head,
+                    workspace_id=target_run.target.workspace_id,
+                    mode=target_run.mode,
+                    resume=options.resume,
+                )
+            publisher = Publisher(
+                target_run.workspace,
+                max_workers=options.max_workers,
+                max_retries=options.max_retries,
+                requests_per_second=options.requests_per_second,
+                journal=journal,
+                definitions=definitions,
+                render_cache=rendered,
+            )
+            with tracing.span("deploy.target", parent=root, **_target_attributes(target_run.target)):
+                execute_target(target_run, options, git=git, index=index, publisher=publisher, graph=graph)
+            target_run.throttled = publisher.bucket.throttled_count
+        except Exception as exc:
+            # one failing workspace must not take the other targets down
+            logger.exception(f"{target_run.label}Deployment failed.")
+            target_run.results.append(DeploymentResult(False, 0, target_run.mode, f"Deployment failed: {exc}"))
+
+    if len(runs) == 1:
+        execute(runs[0])
+    else:
+        with ThreadPoolExecutor(max_workers=options.parallel_targets, thread_name_prefix="target") as pool:
+            list(pool.map(execute, runs))
+
+    # tags, manifests, publish durations and the run history are repository state; update them from this thread
+    for target_run in runs:
+        if options.update_tag:
+            with tracing.span("deploy.tag", **_target_attributes(target_run.target)):
+                update_state(target_run, options, git=git, index=index, item_trees=item_trees, commit=head)
+    if not options.dry_run:
+        # estimates are taken before this run's durations are folded in
+        record = _history_record(runs, git=git, index=index, root=root, commit=head)
+        for target_run in runs:
+            for res in target_run.results:
+                plan_core.record_durations(git, res.item_seconds)
+        history_core.append(history_core.history_path(git), record)
+    return runs
+
+
+def _target_attributes(target: DeployTarget) -> dict:
+    return {"deploy.target": target.name, "fabric.workspace_id": target.workspace_id}
+
+
+def prepare_target(
+    target: DeployTarget,
+    options: DeployOptions,
+    *,
+    git: GitOperations,
+    index: ItemIndex,
+    credential,
+    graph: Optional[dependencies.ReferenceGraph],
+    item_hashes: Optional[Dict[str, str]],
+    item_trees: Optional[Dict[str, Optional[str]]],
+) -> TargetRun:
+    """Workspace client, deployment scope and inventory snapshot of one target."""
+    src_dir, echo, shard = index.source_root, options.echo, options.shard
+    label = f"[{target.name}] " if options.label_targets else ""
+    workspace = create_fabric_workspace_object(
+        workspace_id=target.workspace_id,
+        environment=target.environment,
+        repo_directory=str(src_dir),
+        item_type_in_scope=target.item_types,
+        token_credential=credential,
+    )
+
+    plan = options.plan
+    if plan is not None:
+        mode = plan.mode
+        changed_items = plan.to_publish if plan.mode != "full" else None
+        batches, deleted_files, hashes = plan.batches, plan.deleted_files, plan.item_hashes
+        to_unpublish = plan.to_unpublish
+    else:
+        with tracing.span("deploy.scope", **{"deploy.mode": target.deploy_mode.value}):
+            scope = scope_core.resolve(
+                source_root=src_dir,
+                environment=target.state_key,
+                mode=target.deploy_mode.value,
+                git=git,
+                index=index,
+                include_dependents=options.include_dependents,
+                graph=graph,
+                item_hashes=item_hashes,
+                item_trees=item_trees,
+            )
+        if scope.mode != target.deploy_mode.value:
+            echo(
+                f"{label}No {target.deploy_mode.value} baseline for {target.state_key} → performing initial FULL deployment."
+            )
+        if scope.batches:
+            echo(f"{label}Dependency closure: {len(scope.items)} affected item(s) in {len(scope.batches)} batch(es)")
+        mode, changed_items, batches = scope.mode, scope.items, scope.batches
+        deleted_files, hashes = scope.deleted_files, scope.item_hashes
+        # incremental/hash deploys unpublish the items deleted since the baseline; full deploys sweep the workspace
+        to_unpublish = None if options.orphan_sweep else scope.deleted_items
+
+    if shard is not None:
+        # the whole deployment is split the same way in every shard; a plan carries the costs it was split by
+        items = changed_items if changed_items is not None else index.item_ids()
+        graph = graph or dependencies.build_graph(index.items())
+        if plan is not None:
+            costs = {i.item_id: i.estimated_seconds for i in plan.items}
+        else:
+            # type and size based only: recorded durations are local state that other shard jobs do not share
+            costs = plan_core.estimate_costs(index.items(), {})
+        changed_items = shard_core.select(items, graph, costs, shard)
+        batches = dependencies.publish_batches(graph, graph.waves(changed_items))
+        echo(f"{label}Shard {shard[0]}/{shard[1]}: {len(changed_items)} of {len(items)} item(s)")
+
+    # Orphan detection runs against this pre-publish snapshot, so publish-time changes cannot affect it;
+    # the snapshot is never mutated, publish and unpublish results produce updated copies. Items are only ever
+    # deleted by what this run listed: a sweep lists the whole workspace, deleted items are looked up by type.
+    # Cached listings are for (read-only) plans; the updated snapshot is saved for them.
+    inventory_path = inventory_core.default_inventory_path(git, target.workspace_id)
+    snapshot = None
+    if options.unpublish_orphan_items and to_unpublish is None:
+        with tracing.span("deploy.inventory"):
+            snapshot = inventory_core.WorkspaceInventory.fetch(workspace)
+            snapshot.save(inventory_path)
+
+    return TargetRun(
+        target=target,
+        label=label,
+        workspace=workspace,
+        inventory_path=inventory_path,
+        snapshot=snapshot,
+        plan=plan,
+        mode=mode,
+        changed_items=changed_items,
+        batches=batches,
+        deleted_files=deleted_files,
+        to_unpublish=to_unpublish,
+        item_hashes=hashes,
+        shard=shard,
+    )
+
+
+def execute_target(
+    run: TargetRun,
+    options: DeployOptions,
+    *,
+    git: GitOperations,
+    index: ItemIndex,
+    publisher: Publisher,
+    graph: Optional[dependencies.ReferenceGraph],
+) -> None:
+    """Publishing and orphan unpublishing of one target; results are collected on run. Safe to run concurrently
+    for distinct targets."""
+    label, workspace, target, dry_run = run.label, run.workspace, run.target, options.dry_run
+
+    if not options.publish:
+        result = _check_published(run, git=git, dry_run=dry_run)
+    elif run.mode in ("incremental", "hash") or run.shard is not None:
+        changed_count = len(run.changed_items or [])
+        if changed_count == 0:
+            if run.shard is not None:
+                msg = f"ℹ️ No items in shard {run.shard[0]}/{run.shard[1]} of {run.mode} deploy."
+            elif run.deleted_files:
+                msg = (
+                    f"ℹ️ Only deleted files detected for {run.mode} deploy. "
+                    f"Number of deleted files: {len(run.deleted_files)}"
+                )
+            else:
+                msg = f"ℹ️ No changed items detected for {run.mode} deploy."
+            result = DeploymentResult(True, 0, run.mode, msg)
+        else:
+            options.echo(
+                f"{label}Running shard {run.shard[0]}/{run.shard[1]} of {run.mode} deploy. Number of items: {changed_count}"
+                if run.shard is not None
+                else f"{label}Running {run.mode} deploy. Number of items changed: {changed_count}"
+            )
+            with tracing.span("deploy.publish", **{"deploy.items": changed_count}):
+                result = deploy_core.run_incremental(
+                    workspace=workspace,
+                    changed_items=run.changed_items,
+                    dry_run=dry_run,
+                    batches=run.batches,
+                    graph=graph or dependencies.build_graph(index.items()),
+                    publisher=publisher,
+                    mode=run.mode,
+                )
+    else:
+        options.echo(f"{label}Running full deploy")
+        with tracing.span("deploy.publish"):
+            result = deploy_core.run_full(
+                workspace=workspace,
+                dry_run=dry_run,
+                graph=graph or dependencies.build_graph(index.items()),
+                publisher=publisher,
+            )
+    run.results.append(result)
+
+    current_inventory = run.snapshot
+    if not dry_run and current_inventory is not None:
+        published = (
+            list(result.item_seconds)
+            if run.mode != "full" or run.shard is not None or not options.publish
+            else (index.item_ids() if result.success else [])
+        )
+        current_inventory = current_inventory.updated(
+            published=map(inventory_core.DeployedItem.from_api, published_items(workspace, published))
+        )
+
+    if options.unpublish_orphan_items:
+        types = deploy_core.unpublishable_types(target.item_types)
+        with tracing.span("deploy.orphans", **{"deploy.sweep": run.to_unpublish is None}):
+            if run.to_unpublish is None:
+                orphans = inventory_core.find_orphans(run.snapshot, index.item_ids(), types)
+            else:
+                orphans = inventory_core.lookup(workspace, run.to_unpublish, types) if run.to_unpublish else []
+                # listed by type: the ones of a listed type that were not found are already gone
+                found = {item.item_id for item in orphans}
+                run.absent = {i for i in run.to_unpublish if i.rpartition(".")[2] in types and i not in found}
+        with tracing.span("deploy.unpublish", **{"deploy.items": len(orphans)}):
+            unpublish_result = deploy_core.run_unpublish_orphans(
+                workspace=workspace,
+                inventory=current_inventory,
+                orphans=orphans,
+                dry_run=dry_run,
+            )
+        run.results.append(unpublish_result)
+        if current_inventory is not None:
+            current_inventory = current_inventory.updated(removed=unpublish_result.removed_items)
+
+    if current_inventory is not None and not dry_run:
+        current_inventory.save(run.inventory_path)
+
+
+def _check_published(run: TargetRun, *, git: GitOperations, dry_run: bool) -> DeploymentResult:
+    """
+    Without publishing: succeed only if the ledger records every item of the plan as deployed at the plan's commit,
+    so the tag and manifest never claim items that a failed shard did not publish.
+    """
+    planned = run.plan.to_publish
+    if dry_run:
+        return DeploymentResult(
+            True, 0, run.mode, f"⏭️ Publishing skipped (--no-publish); would check {len(planned)} planned item(s)."
+        )
+    entries = ledger.load(git, run.target.state_key) or {}
+    missing = [i for i in planned if entries.get(i, {}).get("commit") != run.plan.commit]
+    if missing:
+        return DeploymentResult(
+            False,
+            0,
+            run.mode,
+            f"❌ Publishing skipped (--no-publish), but {len(missing)} of {len(planned)} planned item(s) are not "
+            f"recorded as deployed at {run.plan.commit[:12]}: {missing[:10]}",
+        )
+    return DeploymentResult(
+        True, 0, run.mode, f"⏭️ Publishing skipped (--no-publish); all {len(planned)} planned item(s) are deployed."
+    )
+
+
+def _history_record(
+    runs: List[TargetRun],
+    *,
+    git: GitOperations,
+    index: ItemIndex,
+    root: Optional[tracing.Span],
+    commit: str,
+) -> history_core.RunRecord:
+    """The history record of this run: phase timings and, per target, what its items took against their estimates."""
+    items = {item.item_id: item for item in index.items()}
+    durations = plan_core.load_durations(git)
+    targets = []
+    for run in runs:
+        result = run.results[0]
+        planned = {i.item_id: i.estimated_seconds for i in run.plan.items} if run.plan is not None else {}
+        published = {}
+        for item_id, seconds in result.item_seconds.items():
+            item = items.get(item_id)
+            size = plan_core.definition_size(item.path) if item is not None else 0
+            estimate = planned.get(item_id)
+            if estimate is None and item is not None:
+                estimate = plan_core.estimate_seconds(item_id, item.item_type, size, durations)
+            published[item_id] = history_core.ItemRun(
+                seconds=round(seconds, 3),
+                attempts=result.item_attempts.get(item_id, 1),
+                operation_seconds=round(result.operation_seconds.get(item_id, 0.0), 3),
+                bytes=size,
+                estimated_seconds=estimate,
+            )
+        targets.append(
+            history_core.TargetRun(
+                workspace_id=run.target.workspace_id,
+                environment=run.target.environment,
+                mode=run.mode,
+                success=run.success,
+                shard=f"{run.shard[0]}/{run.shard[1]}" if run.shard is not None else None,
+                items=published,
+                failed=list(result.failed_items),
+                unchanged=len(result.unchanged_items),
+                removed=sum(len(r.removed_items) for r in run.results[1:]),
+                throttled=run.throttled,
+            )
+        )
+
+    phases: Dict[str, float] = {}
+    for name, _, total, _ in tracing.get_tracer().summary():
+        if name.startswith("deploy."):
+            phases[name] = round(total, 3)
+    return history_core.RunRecord(
+        started_at=root.start_time_unix_nano / 1e9 if root is not None else time.time(),
+        seconds=round(root.seconds, 3) if root is not None else 0.0,
+        commit=commit,
+        success=all(t.success for t in targets),
+        phases=phases,
+        targets=targets,
+    )
+
+
+def update_state(
+    run: TargetRun,
+    options: DeployOptions,
+    *,
+    git: GitOperations,
+    index: ItemIndex,
+    item_trees: Dict[str, Optional[str]],
+    commit: str,
+) -> None:
+    """
+    Record the items one target published and unpublished in its ledger, then move its deployment tag (and
+    manifest) to commit if publishing succeeded.
+    """
+    label, target, echo, dry_run = run.label, run.target, options.echo, options.dry_run
+    result = run.results[0]
+    # only what the orphan step deleted or saw missing from the workspace is tombstoned; items it left deployed
+    # (unpublishing off, failed, or of a type that is not unpublished) stay in the ledger for a later run
+    unpublished = run.results[1] if len(run.results) > 1 and run.results[1].success else None
+    removed = set(unpublished.removed_items) | run.absent if unpublished else set()
+
+    # only what was actually published is recorded, so a partial failure keeps the rest in the next scope
+    try:
+        if dry_run:
+            echo(f"{label}[Dry run]: 🔄 would record deployed items in the deployment ledger")
+        else:
+            entries, baseline = ledger.load(git, target.state_key), None
+            tag = git.get_deployment_tag(target.state_key)
+            if entries is None and git.tag_exists(tag):
+                # first ledger for a target deployed by tag: unchanged items keep their revision at the tag
+                baseline = ledger.item_trees(git, index, revision=tag)
+            if entries is not None and unpublished and run.snapshot is not None:
+                # the sweep listed the whole workspace: deleted items it does not hold are gone
+                removed.update(i for i in ledger.deleted_items(entries, item_trees) if i not in run.snapshot.items)
+            ledger.record(
+                git,
+                target.state_key,
+                commit=commit,
+                published={
+                    item_id: item_trees.get(item_id) for item_id in [*result.item_seconds, *result.unchanged_items]
+                },
+                removed=removed,
+                baseline=baseline,
+            )
+    except RuntimeError as e:
+        logger.warning(f"{label}⚠️  Failed to update deployment ledger: {e}")
+
+    if not result.success:
+        echo(f"{label}Deployment tag not moved: publishing did not complete")
+        return
+    if run.shard is not None:
+        echo(
+            f"{label}Deployment tag not moved by shard {run.shard[0]}/{run.shard[1]}; the final --no-publish run moves it"
+        )
+        return
+    try:
+        if dry_run:
+            echo(f"{label}[Dry run]: 🔄 would update deployment tag at HEAD")
+        else:
+            git.create_or_update_tag(git.get_deployment_tag(target.state_key), ref=commit)
+    except RuntimeError as e:
+        logger.warning(f"{label}⚠️  Failed to update deployment tag: {e}")
+
+    # the manifest only records what was actually published
+    if run.item_hashes is not None:
+        try:
+            if dry_run:
+                echo(f"{label}[Dry run]: 🔄 would update deployment manifest")
+            else:
+                manifest.save(git, target.state_key, run.item_hashes, commit=commit)
+        except RuntimeError as e:
+            logger.warning(f"{label}⚠️  Failed to update deployment manifest: {e}")
@@ -0,0 +1,281 @@
+"""
+core.plan
+---------
+Deployment plans: which items a deploy creates, updates, skips and unpublishes, with cost estimates.
+
+A plan is resolved once (`fabric-deploy plan`), written as JSON, and executed by `deploy --plan`
+without rescanning the repository or listing the workspace again. A plan is bound to the commit,
+workspace and environment it was made for.
+"""
+
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from ..adapters.git_ops import GitOperations
+from ..utils.state import state_dir
+from .fabric_items import PUBLISH_ORDER, UNPUBLISH_ORDER, FabricItem
+from .inventory import WorkspaceInventory, find_orphans, select
+from .item_index import ItemIndex
+from .scope import DeployScope
+
+logger = logging.getLogger(__name__)
+
+PLAN_VERSION = 1
+DURATIONS_FILE = "publish-durations.json"
+
+# Fallback publish cost per item type when there is no history: fixed overhead (seconds)
+# plus definition upload at _BYTES_PER_SECOND. Environments publish their libraries, hence the outlier.
+_BASE_SECONDS: Dict[str, float] = {
+    "Environment": 300.0,
+    "SemanticModel": 30.0,
+    "Warehouse": 30.0,
+    "SQLDatabase": 30.0,
+    "Eventhouse": 30.0,
+    "KQLDatabase": 20.0,
+    "Lakehouse": 15.0,
+}
+_DEFAULT_BASE_SECONDS = 5.0
+_BYTES_PER_SECOND = 1024 * 1024
+_UNPUBLISH_SECONDS = 2.0
+# weight of the latest observation in the moving average of publish durations
+_DURATION_SMOOTHING = 0.3
+
+
+class PlanAction(Enum):
+    CREATE = "create"
+    UPDATE = "update"
+    SKIP = "skip"
+    UNPUBLISH = "unpublish"
+
+
+@dataclass
+class PlannedItem:
+    item_id: str
+    item_type: str
+    action: PlanAction
+    path: Optional[str] = None  # relative to the source directory; None for items that only exist in the workspace
+    size_bytes: int = 0
+    estimated_seconds: float = 0.0
+    content_hash: Optional[str] = None
+
+
+@dataclass
+class DeploymentPlan:
+    workspace_id: str
+    environment: str
+    commit: str
+    mode: str
+    source_directory: str  # relative to the repository root
+    created_at: float
+    items: List[PlannedItem] = field(default_factory=list)
+    batches: Optional[List[List[str]]] = None
+    deleted_files: List[str] = field(default_factory=list)
+    item_types: Optional[List[str]] = None  # None = all types
+
+    def ids(self, *actions: PlanAction) -> List[str]:
+        return [i.item_id for i in self.items if i.action in actions]
+
+    @property
+    def to_publish(self) -> List[str]:
+        return self.ids(PlanAction.CREATE, PlanAction.UPDATE)
+
+    @property
+    def to_unpublish(self) -> List[str]:
+        return self.ids(PlanAction.UNPUBLISH)
+
+    @property
+    def item_hashes(self) -> Optional[Dict[str, str]]:
+        """Content hashes of every repository item (hash mode only), for updating the manifest after execution."""
+        hashes = {i.item_id: i.content_hash for i in self.items if i.content_hash}
+        return hashes or None
+
+    def estimated_seconds(self) -> float:
+        return sum(i.estimated_seconds for i in self.items if i.action is not PlanAction.SKIP)
+
+    def counts(self) -> Dict[str, int]:
+        counts = {a.value: 0 for a in PlanAction}
+        for item in self.items:
+            counts[item.action.value] += 1
+        return counts
+
+    def check(
+        self,
+        *,
+        workspace_id: str,
+        environment: str,
+        commit: str,
+        source_directory: str,
+        item_types: Optional[List[str]] = None,
+    ) -> None:
+        """Raise ValueError if the plan was made for another target, revision or set of item types."""
+        expected = {
+            "workspace_id": (self.workspace_id, workspace_id),
+            "environment": (self.environment, environment),
+            "commit": (self.commit, commit),
+            "source_directory": (self.source_directory, source_directory),
+            "item_types": (self.item_types, item_types),
+        }
+        for name, (planned, actual) in expected.items():
+            if planned != actual:
+                raise ValueError(f"Plan was made for {name} {planned!r}, not {actual!r}; re-run `fabric-deploy plan`.")
+
+    def save(self, path: Path) -> None:
+        data = {"version": PLAN_VERSION, **asdict(self)}
+        data["estimated_seconds"] = round(self.estimated_seconds(), 1)
+        data["counts"] = self.counts()
+        for item in data["items"]:
+            item["action"] = item["action"].value
+        Path(path).write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "DeploymentPlan":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if data.get("version") != PLAN_VERSION:
+            raise ValueError(f"Unsupported plan version: {data.get('version')}")
+        items = [PlannedItem(**{**i, "action": PlanAction(i["action"])}) for i in data["items"]]
+        return cls(
+            workspace_id=data["workspace_id"],
+            environment=data["environment"],
+            commit=data["commit"],
+            mode=data["mode"],
+            source_directory=data["source_directory"],
+            created_at=data["created_at"],
+            items=items,
+            batches=data.get("batches"),
+            deleted_files=data.get("deleted_files", []),
+            item_types=data.get("item_types"),
+        )
+
+
+def build(
+    *,
+    scope: DeployScope,
+    index: ItemIndex,
+    inventory: WorkspaceInventory,
+    environment: str,
+    commit: str,
+    source_directory: str,
+    unpublish_orphans: bool = True,
+    orphan_sweep: bool = False,
+    unpublishable_types: Optional[Iterable[str]] = None,
+    durations: Optional[Mapping[str, float]] = None,
+) -> DeploymentPlan:
+    """
+    Resolve every repository item to create/update/skip against the inventory, and the deployed items to
+    unpublish (restricted to unpublishable_types, in that order, when given): the scope's deleted items, or every
+    deployed item missing from the repository for a full scope or with orphan_sweep.
+    """
+    durations = durations or {}
+    in_scope = {i.item_id for i in index.items()} if scope.items is None else set(scope.items)
+    publish_rank = {t: n for n, t in enumerate(PUBLISH_ORDER)}
+    scope_rank = {item_id: n for n, item_id in enumerate(scope.items or ())}
+
+    planned: List[PlannedItem] = []
+    for item in index.items():
+        if item.item_id not in in_scope:
+            action = PlanAction.SKIP
+        elif item.item_id in inventory:
+            action = PlanAction.UPDATE
+        else:
+            action = PlanAction.CREATE
+        size = definition_size(item.path)
+        planned.append(
+            PlannedItem(
+                item_id=item.item_id,
+                item_type=item.item_type,
+                action=action,
+                path=item.path.relative_to(index.source_root).as_posix(),
+                size_bytes=size,
+                estimated_seconds=estimate_seconds(item.item_id, item.item_type, size, durations),
+                content_hash=(scope.item_hashes or {}).get(item.item_id),
+            )
+        )
+
+    # publish order first (scope order for changed sets, fabric-cicd's type order otherwise), skips last
+    planned.sort(
+        key=lambda p: (
+            p.action is PlanAction.SKIP,
+            scope_rank.get(p.item_id, len(scope_rank)),
+            publish_rank.get(p.item_type, len(publish_rank)),
+            p.item_id,
+        )
+    )
+
+    if unpublish_orphans:
+        types = UNPUBLISH_ORDER if unpublishable_types is None else unpublishable_types
+        if orphan_sweep or scope.deleted_items is None:
+            orphans = find_orphans(inventory, index.item_ids(), types)
+        else:
+            orphans = select(inventory, scope.deleted_items, types)
+        for deployed in orphans:
+            planned.append(
+                PlannedItem(
+                    item_id=deployed.item_id,
+                    item_type=deployed.item_type,
+                    action=PlanAction.UNPUBLISH,
+                    estimated_seconds=_UNPUBLISH_SECONDS,
+                )
+            )
+
+    return DeploymentPlan(
+        workspace_id=inventory.workspace_id,
+        environment=environment,
+        commit=commit,
+        mode=scope.mode,
+        source_directory=source_directory,
+        created_at=time.time(),
+        items=planned,
+        batches=scope.batches,
+        deleted_files=list(scope.deleted_files),
+        item_types=[t for t in PUBLISH_ORDER if t in index.item_types] if index.item_types is not None else None,
+    )
+
+
+def estimate_seconds(item_id: str, item_type: str, size_bytes: int, durations: Mapping[str, float]) -> float:
+    """
+    Expected publish duration: the item's own recorded average if there is one, otherwise the median
+    recorded duration of its type (or a per-type default) plus upload time for its definition.
+    """
+    if item_id in durations:
+        return round(durations[item_id], 1)
+
+    same_type = sorted(s for i, s in durations.items() if i.rpartition(".")[2] == item_type)
+    base = same_type[len(same_type) // 2] if same_type else _BASE_SECONDS.get(item_type, _DEFAULT_BASE_SECONDS)
+    return round(base + size_bytes / _BYTES_PER_SECOND, 1)
+
+
+def estimate_costs(items: Iterable[FabricItem], durations: Mapping[str, float]) -> Dict[str, float]:
+    """estimate_seconds for each item, keyed by item id."""
+    return {i.item_id: estimate_seconds(i.item_id, i.item_type, definition_size(i.path), durations) for i in items}
+
+
+def load_durations(git: GitOperations) -> Dict[str, float]:
+    """Recorded average publish duration per item id (seconds)."""
+    try:
+        return json.loads((state_dir(git) / DURATIONS_FILE).read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def record_durations(git: GitOperations, observed: Mapping[str, float]) -> None:
+    """Fold observed publish durations into the per-item moving averages."""
+    if not observed:
+        return
+    durations = load_durations(git)
+    for item_id, seconds in observed.items():
+        previous = durations.get(item_id)
+        durations[item_id] = seconds if previous is None else previous + _DURATION_SMOOTHING * (seconds - previous)
+    path = state_dir(git) / DURATIONS_FILE
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(dict(sorted(durations.items())), indent=1), encoding="utf-8")
+    tmp.replace(path)
+
+
+def definition_size(path: Path) -> int:
+    """Bytes of the files in an item folder."""
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
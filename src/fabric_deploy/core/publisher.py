@@ -0,0 +1,289 @@
+"""
+core.publisher
+--------------
+Concurrent publishing through fabric-cicd's publish_all_items.
+
+Items are published in steps: a step only contains items of one type whose dependencies were published in earlier
+steps. The items of a step are split over a bounded worker pool, and each worker publishes its share with one
+publish_all_items(items_to_include=...) call on its own workspace object (fabric-cicd is pinned to the version this
+was tested with). A failing call is retried item by item with backoff; an item that still fails is reported, and
+only the items that (transitively) reference it are left unpublished, everything else keeps publishing. Given deployed definitions (core.definitions), items the workspace already holds unchanged are
+not published at all. Long-running operations are polled concurrently by an OperationTracker.
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from ..adapters import fabric_workspace as fabric
+from ..utils import tracing
+from ..utils.lro import OperationSession, OperationTracker
+from ..utils.rate_limit import RateLimitedSession, TokenBucket
+from .dependencies import ReferenceGraph, publish_batches
+from .fabric_items import PUBLISH_ORDER
+
+if TYPE_CHECKING:
+    from fabric_cicd import FabricWorkspace
+
+    from .definitions import DeployedDefinitions
+    from .journal import Journal
+    from .render_cache import RenderCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+_BACKOFF_BASE = 2.0
+_BACKOFF_MAX = 60.0
+
+_PUBLISH_RANK: Dict[str, int] = {t: i for i, t in enumerate(PUBLISH_ORDER)}
+
+
+@dataclass
+class PublishOutcome:
+    item_id: str
+    success: bool
+    seconds: float
+    attempts: int
+    error: str = ""
+    # not published: the workspace already held the same definition
+    unchanged: bool = False
+    # of seconds, the time spent waiting on long-running operations
+    operation_seconds: float = 0.0
+    # when the item was done, in seconds since publishing started
+    completed: float = 0.0
+
+
+def plan_steps(
+    items: List[str], graph: Optional[ReferenceGraph] = None, batches: Optional[List[List[str]]] = None
+) -> List[List[str]]:
+    """
+    Order items into concurrently publishable steps: publish batches (dependency waves coalesced as in
+    core.dependencies, computed from graph unless given), each split by item type in fabric-cicd's publish
+    order so that type-level ordering assumptions of fabric-cicd (e.g. parameter references) still hold.
+    """
+    if batches is None:
+        graph = graph or ReferenceGraph()
+        batches = publish_batches(graph, graph.waves(items))
+    else:
+        wanted = set(items)
+        batches = [[i for i in batch if i in wanted] for batch in batches]
+        leftover = wanted.difference(*batches)
+        if leftover:
+            batches.append(sorted(leftover))
+
+    steps: List[List[str]] = []
+    for batch in batches:
+        by_type: Dict[str, List[str]] = {}
+        for item_id in batch:
+            by_type.setdefault(item_id.rpartition(".")[2], []).append(item_id)
+        for item_type in sorted(by_type, key=lambda t: (_PUBLISH_RANK.get(t, len(_PUBLISH_RANK)), t)):
+            steps.append(sorted(by_type[item_type]))
+    return steps
+
+
+def split_step(step: List[str], max_workers: int) -> List[List[str]]:
+    """Split a step's items into at most max_workers calls of (nearly) equal size, keeping their order."""
+    calls = max(1, min(max_workers, len(step)))
+    size, extra = divmod(len(step), calls)
+    bounds = [n * size + min(n, extra) for n in range(calls + 1)]
+    return [step[bounds[n] : bounds[n + 1]] for n in range(calls)]
+
+
+class Publisher:
+    def __init__(
+        self,
+        workspace: "FabricWorkspace",
+        *,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+        journal: Optional["Journal"] = None,
+        definitions: Optional["DeployedDefinitions"] = None,
+        render_cache: Optional["RenderCache"] = None,
+    ):
+        self.workspace = workspace
+        # every outcome is recorded here; items it already holds as published are skipped
+        self.journal = journal
+        # deployed definition hashes; items whose deployed definition matches are skipped
+        self.definitions = definitions
+        # rendered item files, shared between runs
+        self.render_cache = render_cache
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max(0, max_retries)
+        self.bucket = TokenBucket(requests_per_second, burst=max(self.max_workers, int(requests_per_second)))
+        # idle publish workers (adapters.fabric_workspace.publish_worker)
+        self._workers: List["FabricWorkspace"] = []
+        self._workers_lock = threading.Lock()
+        self._transport: Optional[OperationSession] = None
+        self._tracker: Optional[OperationTracker] = None
+        self._started = 0.0
+
+    def publish(
+        self,
+        items: Optional[List[str]] = None,
+        *,
+        graph: Optional[ReferenceGraph] = None,
+        batches: Optional[List[List[str]]] = None,
+    ) -> List[PublishOutcome]:
+        """
+        Publish items (all publishable repository items when None) in dependency order.
+        Returns an outcome per item. Items referencing a failed item (per graph) are not attempted and fail with
+        it; without graph, no item after a failed step is attempted.
+        """
+        session = RateLimitedSession(self.bucket, pool_size=self.max_workers * 2)
+        self._tracker = OperationTracker(max_workers=self.max_workers)
+        self._started = time.monotonic()
+        self._transport = OperationSession(session, self._tracker)
+        previous_transport = fabric.set_transport(self.workspace, self._transport)
+        try:
+            publishable = fabric.prepare_publish(self.workspace)
+            if items is None:
+                items = publishable
+            else:
+                missing = sorted(set(items) - set(publishable))
+                if missing:
+                    raise ValueError(f"Items not found in the repository (or not in scope): {missing}")
+            if self.journal is not None and self.journal.published:
+                done = [i for i in items if i in self.journal.published]
+                if done:
+                    logger.info(f"⏭️  Skipping {len(done)} item(s) already published at {self.journal.commit[:12]}")
+                    items = [i for i in items if i not in self.journal.published]
+
+            outcomes: List[PublishOutcome] = []
+            if self.definitions is not None and items:
+                with tracing.span("publish.compare", **{"publish.items": len(items)}):
+                    unchanged = set(
+                        self.definitions.unchanged(
+                            self.workspace, items, max_workers=self.max_workers, render_cache=self.render_cache
+                        )
+                    )
+                if unchanged:
+                    logger.info(f"⏭️  Skipping {len(unchanged)} item(s) whose deployed definition is unchanged")
+                    items = [i for i in items if i not in unchanged]
+                    for item_id in sorted(unchanged):
+                        outcome = PublishOutcome(item_id, True, 0.0, 0, unchanged=True)
+                        if self.journal is not None:
+                            self.journal.record(outcome)
+                        outcomes.append(outcome)
+
+            steps = plan_steps(items, graph, batches)
+            logger.info(
+                "📦 Publishing %d item(s) in %d step(s) with up to %d worker(s)",
+                len(items),
+                len(steps),
+                self.max_workers,
+            )
+
+            # items that reference a failed item, with the failed item they reference
+            blocked: Dict[str, str] = {}
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="publish") as pool:
+                for n, step in enumerate(steps, start=1):
+                    for item_id in (i for i in step if i in blocked):
+                        outcomes.append(
+                            PublishOutcome(item_id, False, 0.0, 0, f"Not published: references {blocked[item_id]}")
+                        )
+                    step = [i for i in step if i not in blocked]
+                    if not step:
+                        continue
+                    calls = split_step(step, self.max_workers)
+                    logger.info("📦 Step %d/%d: %d item(s) in %d call(s)", n, len(steps), len(step), len(calls))
+                    with tracing.span("publish.step", **{"publish.step": n, "publish.items": len(step)}) as parent:
+                        results = [o for r in pool.map(lambda c: self._publish_call(c, parent), calls) for o in r]
+                    outcomes.extend(results)
+                    failed = [r.item_id for r in results if not r.success]
+                    if failed:
+                        later, before = {i for s in steps[n:] for i in s}, len(blocked)
+                        for item_id in failed:
+                            dependents = graph.closure([item_id]) if graph is not None else later
+                            for dependent in sorted(dependents & later):
+                                blocked.setdefault(dependent, item_id)
+                        logger.error(
+                            f"❌ Step {n}/{len(steps)} failed for {failed}; not publishing the "
+                            f"{len(blocked) - before} later item(s) that reference them, continuing with the others"
+                        )
+            return outcomes
+        finally:
+            fabric.set_transport(self.workspace, previous_transport)
+            self._workers.clear()
+            self._tracker.close()
+            session.close()
+            if self.definitions is not None:
+                self.definitions.save()
+            if self.render_cache is not None:
+                self.render_cache.finish()
+
+    def _publish_call(self, items: List[str], parent: Optional[tracing.Span] = None) -> List[PublishOutcome]:
+        """Publish items (of one type) with one call; if it fails, retry them one by one."""
+        with tracing.span("publish.call", parent=parent, **{"publish.items": len(items)}) as span:
+            if len(items) == 1:
+                outcomes = self._publish_with_retries(items, retries=self.max_retries)
+            else:
+                outcomes = self._publish_with_retries(items, retries=0)
+                if not outcomes[0].success and self.max_retries:
+                    logger.warning(
+                        f"⚠️  Publishing {len(items)} item(s) together failed, retrying them one by one: "
+                        f"{outcomes[0].error}"
+                    )
+                    outcomes = [
+                        self._publish_with_retries([item_id], retries=self.max_retries - 1, attempts=1)[0]
+                        for item_id in items
+                    ]
+            for outcome in outcomes:
+                if not outcome.success:
+                    logger.error(
+                        f"❌ Failed to publish {outcome.item_id} after {outcome.attempts} attempt(s): {outcome.error}"
+                    )
+                if self.definitions is not None and outcome.success:
+                    self.definitions.record(self.workspace, outcome.item_id)
+                if self.journal is not None:
+                    self.journal.record(outcome)
+            failed = [o.item_id for o in outcomes if not o.success]
+            span.set(**{"publish.attempts": max(o.attempts for o in outcomes), "publish.success": not failed})
+            if failed:
+                span.status_code, span.status_message = "ERROR", next(o.error for o in outcomes if not o.success)
+        return outcomes
+
+    def _publish_with_retries(self, items: List[str], *, retries: int, attempts: int = 0) -> List[PublishOutcome]:
+        """
+        Publish items in one publish_all_items call on an idle worker, repeating the call with backoff up to retries
+        times. The call's duration and operation waits are split evenly over the items.
+        """
+        label = ",".join(items)
+        started = time.monotonic()
+        attempt = attempts
+        while True:
+            attempt += 1
+            with self._workers_lock:
+                worker = self._workers.pop() if self._workers else None
+            try:
+                if worker is None:
+                    worker = fabric.publish_worker(self.workspace, self._transport, self.render_cache)
+                with self._tracker.item(label):
+                    fabric.publish_items(worker, self.workspace, items)
+                break
+            except Exception as exc:
+                if attempt > attempts + retries:
+                    seconds = (time.monotonic() - started) / len(items)
+                    completed = time.monotonic() - self._started
+                    return [PublishOutcome(i, False, seconds, attempt, str(exc), completed=completed) for i in items]
+                delay = min(_BACKOFF_MAX, _BACKOFF_BASE * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+                logger.warning(f"⚠️  Publishing {label} failed (attempt {attempt}), retrying in {delay:.1f}s: {exc}")
+                time.sleep(delay)
+            finally:
+                if worker is not None:
+                    with self._workers_lock:
+                        self._workers.append(worker)
+
+        seconds = (time.monotonic() - started) / len(items)
+        operation_seconds = self._tracker.item_seconds.get(label, 0.0) / len(items)
+        completed = time.monotonic() - self._started
+        return [
+            PublishOutcome(i, True, seconds, attempt, operation_seconds=operation_seconds, completed=completed)
+            for i in items
+        ]
@@ -0,0 +1,98 @@
+"""
+core.render_cache
+-----------------
+Content-addressed cache of item files as rendered for a target environment.
+
+Before publishing, fabric-cicd renders every text file of an item: logical ids are replaced by the ids of the
+deployed items, then the environment's parameter file replacements are applied. Replacing logical ids scans the
+file once per repository item, so on large repositories most of the publish CPU time goes into re-rendering files
+that did not change. The cache stores each rendered file under a hash of everything its rendering depends on: the
+file's content (as handed to rendering, i.e. after lakehouse standardization), its item and path, the workspace
+rendering context (fabric-cicd version, environment, workspace, parameter file, deployed items when parameters
+refer to them) and the deployed ids of the items it references. Entries live under the local state directory, which
+CI can restore from its cache so that later runs reuse them; entries unused for two weeks are pruned.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..adapters.git_ops import GitOperations
+from ..utils.state import state_dir
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = "render-cache"
+DEFAULT_MAX_AGE = 14 * 24 * 3600
+_UUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+
+
+def cache_dir(git: GitOperations) -> Path:
+    return state_dir(git) / CACHE_DIR
+
+
+class RenderCache:
+    """Rendered files by content key; safe to use from several publish workers."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, context: str, item_id: str, path: str, content: str, logical_ids: Dict[str, str]) -> str:
+        """
+        Cache key of content (a file of item_id at path) rendered in context. logical_ids maps the logical ids of
+        the repository items (UUIDs) to their deployed ids; only the ones content refers to are part of the key.
+        """
+        refs = sorted({(m, logical_ids[m]) for m in _UUID_RE.findall(content) if m in logical_ids})
+        h = hashlib.sha256()
+        for part in (context, item_id, path, repr(refs), content):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            rendered = path.read_bytes().decode("utf-8")
+            os.utime(path)  # last use, for pruning
+        except FileNotFoundError:
+            rendered = None
+        with self._lock:
+            if rendered is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return rendered
+
+    def put(self, key: str, rendered: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(rendered.encode("utf-8"))
+        tmp.replace(path)
+
+    def finish(self, max_age: float = DEFAULT_MAX_AGE) -> None:
+        """Log the hit rate and remove the entries not used for max_age seconds."""
+        if self.hits or self.misses:
+            logger.info(f"Render cache: {self.hits} hit(s), {self.misses} miss(es)")
+        cutoff = time.time() - max_age
+        pruned = 0
+        for path in self.root.glob("*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    pruned += 1
+            except FileNotFoundError:
+                pass
+        if pruned:
+            logger.info(f"Render cache: pruned {pruned} entries unused for {max_age / 86400:.0f} day(s)")
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
@@ -0,0 +1,123 @@
+"""
+core.scope
+----------
+Resolves which items a deployment has to publish.
+
+Shared by `deploy` and `plan`: full deploys publish everything, incremental deploys the items whose folder differs
+from their own entry in the deployment ledger (or, before there is a ledger, the items changed since the
+deployment tag), hash deploys the items whose content hash differs from the manifest. Changed sets are
+optionally expanded to their dependents and ordered into publish batches.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from ..adapters.git_ops import ChangeType, FileChange, GitOperations
+from . import delta, dependencies, fabric_items, ledger, manifest
+from .item_index import ItemIndex
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DeployScope:
+    """
+    mode is the effective mode (an incremental or hash deploy without a baseline falls back to full).
+    items is None for a full deploy, otherwise the ids to publish in dependency order.
+    deleted_items is None for a full deploy (orphans are found by sweeping the workspace), otherwise the ids
+    of items removed from the repository since the baseline, to unpublish directly.
+    """
+
+    mode: str
+    items: Optional[List[str]] = None
+    batches: Optional[List[List[str]]] = None
+    deleted_files: List[str] = field(default_factory=list)
+    deleted_items: Optional[List[str]] = None
+    item_hashes: Optional[Dict[str, str]] = None
+
+
+def resolve(
+    *,
+    source_root: Path,
+    environment: str,
+    mode: str,
+    git: GitOperations,
+    index: ItemIndex,
+    include_dependents: bool = True,
+    graph: Optional[dependencies.ReferenceGraph] = None,
+    item_hashes: Optional[Dict[str, str]] = None,
+    item_trees: Optional[Dict[str, Optional[str]]] = None,
+) -> DeployScope:
+    """
+    environment keys the deployment ledger, tag and manifest. graph, item_hashes and item_trees may be passed
+    in when several scopes are resolved against the same index (fan-out deploys), so they are only computed once.
+    """
+    mode = (mode or "full").lower()
+    scope = DeployScope(mode=mode)
+
+    entries = ledger.load(git, environment) if mode == "incremental" else None
+    if entries is not None:
+        # each item is compared with its own last deployed revision, so items a failed run did not get to stay
+        # in scope and items deployed since are not repeated
+        trees = item_trees if item_trees is not None else ledger.item_trees(git, index)
+        scope.items = ledger.changed_items(trees, entries)
+        scope.deleted_items = ledger.deleted_items(entries, trees)
+        logger.info(f"Ledger: {len(scope.items)} item(s) differ from their last deployed revision")
+    elif mode == "incremental":
+        if delta.is_initial_deployment(source_root, environment, git=git):
+            logger.info("No deployment ledger or tag found → performing initial FULL deployment.")
+            scope.mode = "full"
+        else:
+            # single streaming diff pass: changed paths feed item extraction, deletions (and edited .platform
+            # files, which may rename an item) are collected on the side
+            platform_files: List[str] = []
+            changes = delta.iter_changes(source_root, environment, source_dir=str(source_root), git=git)
+            changes = _collect_platform_changes(changes, platform_files)
+            changed_files = delta.iter_changed_paths(changes, repo_root=git.repo_root(), deleted=scope.deleted_files)
+            scope.items = fabric_items.extract_changed_items(paths=changed_files, index=index)
+            deleted = fabric_items.extract_deleted_items(
+                scope.deleted_files + platform_files,
+                git=git,
+                revision=git.get_deployment_tag(environment),
+                existing_ids=index.item_ids(),
+            )
+            # a type-restricted index only deploys (and so only unpublishes) its own types
+            scope.deleted_items = [
+                item.item_id for item in deleted if index.item_types is None or item.item_type in index.item_types
+            ]
+    elif mode == "hash":
+        stored_hashes = manifest.load(git, environment)
+        scope.item_hashes = item_hashes if item_hashes is not None else manifest.compute(index.items())
+        if stored_hashes is None:
+            logger.info("No deployment manifest found → performing initial FULL deployment.")
+            scope.mode = "full"
+        else:
+            scope.items = manifest.changed_items(scope.item_hashes, stored_hashes)
+            scope.deleted_items = sorted(set(stored_hashes) - set(scope.item_hashes))
+    elif mode != "full":
+        raise ValueError(f"Invalid deploy mode: {mode!r}. Must be 'full', 'incremental' or 'hash'.")
+
+    if scope.items and include_dependents:
+        graph = graph or dependencies.build_graph(index.items())
+        affected = graph.closure(scope.items)
+        waves = graph.waves(affected)
+        scope.batches = dependencies.publish_batches(graph, waves)
+        logger.info(
+            f"Dependency closure: {len(scope.items)} changed → {len(affected)} affected item(s) in {len(waves)} wave(s)"
+        )
+        scope.items = [item for wave in waves for item in wave]
+
+    return scope
+
+
+def _collect_platform_changes(changes: Iterable[FileChange], into: List[str]) -> Iterator[FileChange]:
+    """Pass changes through, noting the (repo-relative) .platform files modified in place."""
+    for change in changes:
+        if (
+            change.change_type is ChangeType.MODIFIED
+            and PurePosixPath(change.path).name == fabric_items.ITEM_PLATFORM_TYPE
+        ):
+            into.append(change.path)
+        yield change
@@ -0,0 +1,84 @@
+"""
+core.shard
+----------
+Splits the items of a deployment into shards that separate deploy jobs (e.g. a CI matrix) publish side by side.
+
+Items connected by references within the deployment, in either direction, always land in the same shard, so every
+dependency chain is published in order by a single job. These groups are assigned largest first to the least loaded
+shard (longest-processing-time scheduling) by estimated publish cost. The split only depends on the items, the
+reference graph and the costs, so every job that is given the same inputs (e.g. one plan file) agrees on it.
+"""
+
+import heapq
+import logging
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .dependencies import ReferenceGraph
+
+logger = logging.getLogger(__name__)
+
+
+def parse(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse "i/N" (1 <= i <= N) into (i, N); None when value is empty. Raises ValueError otherwise."""
+    if not value:
+        return None
+    index, sep, count = value.partition("/")
+    try:
+        shard = (int(index), int(count))
+    except ValueError:
+        shard = None
+    if not sep or shard is None or not 1 <= shard[0] <= shard[1]:
+        raise ValueError(f"Invalid shard {value!r}: expected i/N with 1 <= i <= N, e.g. 2/4")
+    return shard
+
+
+def groups(graph: ReferenceGraph, items: Iterable[str]) -> List[List[str]]:
+    """The items split into groups connected by references among themselves (each group sorted)."""
+    items = sorted(set(items))
+    parent: Dict[str, str] = {i: i for i in items}
+
+    def find(i: str) -> str:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for item in items:
+        for dep in graph.dependencies.get(item, ()):
+            if dep in parent:
+                a, b = find(item), find(dep)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+
+    by_root: Dict[str, List[str]] = {}
+    for item in items:
+        by_root.setdefault(find(item), []).append(item)
+    return list(by_root.values())
+
+
+def partition(groups: Iterable[List[str]], costs: Mapping[str, float], count: int) -> List[List[str]]:
+    """Assign groups to count shards, largest group first onto the least loaded shard."""
+    weighted = sorted(((sum(costs.get(i, 0.0) for i in g), g) for g in groups), key=lambda w: (-w[0], w[1][0]))
+    loads = [(0.0, n) for n in range(count)]
+    shards: List[List[str]] = [[] for _ in range(count)]
+    for cost, group in weighted:
+        load, n = heapq.heappop(loads)
+        shards[n].extend(group)
+        heapq.heappush(loads, (load + cost, n))
+    return [sorted(s) for s in shards]
+
+
+def select(
+    items: Iterable[str], graph: ReferenceGraph, costs: Mapping[str, float], shard: Tuple[int, int]
+) -> List[str]:
+    """The items of shard (i, N) (1-based), logging how the estimated cost is spread over all N shards."""
+    index, count = shard
+    item_groups = groups(graph, items)
+    shards = partition(item_groups, costs, count)
+    loads = [sum(costs.get(i, 0.0) for i in s) for s in shards]
+    largest = max((sum(costs.get(i, 0.0) for i in g) for g in item_groups), default=0.0)
+    logger.info(
+        f"Shard {index}/{count}: {len(shards[index - 1])} item(s), ~{loads[index - 1]:.0f}s estimated "
+        f"(shards {min(loads):.0f}-{max(loads):.0f}s; {len(item_groups)} reference group(s), largest ~{largest:.0f}s)"
+    )
+    return shards[index - 1]
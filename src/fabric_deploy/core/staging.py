@@ -0,0 +1,158 @@
+"""
+core.staging
+------------
+Builds a deploy tree next to the source tree instead of rewriting the git work tree.
+
+Untouched files are hard links to the originals (copies across file systems); only notebooks
+whose lakehouse references are standardized get new content. Transformed outputs are cached
+between runs keyed by the source file's git blob id, so unchanged notebooks are not re-read.
+"""
+
+import errno
+import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from ..adapters.git_ops import GitOperations
+from ..utils.state import state_dir
+from .item_index import ItemIndex
+from .lakehouse import standardize_file
+
+logger = logging.getLogger(__name__)
+
+STAGE_DIR = "stage"
+CACHE_DIR = "staging-cache"
+# cache entry for a source blob that needs no transformation
+_UNCHANGED_SUFFIX = ".same"
+# Below this many cache misses, process start-up costs more than it saves
+_PARALLEL_THRESHOLD = 32
+
+
+def default_stage_dir(git: GitOperations) -> Path:
+    return state_dir(git) / STAGE_DIR
+
+
+def stage(
+    source_root: Path,
+    stage_root: Path,
+    index: ItemIndex,
+    git: GitOperations,
+    items: Optional[Iterable[str]] = None,
+    max_workers: Optional[int] = None,
+) -> Path:
+    """
+    Materialize source_root under stage_root with default lakehouse references standardized in the
+    notebooks of `items` (all notebooks when None). Returns stage_root.
+    """
+    source_root = Path(source_root).resolve()
+    stage_root = Path(stage_root).resolve()
+    if stage_root == source_root or (
+        stage_root.is_relative_to(source_root) and ".git" not in stage_root.relative_to(source_root).parts
+    ):
+        raise ValueError(f"Stage directory must be outside the source directory: {stage_root}")
+
+    logger.info(f"🔄 Staging deploy tree in: {stage_root}")
+
+    wanted = set(items) if items is not None else None
+    transform = {
+        f
+        for item in index.items(item_types={"Notebook"})
+        if wanted is None or item.item_id in wanted
+        for f in item.path.glob("*.py")
+    }
+
+    repo_root = git.repo_root()
+    blobs = {repo_root / p: oid for p, oid in git.blob_ids(str(source_root)).items()} if transform else {}
+    cache_root = state_dir(git) / CACHE_DIR
+
+    if stage_root.exists():
+        shutil.rmtree(stage_root)
+
+    linked = rendered = 0
+    misses: Dict[Path, Path] = {}
+
+    for root, dirs, files in os.walk(source_root):
+        src_dir = Path(root)
+        dest_dir = stage_root / src_dir.relative_to(source_root)
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        if src_dir == source_root and ".git" in dirs:
+            dirs.remove(".git")
+
+        for name in files:
+            src = src_dir / name
+            dest = dest_dir / name
+            if src not in transform:
+                _link(src, dest)
+                linked += 1
+                continue
+
+            oid = blobs.get(src)
+            cached = _cache_path(cache_root, oid) if oid else None
+            if cached is not None and cached.exists():
+                _link(cached, dest)
+                rendered += 1
+            elif cached is not None and cached.with_suffix(_UNCHANGED_SUFFIX).exists():
+                _link(src, dest)
+                linked += 1
+            else:
+                misses[src] = dest
+
+    if misses:
+        srcs, dests = list(misses), list(misses.values())
+        if len(srcs) < _PARALLEL_THRESHOLD:
+            outcomes = list(map(_render, srcs, dests))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                outcomes = list(pool.map(_render, srcs, dests))
+
+        for src, dest, changed in zip(srcs, dests, outcomes):
+            rendered += changed
+            linked += not changed
+            oid = blobs.get(src)
+            if oid:
+                _store(cache_root, oid, dest if changed else None)
+
+    logger.info(
+        f"✅ Staged {linked + rendered} file(s): {rendered} standardized, {linked} linked, "
+        f"{len(misses)} cache miss(es)."
+    )
+    return stage_root
+
+
+def _render(src: Path, dest: Path) -> bool:
+    """Write the standardized form of src to dest, or link src when nothing changes."""
+    try:
+        if standardize_file(src, dest):
+            return True
+    except Exception as e:
+        logger.warning(f"⚠️  Error processing {src}: {e}")
+    _link(src, dest)
+    return False
+
+
+def _link(src: Path, dest: Path) -> None:
+    try:
+        os.link(src, dest)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+            raise
+        shutil.copy2(src, dest)
+
+
+def _cache_path(cache_root: Path, oid: str) -> Path:
+    return cache_root / oid[:2] / oid
+
+
+def _store(cache_root: Path, oid: str, rendered: Optional[Path]) -> None:
+    entry = _cache_path(cache_root, oid)
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        if rendered is None:
+            entry.with_suffix(_UNCHANGED_SUFFIX).touch()
+        else:
+            _link(rendered, entry)
+    except FileExistsError:
+        pass
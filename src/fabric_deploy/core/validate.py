@@ -1,18 +1,85 @@
 """
 core.validate
 -------------
-Performs lightweight validation of deployment configuration and source artifacts.
+Validation of deployment configuration and source artifacts.
+
+Every item folder under the source directory is checked: its .platform parses and names a known item type,
+the definition files its type needs are present and its JSON files parse. The references an item makes to other
+items (a report's semantic model, a pipeline's same-workspace activities) are collected with it and resolved
+against the whole repository, together with duplicate name and logical id checks.
+
+Per-item checks run in worker processes for larger repositories. With use_cache, their results are cached in the
+local state directory keyed by a hash of the folder's content (git blob ids where the work tree is clean), so
+unchanged items are not checked again, and an item index snapshot is left for the deploy that follows; without it,
+validation does not write anything. Checks across items always run.
 """
 
+import hashlib
+import json
 import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
 from ..models.config import DeploymentConfig
 from ..adapters.git_ops import GitOperations
+from ..utils.state import state_dir
+from .fabric_items import ITEM_PLATFORM_TYPE, SUPPORTED_ITEM_TYPES, folder_item_type
+from .item_index import ItemIndex
 
 logger = logging.getLogger(__name__)
 
+CACHE_FILE = "validation-cache.json"
+# bump whenever the per-item checks change, so cached results from older rules are dropped
+_RULES_VERSION = 1
+# below this many items to check, process start-up costs more than checking serially
+_PARALLEL_THRESHOLD = 64
+
+# definition files (globs relative to the item folder) each type's publisher cannot do without
+REQUIRED_FILES: Dict[str, tuple] = {
+    "Notebook": ("notebook-content.*",),
+    "DataPipeline": ("pipeline-content.json",),
+    "Report": ("definition.pbir",),
+    "SemanticModel": ("definition.pbism",),
+    "Lakehouse": ("lakehouse.metadata.json",),
+    "Environment": ("Setting/Sparkcompute.yml",),
+    "KQLDashboard": ("RealTimeDashboard.json",),
+}
+_JSON_SUFFIXES = {".json", ".pbir", ".pbism"}
+# Fabric git integration writes references to items of the same workspace with this workspace id
+_DEFAULT_WORKSPACE_ID = "00000000-0000-0000-0000-000000000000"
+
+
+@dataclass
+class ItemReport:
+    """Outcome of checking one item folder (paths relative to the source directory); this is what is cached."""
+
+    path: str
+    item_type: Optional[str] = None
+    display_name: Optional[str] = None
+    logical_id: Optional[str] = None
+    errors: List[str] = field(default_factory=list)
+    model_path: Optional[str] = None  # semantic model folder a report is bound to by path
+    logical_refs: List[str] = field(default_factory=list)  # logical ids of same-workspace items referenced
+
+    @property
+    def item_id(self) -> Optional[str]:
+        return f"{self.display_name}.{self.item_type}" if self.item_type and self.display_name else None
 
-def run(workspace_id: str, source_directory: Path, environment: str) -> bool:
+
+@dataclass(frozen=True)
+class ValidationIssue:
+    path: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+
+def run(workspace_id: str, source_directory: Path, environment: str, use_cache: bool = False) -> bool:
     """
     Validate that the deployment configuration and source directory are valid.
     Returns True if validation succeeds, False otherwise.
@@ -28,6 +95,20 @@ def run(workspace_id: str, source_directory: Path, environment: str) -> bool:
 
         if not GitOperations.is_within_repo(source_directory):
             raise ValueError(f"No Git repository found for source directory: '{source_directory}'")
+        if not cfg.source_directory.is_dir():
+            raise ValueError(f"Source directory not found: {cfg.source_directory}")
+
+        with GitOperations(source_directory) as git:
+            reports, issues = check_items(cfg.source_directory, git=git, use_cache=use_cache)
+            logger.info(f"Checked {len(reports)} item folder(s)")
+            if issues:
+                for issue in issues:
+                    logger.warning(f"❌ {issue}")
+                raise ValueError(f"{len(issues)} problem(s) found in {cfg.source_directory}")
+
+            if use_cache:
+                # leaves a fresh index snapshot for the deploy that follows
+                ItemIndex.load_or_build(cfg.source_directory, git)
 
         logger.info("✅ Validation succeeded")
         return True
@@ -37,6 +118,219 @@ def run(workspace_id: str, source_directory: Path, environment: str) -> bool:
         return False
 
 
-def _check_source_structure(source_dir: Path):
-    if not source_dir.exists():
-        raise ValueError(f"Source directory not found: {source_dir}")
+def check_items(
+    source_root: Path,
+    git: Optional[GitOperations] = None,
+    use_cache: bool = False,
+    max_workers: Optional[int] = None,
+) -> tuple[List[ItemReport], List[ValidationIssue]]:
+    """Check every item folder under source_root; returns the per-item reports and all issues found."""
+    source_root = Path(source_root).resolve()
+    item_files = _walk_items(source_root)
+
+    cache_path = state_dir(git) / CACHE_FILE if git is not None and use_cache else None
+    cached = _load_cache(cache_path) if cache_path else {}
+    blobs = _blob_ids(git, source_root) if cache_path else {}
+
+    reports: Dict[str, ItemReport] = {}
+    keys: Dict[str, str] = {}
+    pending: List[str] = []
+    for rel, files in item_files.items():
+        if cache_path:
+            keys[rel] = content_key(source_root, rel, files, blobs)
+            entry = cached.get(rel)
+            if entry and entry["key"] == keys[rel]:
+                reports[rel] = ItemReport(**entry["report"])
+                continue
+        pending.append(rel)
+
+    if pending:
+        logger.debug(f"Checking {len(pending)} item folder(s), {len(reports)} unchanged since the last run")
+    for report in _check_all(source_root, pending, max_workers):
+        reports[report.path] = report
+
+    if cache_path:
+        _save_cache(cache_path, {rel: {"key": keys[rel], "report": vars(r)} for rel, r in reports.items()})
+
+    ordered = [reports[rel] for rel in sorted(reports)]
+    issues = [ValidationIssue(r.path, e) for r in ordered for e in r.errors]
+    return ordered, issues + cross_check(ordered)
+
+
+def find_item_dirs(source_root: Path) -> List[Path]:
+    """
+    Folders holding a .platform file, plus folders named like an item (<name>.<SupportedType>) that lack one.
+    Item folders are not descended into.
+    """
+    source_root = Path(source_root)
+    return [source_root / rel for rel in _walk_items(source_root)]
+
+
+def check_item(source_root: str, rel_path: str) -> ItemReport:
+    """Run the per-item checks on source_root/rel_path (top-level so worker processes can pickle it)."""
+    item_dir = Path(source_root) / rel_path
+    report = ItemReport(path=rel_path)
+
+    try:
+        platform = json.loads((item_dir / ITEM_PLATFORM_TYPE).read_bytes())
+    except FileNotFoundError:
+        report.errors.append(f"missing {ITEM_PLATFORM_TYPE} file")
+        return report
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        report.errors.append(f"invalid {ITEM_PLATFORM_TYPE} file ({e})")
+        return report
+
+    metadata = platform.get("metadata") if isinstance(platform, dict) else None
+    config = platform.get("config") if isinstance(platform, dict) else None
+    report.item_type = (metadata or {}).get("type")
+    report.display_name = (metadata or {}).get("displayName")
+    report.logical_id = (config or {}).get("logicalId")
+
+    if not report.item_type:
+        report.errors.append(f"{ITEM_PLATFORM_TYPE} has no metadata.type")
+    elif report.item_type not in SUPPORTED_ITEM_TYPES:
+        report.errors.append(f"unknown item type '{report.item_type}'")
+    if not report.display_name:
+        report.errors.append(f"{ITEM_PLATFORM_TYPE} has no metadata.displayName")
+    if not report.logical_id:
+        report.errors.append(f"{ITEM_PLATFORM_TYPE} has no config.logicalId")
+
+    for pattern in REQUIRED_FILES.get(report.item_type, ()):
+        if next(item_dir.glob(pattern), None) is None:
+            report.errors.append(f"missing definition file {pattern} required for {report.item_type}")
+
+    documents: Dict[str, object] = {}
+    for file_path in sorted(item_dir.rglob("*")):
+        if file_path.suffix.lower() not in _JSON_SUFFIXES or not file_path.is_file():
+            continue
+        rel_file = file_path.relative_to(item_dir).as_posix()
+        try:
+            documents[rel_file] = json.loads(file_path.read_bytes())
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            report.errors.append(f"{rel_file} is not valid JSON ({e})")
+
+    if report.item_type == "Report":
+        reference = documents.get("definition.pbir")
+        by_path = (
+            ((reference or {}).get("datasetReference") or {}).get("byPath") if isinstance(reference, dict) else None
+        )
+        if by_path and by_path.get("path"):
+            model_dir = os.path.normpath(os.path.join(item_dir, by_path["path"]))
+            report.model_path = Path(os.path.relpath(model_dir, source_root)).as_posix()
+    if report.item_type == "DataPipeline":
+        report.logical_refs = sorted(set(_same_workspace_refs(documents.get("pipeline-content.json"))))
+
+    return report
+
+
+def cross_check(reports: Iterable[ItemReport]) -> List[ValidationIssue]:
+    """Checks spanning items: duplicate names and logical ids, and references that resolve to no item."""
+    reports = list(reports)
+    issues: List[ValidationIssue] = []
+
+    by_item_id: Dict[str, List[str]] = defaultdict(list)
+    by_logical_id: Dict[str, List[str]] = defaultdict(list)
+    for r in reports:
+        if r.item_id:
+            by_item_id[r.item_id].append(r.path)
+        if r.logical_id:
+            by_logical_id[r.logical_id.lower()].append(r.path)
+    for what, groups in (("item", by_item_id), ("logical id", by_logical_id)):
+        for key, paths in sorted(groups.items()):
+            for path in paths[1:]:
+                issues.append(ValidationIssue(path, f"duplicate {what} {key} (also defined in {paths[0]})"))
+
+    models = {r.path for r in reports if r.item_type == "SemanticModel"}
+    for r in reports:
+        if r.model_path is not None and r.model_path not in models:
+            issues.append(
+                ValidationIssue(r.path, f"references semantic model {r.model_path}, which is not in the repository")
+            )
+        for logical_id in r.logical_refs:
+            if logical_id.lower() not in by_logical_id:
+                issues.append(ValidationIssue(r.path, f"references item {logical_id}, which is not in the repository"))
+
+    return issues
+
+
+def content_key(source_root: Path, rel_path: str, files: List[str], blobs: Dict[str, str]) -> str:
+    """
+    Hash of an item folder's file paths and contents. blobs maps source-relative paths of clean tracked files
+    to their blob ids; other files are read and hashed.
+    """
+    h = hashlib.sha256(str(_RULES_VERSION).encode())
+    for name in files:
+        oid = blobs.get(name if rel_path == "." else f"{rel_path}/{name}")
+        if oid is None:
+            oid = hashlib.sha1((source_root / rel_path / name).read_bytes()).hexdigest()
+        h.update(f"{name}\0{oid}\0".encode())
+    return h.hexdigest()
+
+
+def _walk_items(source_root: Path) -> Dict[str, List[str]]:
+    """Item folders (see find_item_dirs) mapped to their files, all as sorted posix paths."""
+    items: Dict[str, List[str]] = {}
+    inside: Dict[str, tuple] = {}  # directory below an item folder -> (item folder, path prefix within it)
+    base = len(str(source_root)) + 1
+    for root, dirs, files in os.walk(source_root):
+        rel = root[base:].replace(os.sep, "/") or "."
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        item, prefix = inside.pop(rel, (None, ""))
+        if item is None and (ITEM_PLATFORM_TYPE in files or folder_item_type(os.path.basename(root))):
+            item = rel
+            items[item] = []
+        if item is None:
+            continue
+        items[item].extend(prefix + name for name in files)
+        # item definitions never nest other items; keep walking only to collect their files
+        for d in dirs:
+            inside[d if rel == "." else f"{rel}/{d}"] = (item, f"{prefix}{d}/")
+    return {rel: sorted(files) for rel, files in sorted(items.items())}
+
+
+def _check_all(source_root: Path, rel_paths: List[str], max_workers: Optional[int]) -> List[ItemReport]:
+    if len(rel_paths) < _PARALLEL_THRESHOLD:
+        return [check_item(str(source_root), rel) for rel in rel_paths]
+    chunksize = max(1, len(rel_paths) // ((os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(check_item, [str(source_root)] * len(rel_paths), rel_paths, chunksize=chunksize))
+
+
+def _same_workspace_refs(node) -> Iterable[str]:
+    """Logical ids referenced next to the default workspace id, i.e. items expected in the same repository."""
+    if isinstance(node, dict):
+        if str(node.get("workspaceId", "")).lower() == _DEFAULT_WORKSPACE_ID:
+            for key, value in node.items():
+                if key != "workspaceId" and key.endswith("Id") and isinstance(value, str) and _is_guid(value):
+                    yield value
+        for value in node.values():
+            yield from _same_workspace_refs(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _same_workspace_refs(value)
+
+
+def _is_guid(value: str) -> bool:
+    parts = value.split("-")
+    return [len(p) for p in parts] == [8, 4, 4, 4, 12] and all(c in "0123456789abcdefABCDEF" for c in "".join(parts))
+
+
+def _blob_ids(git: GitOperations, source_root: Path) -> Dict[str, str]:
+    """Blob ids of clean tracked files, keyed by source-relative posix path."""
+    prefix = source_root.relative_to(git.repo_root()).as_posix()
+    strip = len(prefix) + 1 if prefix != "." else 0
+    return {p[strip:]: oid for p, oid in git.blob_ids(str(source_root)).items()}
+
+
+def _load_cache(path: Path) -> Dict[str, dict]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return data.get("items", {}) if data.get("version") == _RULES_VERSION else {}
+
+
+def _save_cache(path: Path, items: Dict[str, dict]) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": _RULES_VERSION, "items": items}), encoding="utf-8")
+    tmp.replace(path)
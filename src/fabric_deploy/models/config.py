@@ -2,11 +2,13 @@
 Deployment configuration model
 """
 
+import json
 import re
 
 from dataclasses import dataclass, field
 from pathlib import Path
 from enum import Enum
+from typing import Iterable, Optional
 
 
 class DeployMode(Enum):
@@ -14,6 +16,7 @@ class DeployMode(Enum):
 
     FULL = "full"
     INCREMENTAL = "incremental"
+    HASH = "hash"
 
 
 _GUID_RE = re.compile(r"^[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}$")
@@ -56,3 +59,78 @@ class DeploymentConfig:
                 raise ValueError(f"Invalid deploy mode: {self.deploy_mode}")
 
         self.environment = self.environment.lower()
+
+
+@dataclass
+class DeployTarget:
+    """
+    One workspace of a fan-out deployment (`deploy --targets`).
+
+    name keys the target's deployment tag, manifest and journal; it defaults to the environment,
+    so targets that share an environment (and its parameter values) need distinct names.
+    item_types restricts the deploy to those item types (None = all); see state_key.
+    """
+
+    workspace_id: str
+    environment: str
+    deploy_mode: DeployMode = DeployMode.FULL
+    name: str = ""
+    item_types: Optional[list[str]] = None
+
+    @property
+    def state_key(self) -> str:
+        return state_key(self.name, self.item_types)
+
+    def __post_init__(self):
+        if not isinstance(self.workspace_id, str) or not _GUID_RE.match(self.workspace_id):
+            raise ValueError(
+                f"workspace_id: {self.workspace_id} must be a valid GUID (xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx)"
+            )
+
+        if not isinstance(self.deploy_mode, DeployMode):
+            try:
+                self.deploy_mode = DeployMode(self.deploy_mode.lower())
+            except Exception:
+                raise ValueError(f"Invalid deploy mode: {self.deploy_mode}")
+
+        self.name = self.name or self.environment
+
+
+def state_key(name: str, item_types: Optional[Iterable[str]] = None) -> str:
+    """
+    Key of the deployment tag and manifest of a deploy named name. A deploy restricted to some item types keeps
+    its own baseline (e.g. latestDeployed/dev+Report), so it never moves the baseline of the types it skipped.
+    """
+    return name if not item_types else "+".join([name, *sorted(item_types)])
+
+
+def load_targets(path: Path, default_mode: DeployMode = DeployMode.FULL) -> list[DeployTarget]:
+    """
+    Read deployment targets from a JSON file: a list (or {"targets": [...]}) of objects with
+    workspace_id, environment and optionally deploy_mode and name.
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    entries = data.get("targets") if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path}: expected a non-empty list of targets")
+
+    targets = []
+    for n, entry in enumerate(entries, start=1):
+        try:
+            targets.append(
+                DeployTarget(
+                    workspace_id=entry["workspace_id"],
+                    environment=entry["environment"],
+                    deploy_mode=entry.get("deploy_mode", default_mode),
+                    name=entry.get("name", ""),
+                )
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"{path}: target {n}: {e!r}") from e
+
+    for attr in ("workspace_id", "name"):
+        values = [getattr(t, attr) for t in targets]
+        duplicates = sorted({v for v in values if values.count(v) > 1})
+        if duplicates:
+            raise ValueError(f"{path}: duplicate target {attr}(s): {duplicates}")
+    return targets
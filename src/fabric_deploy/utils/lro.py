@@ -0,0 +1,156 @@
+"""
+utils.lro
+---------
+Polling of Fabric long-running operations for the publish workers.
+
+fabric-cicd polls an operation from inside the call that started it: a fixed first wait, then backoff capped by
+Retry-After (60s when the header is missing). OperationSession, a drop-in for the `requests` module like
+RateLimitedSession, instead hands every 202 Accepted to an OperationTracker and returns the operation's final
+response, so fabric-cicd sees an ordinary synchronous call; adapters.fabric_workspace routes fabric-cicd's
+environment publish-state checks to the same tracker. The tracker polls from one asyncio loop: each poll is
+scheduled after the Retry-After the service asked for, or else after an interval that starts short and grows, and
+the HTTP calls themselves go through the shared (rate-limited) transport. The worker that started an operation
+blocks until it is done, so operations in flight never outnumber the publish workers: the tracker shortens the
+waits, it does not add concurrency. The time every item spends waiting on operations is recorded per item.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, Optional, Tuple
+
+from . import tracing
+from .rate_limit import retry_after
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_INTERVAL = 0.5
+DEFAULT_MAX_INTERVAL = 10.0
+_GROWTH = 1.5
+
+# a poll returns (done, retry_after, value); value is the operation's result once done
+Poll = Callable[[], Tuple[bool, Optional[float], Any]]
+
+
+class OperationTracker:
+    """Polls the operations the publish workers wait on from one event loop in a background thread."""
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = 4,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        # seconds each item spent waiting on long-running operations
+        self.item_seconds: Dict[str, float] = {}
+        self._item = threading.local()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="lro")
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="lro-loop", daemon=True)
+        self._thread.start()
+
+    @contextmanager
+    def item(self, item_id: str) -> Iterator[None]:
+        """Attribute the operations waited on by this thread to item_id."""
+        self._item.id = item_id
+        try:
+            yield
+        finally:
+            self._item.id = None
+
+    def wait(self, poll: Poll, *, delay: Optional[float] = None) -> Any:
+        """Block until poll reports the operation done (first poll after delay) and return its value."""
+        item_id = getattr(self._item, "id", None)
+        with tracing.span("lro.wait", **({"fabric.item_id": item_id} if item_id else {})) as span:
+            started = time.monotonic()
+            try:
+                future = asyncio.run_coroutine_threadsafe(self._track(poll, delay, span), self._loop)
+                return future.result()
+            finally:
+                if item_id:
+                    self._add(item_id, time.monotonic() - started)
+
+    def close(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._executor.shutdown(wait=True)
+
+    async def _track(self, poll: Poll, delay: Optional[float], span: tracing.Span) -> Any:
+        interval = self.min_interval
+        polls = 0
+        while True:
+            await asyncio.sleep(delay if delay is not None else interval)
+            polls += 1
+            done, after, value = await self._loop.run_in_executor(self._executor, _in_span(poll, span))
+            if done:
+                span.set(**{"lro.polls": polls})
+                return value
+            # the service's Retry-After wins; otherwise poll less often the longer the operation runs
+            delay = after
+            interval = min(self.max_interval, interval * _GROWTH)
+
+    def _add(self, item_id: str, seconds: float) -> None:
+        with self._lock:
+            self.item_seconds[item_id] = self.item_seconds.get(item_id, 0.0) + seconds
+
+
+class OperationSession:
+    """Exposes `request()` like the requests module; 202 Accepted operations are resolved through the tracker."""
+
+    def __init__(self, transport, tracker: OperationTracker):
+        self.transport = transport
+        self.tracker = tracker
+
+    def request(self, method: str, url: str, **kwargs) -> "requests.Response":
+        response = self.transport.request(method=method, url=url, **kwargs)
+        location = response.headers.get("Location")
+        if response.status_code != 202 or not location:
+            return response
+        headers = kwargs.get("headers")
+        return self.tracker.wait(lambda: self._poll(location, headers), delay=retry_after(response))
+
+    def close(self) -> None:
+        self.transport.close()
+
+    def _poll(self, location: str, headers: Optional[dict]) -> Tuple[bool, Optional[float], "requests.Response"]:
+        """One poll of an operation's state, resolved as fabric-cicd's FabricEndpoint resolves it."""
+        response = self.transport.request(method="GET", url=location, headers=headers)
+        if response.status_code == 429:
+            return False, retry_after(response), response
+        if response.status_code != 200:
+            return True, None, response  # left to fabric-cicd's error handling
+        status = response.json().get("status")
+        if status == "Succeeded":
+            result = response.headers.get("Location")
+            if result:
+                return True, None, self.transport.request(method="GET", url=result, headers=headers)
+            return True, None, response
+        if status == "Failed":
+            error = response.json().get("error") or {}
+            raise Exception(
+                f"Operation failed. Error Code: {error.get('errorCode')}. Error Message: {error.get('message')}"
+            )
+        if status == "Undefined":
+            raise Exception(f"Operation is in an undefined state. Full Body: {response.json()}")
+        return False, retry_after(response), response
+
+
+def _in_span(poll: Poll, span: tracing.Span) -> Poll:
+    """poll, run with span as the parent of the spans it opens (e.g. http.request) in the executor thread."""
+
+    def run():
+        with tracing.span("lro.poll", parent=span):
+            return poll()
+
+    return run
@@ -0,0 +1,108 @@
+"""
+utils.rate_limit
+----------------
+Client-side throttling for Fabric REST calls shared by concurrent publish workers.
+
+TokenBucket caps the request rate across threads and adapts to the service: a 429 halves the rate and
+pauses every worker until Retry-After has passed; successful calls recover the rate gradually (AIMD).
+RateLimitedSession is a drop-in for the `requests` module as used by fabric-cicd's FabricEndpoint.
+"""
+
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import urlsplit
+
+from . import tracing
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_RETRY_AFTER = 10.0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[int] = None, min_rate: float = 0.5):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min(min_rate, self.max_rate)
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self.throttled_count = 0
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def throttled(self, retry_after: Optional[float]) -> None:
+        """The service answered 429: back off multiplicatively and hold everyone until retry_after has passed."""
+        delay = retry_after if retry_after is not None else _DEFAULT_RETRY_AFTER
+        with self._lock:
+            self.throttled_count += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = 0.0
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logger.info(f"⏳ Throttled by the API: pausing requests for {delay:.1f}s, rate now {self.rate:.2f}/s")
+
+    def succeeded(self) -> None:
+        """Additive recovery towards the configured rate."""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + 0.1)
+
+
+class RateLimitedSession:
+    """Exposes `request()` like the requests module, through one pooled session and a shared TokenBucket."""
+
+    def __init__(self, bucket: TokenBucket, pool_size: int = 10):
+        self.bucket = bucket
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> "requests.Response":
+        with tracing.span("http.request", **{"http.request.method": method, "url.path": urlsplit(url).path}) as span:
+            waited = time.monotonic()
+            self.bucket.acquire()
+            span.set(**{"rate_limit.wait_seconds": round(time.monotonic() - waited, 3)})
+            response = self._session.request(method=method, url=url, **kwargs)
+            span.set(**{"http.response.status_code": response.status_code})
+        if response.status_code == 429:
+            self.bucket.throttled(retry_after(response))
+        else:
+            self.bucket.succeeded()
+        return response
+
+    def close(self) -> None:
+        self._session.close()
+
+
+def retry_after(response: "requests.Response") -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
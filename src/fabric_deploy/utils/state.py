@@ -0,0 +1,19 @@
+import os
+from pathlib import Path
+
+from ..adapters.git_ops import GitOperations
+
+STATE_DIR_ENV = "FABRIC_DEPLOY_STATE_DIR"
+
+
+def state_dir(git: GitOperations) -> Path:
+    """
+    Directory for local run state (snapshots, caches, journals).
+
+    Lives inside the repository's .git directory so the work tree stays clean, unless overridden
+    with FABRIC_DEPLOY_STATE_DIR (e.g. to restore it from a CI cache).
+    """
+    override = os.getenv(STATE_DIR_ENV)
+    path = Path(override) if override else git.git_dir() / "fabric-deploy"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,142 @@
+"""
+utils.tracing
+-------------
+Lightweight span instrumentation for deploy phases, per-item publishes, git calls and API requests.
+
+Spans nest through a context variable (threads pass their parent explicitly) and are exported as JSON lines
+using OpenTelemetry field names, so a trace file can be loaded into OTel tooling or simply grepped.
+"""
+
+import json
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+SERVICE_NAME = "fabric-deploy"
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    start_time_unix_nano: int
+    end_time_unix_nano: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status_code: str = "OK"
+    status_message: str = ""
+
+    @property
+    def seconds(self) -> float:
+        end = self.end_time_unix_nano if self.end_time_unix_nano is not None else time.time_ns()
+        return (end - self.start_time_unix_nano) / 1e9
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "kind": "SPAN_KIND_INTERNAL",
+            "start_time_unix_nano": self.start_time_unix_nano,
+            "end_time_unix_nano": self.end_time_unix_nano,
+            "attributes": self.attributes,
+            "status": {"code": f"STATUS_CODE_{self.status_code}", "message": self.status_message},
+            "resource": {"service.name": SERVICE_NAME},
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("fabric_deploy_span", default=None)
+
+
+class Tracer:
+    """Collects the finished spans of one trace (one CLI run)."""
+
+    def __init__(self):
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, **attributes: Any) -> Iterator[Span]:
+        """Time the enclosed block as a child of parent (default: the current span of this thread)."""
+        parent = parent if parent is not None else _current.get()
+        span = Span(
+            name=name,
+            trace_id=self.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_span_id=parent.span_id if parent is not None else None,
+            start_time_unix_nano=time.time_ns(),
+            attributes=attributes,
+        )
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            if not (isinstance(exc, SystemExit) and not exc.code):
+                span.status_code = "ERROR"
+                span.status_message = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            span.end_time_unix_nano = time.time_ns()
+            _current.reset(token)
+            with self._lock:
+                self.spans.append(span)
+
+    def export(self, path: Path) -> None:
+        """Write the finished spans as JSON lines, in start order."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_time_unix_nano)
+        with Path(path).open("w", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def summary(self) -> List[Tuple[str, int, float, float]]:
+        """(name, count, total seconds, max seconds) per span name, by total time descending."""
+        totals: Dict[str, List[float]] = {}
+        with self._lock:
+            for span in self.spans:
+                totals.setdefault(span.name, []).append(span.seconds)
+        rows = [(name, len(s), sum(s), max(s)) for name, s in totals.items()]
+        return sorted(rows, key=lambda r: r[2], reverse=True)
+
+
+_tracer = Tracer()
+
+
+def start_trace() -> Tracer:
+    """Begin a new trace; later spans are collected by the returned tracer."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def span(name: str, parent: Optional[Span] = None, **attributes: Any):
+    """Context manager timing the enclosed block as a span of the current trace."""
+    return _tracer.span(name, parent, **attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def format_summary(tracer: Tracer, limit: int = 30) -> str:
+    rows = tracer.summary()
+    lines = [f"  {'span':<32} {'count':>6} {'total s':>9} {'max s':>8}"]
+    lines += [f"  {name:<32} {count:>6} {total:>9.2f} {longest:>8.2f}" for name, count, total, longest in rows[:limit]]
+    if len(rows) > limit:
+        lines.append(f"  … {len(rows) - limit} more")
+    return "\n".join(lines)